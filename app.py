@@ -3,18 +3,28 @@ Vantix - Fantasy Premier League Dashboard
 Main Flask Application (Production Optimized)
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, g, render_template, jsonify, request
 from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from datetime import datetime
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+import hashlib
 import logging
 import os
+import numpy as np
 import requests
-from functools import wraps
+from functools import cached_property, wraps
 
-from data.database import init_db, get_db_connection, get_league_connection, get_league_db_path
+from data.database import (
+    init_db, get_db_connection, get_league_reader, get_league_db_path,
+    get_league_db_version, get_live_db_version, get_reference_db_version, get_reference_next_deadline
+)
 from data.fpl_api import FPLDataCollector
+from data.league_matrix import get_league_matrix
+from data.league_pool import LeaguePool
+from data.ownership import get_league_ownership
+from data.planner import CollectionPlanner
 import config
 
 # Configure logging
@@ -54,7 +64,7 @@ _refresh_lock = {}
 
 def get_current_gameweek(league_code=None):
     """Get the current active gameweek"""
-    conn = get_league_connection(league_code) if league_code else get_db_connection()
+    conn = get_league_reader(league_code) if league_code else get_db_connection()
     current = conn.execute(
         'SELECT id FROM gameweeks WHERE finished = 0 ORDER BY id LIMIT 1'
     ).fetchone()
@@ -70,7 +80,7 @@ def get_current_gameweek(league_code=None):
 
 def get_last_completed_gameweek(league_code=None):
     """Get the last completed (finished) gameweek"""
-    conn = get_league_connection(league_code) if league_code else get_db_connection()
+    conn = get_league_reader(league_code) if league_code else get_db_connection()
     last_completed = conn.execute(
         'SELECT MAX(id) as max_gw FROM gameweeks WHERE finished = 1'
     ).fetchone()
@@ -80,7 +90,7 @@ def get_last_completed_gameweek(league_code=None):
 
 def get_gameweek_status(league_code=None):
     """Get detailed gameweek status including whether current GW has started"""
-    conn = get_league_connection(league_code) if league_code else get_db_connection()
+    conn = get_league_reader(league_code) if league_code else get_db_connection()
     
     # Get current (unfinished) gameweek
     current_gw = conn.execute(
@@ -122,6 +132,13 @@ def get_gameweek_status(league_code=None):
     }
 
 
+def get_ownership_gameweek(league_code, requested=None):
+    """Gameweek for squad ownership: ?gameweek= clamped to 1..current gameweek, else the last completed"""
+    if not requested:
+        return get_last_completed_gameweek(league_code)
+    return min(max(requested, 1), get_current_gameweek(league_code))
+
+
 def get_transfer_gameweek(league_code=None):
     """Get the gameweek to use for displaying transfers (last completed or current if started)"""
     gw_status = get_gameweek_status(league_code)
@@ -205,7 +222,7 @@ def is_refresh_needed(league_code):
             return False, "No FPL data available"
         
         # Get our database status
-        conn = get_league_connection(league_code)
+        conn = get_league_reader(league_code)
         
         # Get last updated time
         last_update = conn.execute(
@@ -216,14 +233,15 @@ def is_refresh_needed(league_code):
             conn.close()
             return True, "No data in database yet"
         
-        # Get latest gameweek in DB
+        # Get latest gameweek collected for this league (gameweeks are shared
+        # across leagues, so they don't show whether this league is current)
         latest_gw = conn.execute(
-            'SELECT MAX(id) as max_gw FROM gameweeks WHERE finished = 1'
+            'SELECT MAX(gameweek) as max_gw FROM gameweek_points'
         ).fetchone()
         
         conn.close()
         
-        db_latest_finished_gw = latest_gw['max_gw'] if latest_gw else 0
+        db_latest_finished_gw = latest_gw['max_gw'] if latest_gw and latest_gw['max_gw'] else 0
         fpl_current_gw = fpl_current['id']
         fpl_is_finished = fpl_current['finished']
         
@@ -266,6 +284,127 @@ def require_refresh_token(f):
     return decorated_function
 
 
+# ==================== CONDITIONAL GET & RESPONSE CACHE ====================
+
+_deadline_cache = {}  # reference store version -> deadline of the first unfinished gameweek
+
+
+def get_next_deadline(reference_version):
+    """Deadline (UTC) of the first unfinished gameweek, read from the reference
+    version stamp once per version (no database access)"""
+    if reference_version in _deadline_cache:
+        return _deadline_cache[reference_version]
+    
+    recorded = get_reference_next_deadline()
+    deadline = None
+    if recorded:
+        try:
+            deadline = datetime.fromisoformat(recorded.replace('Z', '+00:00')).astimezone(timezone.utc)
+        except ValueError:
+            pass
+    
+    _deadline_cache.clear()  # Only the latest version is ever asked for again
+    _deadline_cache[reference_version] = deadline
+    return deadline
+
+
+def get_league_generation(league_code, live=False):
+    """(generation, last modified) of everything a league's API responses are built from
+    
+    The generation covers the published league snapshot, the shared reference
+    store, the league's live points when live is set, and whether the current
+    gameweek's deadline has passed (which moves the transfers panel on). It
+    comes from version stamps alone, never a database connection. None if the
+    league has no database yet.
+    """
+    league_version = get_league_db_version(league_code)
+    if league_version is None:
+        return None
+    
+    reference_version = get_reference_db_version()
+    live_version = get_live_db_version(league_code) if live else None
+    deadline = get_next_deadline(reference_version)
+    started = deadline is not None and datetime.now(timezone.utc) >= deadline
+    
+    signatures = (league_version, reference_version, live_version)
+    modified_ns = max(signature[1] for signature in signatures if signature)
+    last_modified = datetime.fromtimestamp(modified_ns / 1e9, timezone.utc)
+    if started:
+        last_modified = max(last_modified, deadline)
+    
+    return (league_version, reference_version, live_version, started), last_modified.replace(microsecond=0)
+
+
+def normalized_query():
+    """Query string with parameters sorted by name (repeated values keep their order)"""
+    return urlencode(sorted(request.args.items(multi=True), key=lambda item: item[0]))
+
+
+def api_cache_key(*args, **kwargs):
+    """Response cache key for league API endpoints
+    
+    Namespaced by league code, then keyed by the request's ETag when it has
+    one. The ETag is derived from the published snapshot's file signature
+    (get_league_db_version), so a refresh in any process moves that league
+    onto new keys; its old entries age out and other leagues keep theirs.
+    """
+    prefix = f"api/{request.view_args['league_code']}"
+    
+    validators = g.get('api_validators')
+    if validators:
+        return f'{prefix}/{validators[0]}'
+    return f'{prefix}/{request.path}?{normalized_query()}'
+
+
+def set_api_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = config.API_CACHE_MAX_AGE
+    response.cache_control.must_revalidate = True
+
+
+@app.before_request
+def answer_conditional_get():
+    """Answer If-None-Match / If-Modified-Since on league API GETs before any DB access"""
+    if request.method not in ('GET', 'HEAD') or not request.path.startswith('/api/'):
+        return None
+    if 'league_code' not in (request.view_args or {}):
+        return None
+    
+    generation = get_league_generation(request.view_args['league_code'], live=request.endpoint == 'api_live')
+    if generation is None:
+        return None
+    
+    generation, last_modified = generation
+    etag = hashlib.sha1(repr((request.path, generation, normalized_query())).encode()).hexdigest()
+    g.api_validators = (etag, last_modified)
+    
+    # If-None-Match takes precedence; If-Modified-Since only applies without it
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        fresh = last_modified <= request.if_modified_since
+    else:
+        fresh = False
+    
+    if not fresh:
+        return None
+    
+    response = app.response_class(status=304)
+    set_api_validators(response, etag, last_modified)
+    return response
+
+
+@app.after_request
+def add_api_validators(response):
+    """Tag successful league API responses with ETag, Last-Modified and Cache-Control"""
+    validators = g.get('api_validators')
+    if validators and response.status_code == 200:
+        set_api_validators(response, *validators)
+    return response
+
+
 # ==================== ROUTES ====================
 
 @app.route('/')
@@ -289,7 +428,7 @@ def league_list():
         
         if os.path.exists(db_path):
             try:
-                conn = get_league_connection(league_code)
+                conn = get_league_reader(league_code)
                 count = conn.execute('SELECT COUNT(*) as count FROM teams').fetchone()
                 info['team_count'] = count['count'] if count else 0
                 
@@ -324,7 +463,7 @@ def dashboard_league(league_code):
         return render_template('error.html', 
             error=f'No data for league {league_code}. Run collect_all_leagues.py first.'), 404
 
-    conn = get_league_connection(league_code)
+    conn = get_league_reader(league_code)
     teams = conn.execute('SELECT * FROM teams ORDER BY team_name').fetchall()
     teams = [dict(team) for team in teams]
     
@@ -349,1007 +488,810 @@ def dashboard_league(league_code):
     )
 
 
-# ==================== API ENDPOINTS (All with Caching) ====================
+# ==================== DASHBOARD PANELS ====================
 
-@app.route('/api/<int:league_code>/cumulative-points')
-@limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
-def api_cumulative_points(league_code):
-    """API endpoint for cumulative points chart data"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        conn = get_league_connection(league_code)
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                SELECT 
-                    t.entry_id,
-                    t.team_name,
-                    gp.gameweek,
-                    SUM(gp.points) OVER (PARTITION BY t.entry_id ORDER BY gp.gameweek) as cumulative_points
-                FROM teams t
-                JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                WHERE t.entry_id IN ({placeholders}) AND gp.gameweek <= ?
-                ORDER BY gp.gameweek, t.team_name
-            '''
-            rows = conn.execute(query, selected_teams + [last_completed_gw]).fetchall()
-        else:
-            rows = conn.execute('''
-                SELECT 
-                    t.entry_id,
-                    t.team_name,
-                    gp.gameweek,
-                    SUM(gp.points) OVER (PARTITION BY t.entry_id ORDER BY gp.gameweek) as cumulative_points
-                FROM teams t
-                JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                WHERE gp.gameweek <= ?
-                ORDER BY gp.gameweek, t.team_name
-            ''', [last_completed_gw]).fetchall()
-        
+class LeagueSelection:
+    """One league and team selection, shared by the dashboard panel builders
+    
+    Gameweek lookups and the points matrix are resolved at most once, so the
+    batched /dashboard endpoint does that work a single time for all panels.
+    """
+    
+    def __init__(self, league_code, args):
+        self.league_code = league_code
+        self.args = args
+        # Team IDs that are not integers are ignored
+        self.selected_teams = args.getlist('teams', type=int)
+    
+    @cached_property
+    def finished_gw(self):
+        """Last finished gameweek, or None before any has finished"""
+        conn = get_league_reader(self.league_code)
+        last_completed = conn.execute(
+            'SELECT MAX(id) as max_gw FROM gameweeks WHERE finished = 1'
+        ).fetchone()
         conn.close()
+        return last_completed['max_gw'] if last_completed else None
+    
+    @cached_property
+    def last_completed_gw(self):
+        return self.finished_gw or 1
+    
+    @cached_property
+    def transfer_gw(self):
+        """Current gameweek once it has started, otherwise the last completed one"""
+        gw_status = get_gameweek_status(self.league_code)
+        return gw_status['current_gw'] if gw_status['started'] else self.last_completed_gw
+    
+    @cached_property
+    def matrix(self):
+        return get_league_matrix(self.league_code)
+    
+    @cached_property
+    def rows(self):
+        """Matrix rows of the selected teams (every team when none are selected)"""
+        return self.matrix.rows(self.selected_teams or None)
+
+
+def build_cumulative_points(league):
+    """Cumulative points chart data"""
+    matrix = league.matrix
+    series = matrix.series(league.rows, matrix.cumulative_points[league.rows], end_gw=league.last_completed_gw)
+    
+    # Teams in order of their first gameweek, then by name
+    series.sort(key=lambda team: (team[1][0], matrix.team_names[team[0]]))
+    
+    return {'teams': [{
+        'team_name': matrix.team_names[row],
+        'data': [{'x': gw, 'y': points} for gw, points in zip(gameweeks, values)]
+    } for row, gameweeks, values in series]}
+
+
+def build_league_positions(league):
+    """League position worm chart data"""
+    selected_teams = league.selected_teams
+    last_completed_gw = league.last_completed_gw
+    
+    # Positions among the selected teams only (every team when none are selected)
+    matrix = league.matrix
+    positions = matrix.ranks(league.rows, last_completed_gw)
+    series = matrix.series(league.rows, positions, end_gw=last_completed_gw)
+    series.sort(key=lambda team: (team[1][0], team[2][0], team[0]))
+    
+    conn = get_league_reader(league.league_code)
+    
+    if selected_teams:
+        placeholders = ','.join('?' * len(selected_teams))
+        chip_query = f'''
+            SELECT entry_id, gameweek, chip_name
+            FROM chip_usage
+            WHERE entry_id IN ({placeholders}) AND gameweek <= ?
+        '''
+        chips = conn.execute(chip_query, selected_teams + [last_completed_gw]).fetchall()
+    else:
+        chips = conn.execute('''
+            SELECT entry_id, gameweek, chip_name
+            FROM chip_usage
+            WHERE gameweek <= ?
+        ''', [last_completed_gw]).fetchall()
+    
+    conn.close()
+    
+    teams_data = {}
+    for row, gameweeks, values in series:
+        teams_data[int(matrix.entry_ids[row])] = {
+            'team_name': matrix.team_names[row],
+            'data': [{'x': gw, 'y': position} for gw, position in zip(gameweeks, values)],
+            'chips': []
+        }
+    
+    for chip in chips:
+        if chip['entry_id'] in teams_data:
+            teams_data[chip['entry_id']]['chips'].append({
+                'gameweek': chip['gameweek'],
+                'chip': chip['chip_name']
+            })
+    
+    return {'teams': list(teams_data.values())}
+
+
+def build_recent_transfers(league):
+    """Recent transfers for the current gameweek once started, else the last completed one"""
+    selected_teams = league.selected_teams
+    transfer_gw = league.transfer_gw
+    
+    conn = get_league_reader(league.league_code)
+    
+    if selected_teams:
+        placeholders = ','.join('?' * len(selected_teams))
+        query = f'''
+            SELECT 
+                t.entry_id,
+                t.team_name,
+                tr.gameweek,
+                tr.transfers_in,
+                tr.transfers_out,
+                tr.transfer_count,
+                gp.event_transfers_cost
+            FROM teams t
+            LEFT JOIN transfers tr ON t.entry_id = tr.entry_id AND tr.gameweek = ?
+            LEFT JOIN gameweek_points gp ON t.entry_id = gp.entry_id AND gp.gameweek = ?
+            WHERE t.entry_id IN ({placeholders})
+            ORDER BY t.team_name
+        '''
+        params = [transfer_gw, transfer_gw] + selected_teams
+        rows = conn.execute(query, params).fetchall()
+    else:
+        rows = conn.execute('''
+            SELECT 
+                t.entry_id,
+                t.team_name,
+                tr.gameweek,
+                tr.transfers_in,
+                tr.transfers_out,
+                tr.transfer_count,
+                gp.event_transfers_cost
+            FROM teams t
+            LEFT JOIN transfers tr ON t.entry_id = tr.entry_id AND tr.gameweek = ?
+            LEFT JOIN gameweek_points gp ON t.entry_id = gp.entry_id AND gp.gameweek = ?
+            ORDER BY t.team_name
+        ''', [transfer_gw, transfer_gw]).fetchall()
+    
+    # Get chip usage for transfer gameweek
+    if selected_teams:
+        chip_query = f'''
+            SELECT entry_id, chip_name
+            FROM chip_usage
+            WHERE gameweek = ? AND entry_id IN ({placeholders})
+        '''
+        chip_params = [transfer_gw] + selected_teams
+        chips = conn.execute(chip_query, chip_params).fetchall()
+    else:
+        chips = conn.execute('''
+            SELECT cu.entry_id, cu.chip_name
+            FROM chip_usage cu
+            JOIN teams t ON cu.entry_id = t.entry_id
+            WHERE cu.gameweek = ?
+        ''', [transfer_gw]).fetchall()
+    
+    conn.close()
+    
+    # Create chip lookup
+    chip_lookup = {}
+    for chip in chips:
+        chip_lookup[chip['entry_id']] = chip['chip_name']
+    
+    transfers = []
+    for row in rows:
+        chip_used = chip_lookup.get(row['entry_id'])
+        transfer_cost = row['event_transfers_cost'] if row['event_transfers_cost'] else 0
         
-        teams_data = {}
-        for row in rows:
-            entry_id = row['entry_id']
-            if entry_id not in teams_data:
-                teams_data[entry_id] = {
-                    'team_name': row['team_name'],
-                    'data': []
-                }
-            teams_data[entry_id]['data'].append({
-                'x': row['gameweek'],
-                'y': row['cumulative_points']
+        if row['transfer_count'] and row['transfer_count'] > 0:
+            transfers.append({
+                'team_name': row['team_name'],
+                'transfers_in': row['transfers_in'].split(',') if row['transfers_in'] else [],
+                'transfers_out': row['transfers_out'].split(',') if row['transfers_out'] else [],
+                'count': row['transfer_count'],
+                'transfer_cost': transfer_cost,
+                'chip_used': chip_used
+            })
+        else:
+            transfers.append({
+                'team_name': row['team_name'],
+                'transfers_in': [],
+                'transfers_out': [],
+                'count': 0,
+                'transfer_cost': 0,
+                'chip_used': chip_used
             })
+    
+    return {'transfers': transfers, 'gameweek': transfer_gw}
+
+
+def build_stats(league):
+    """League statistics"""
+    selected_teams = league.selected_teams
+    conn = get_league_reader(league.league_code)
+    
+    where_clause = ""
+    params = []
+    if selected_teams:
+        placeholders = ','.join('?' * len(selected_teams))
+        where_clause = f"WHERE t.entry_id IN ({placeholders})"
+        params = selected_teams
+    
+    most_goals = conn.execute(f'''
+        SELECT t.team_name, ps.total_goals
+        FROM teams t
+        JOIN player_stats ps ON t.entry_id = ps.entry_id
+        {where_clause}
+        ORDER BY ps.total_goals DESC
+        LIMIT 1
+    ''', params).fetchone()
+    
+    most_clean_sheets = conn.execute(f'''
+        SELECT t.team_name, ps.total_clean_sheets
+        FROM teams t
+        JOIN player_stats ps ON t.entry_id = ps.entry_id
+        {where_clause}
+        ORDER BY ps.total_clean_sheets DESC
+        LIMIT 1
+    ''', params).fetchone()
+    
+    conn.close()
+    
+    matrix = league.matrix
+    rows = league.rows
+    played = matrix.played[rows]
+    
+    highest_gw_score = None
+    if played.any():
+        scores = np.where(played, matrix.points[rows], np.iinfo(np.int64).min)
+        best, column = np.unravel_index(np.argmax(scores), scores.shape)
+        highest_gw_score = {
+            'team_name': matrix.team_names[rows[best]],
+            'gameweek': int(column) + 1,
+            'points': int(scores[best, column])
+        }
+    
+    # Each team's total is its cumulative points at its latest gameweek
+    current_leader = None
+    ranked = rows[played.any(axis=1)]
+    if len(ranked):
+        totals = matrix.totals(ranked)
+        leader = np.argmax(totals)
+        current_leader = {
+            'team_name': matrix.team_names[ranked[leader]],
+            'total_points': int(totals[leader])
+        }
+    
+    return {
+        'most_goals': {
+            'team': most_goals['team_name'] if most_goals else 'N/A',
+            'goals': most_goals['total_goals'] if most_goals else 0
+        },
+        'most_clean_sheets': {
+            'team': most_clean_sheets['team_name'] if most_clean_sheets else 'N/A',
+            'clean_sheets': most_clean_sheets['total_clean_sheets'] if most_clean_sheets else 0
+        },
+        'highest_gameweek': {
+            'team': highest_gw_score['team_name'] if highest_gw_score else 'N/A',
+            'gameweek': highest_gw_score['gameweek'] if highest_gw_score else 0,
+            'points': highest_gw_score['points'] if highest_gw_score else 0
+        },
+        'current_leader': {
+            'team': current_leader['team_name'] if current_leader else 'N/A',
+            'points': current_leader['total_points'] if current_leader else 0
+        }
+    }
+
+
+def build_form_chart(league):
+    """Recent form (last 5 finished gameweeks)"""
+    if not league.finished_gw:
+        return {'teams': []}
+    
+    end_gw = league.finished_gw
+    start_gw = max(1, end_gw - 4)
+    
+    matrix = league.matrix
+    series = matrix.series(league.rows, matrix.points[league.rows], start_gw, end_gw)
+    series.sort(key=lambda team: (team[1][0], matrix.team_names[team[0]]))
+    
+    return {'teams': [{
+        'team_name': matrix.team_names[row],
+        'data': [{'x': gw, 'y': points} for gw, points in zip(gameweeks, values)]
+    } for row, gameweeks, values in series]}
+
+
+def build_points_distribution(league):
+    """Gameweek score distribution"""
+    bins = [0, 20, 40, 60, 80, 100, 150]
+    scores, counts = league.matrix.histogram(league.rows, bins)
+    
+    if not scores:
+        return {'bins': [], 'counts': []}
+    
+    bin_labels = [f"{bins[i]}-{bins[i+1]}" for i in range(len(bins) - 1)]
+    
+    return {
+        'labels': bin_labels,
+        'counts': counts
+    }
+
+
+def build_team_comparison(league):
+    """Detailed team comparison stats"""
+    selected_teams = league.selected_teams
+    
+    if not selected_teams:
+        return {'teams': []}
+    
+    last_completed_gw = league.last_completed_gw
+    matrix = league.matrix
+    
+    # One row per selected team, in the order they were selected
+    rows = np.array([
+        row for row in (matrix.row(team_id) for team_id in selected_teams) if row is not None
+    ], dtype=np.int64)
+    
+    if not len(rows):
+        return {'teams': []}
+    
+    played = matrix.played[rows, :last_completed_gw]
+    points = matrix.points[rows, :last_completed_gw]
+    total_points = np.where(played, points, 0).sum(axis=1)
+    gameweeks_played = played.sum(axis=1)
+    highest_gw = np.where(played, points, np.iinfo(np.int64).min).max(axis=1, initial=np.iinfo(np.int64).min)
+    lowest_gw = np.where(played, points, np.iinfo(np.int64).max).min(axis=1, initial=np.iinfo(np.int64).max)
+    
+    # Each hit costs 4 points, so total hit cost / 4 is the number of hits
+    hits_taken = np.where(matrix.transfer_cost[rows] > 0, matrix.transfer_cost[rows], 0).sum(axis=1) // 4
+    
+    entry_ids = matrix.entry_ids[rows].tolist()
+    placeholders = ','.join('?' * len(entry_ids))
+    
+    conn = get_league_reader(league.league_code)
+    total_transfers = dict(conn.execute(f'''
+        SELECT entry_id, SUM(transfer_count) as total
+        FROM transfers
+        WHERE entry_id IN ({placeholders})
+        GROUP BY entry_id
+    ''', entry_ids).fetchall())
+    
+    chips_used = dict(conn.execute(f'''
+        SELECT entry_id, COUNT(*) as count
+        FROM chip_usage
+        WHERE entry_id IN ({placeholders})
+        GROUP BY entry_id
+    ''', entry_ids).fetchall())
+    conn.close()
+    
+    comparison_data = []
+    
+    for i, row in enumerate(rows):
+        entry_id = entry_ids[i]
+        has_points = gameweeks_played[i] > 0
+        
+        comparison_data.append({
+            'team_name': matrix.team_names[row],
+            'manager_name': matrix.manager_names[row],
+            'total_points': int(total_points[i]),
+            'avg_points': round(float(total_points[i] / gameweeks_played[i]), 1) if has_points and total_points[i] else 0,
+            'highest_gw': int(highest_gw[i]) if has_points else 0,
+            'lowest_gw': int(lowest_gw[i]) if has_points else 0,
+            'total_transfers': total_transfers.get(entry_id) or 0,
+            'hits_taken': int(hits_taken[i]),
+            'chips_used': chips_used.get(entry_id, 0)
+        })
+    
+    return {'teams': comparison_data}
+
+
+def build_biggest_movers(league):
+    """Biggest position changes over the last 5 gameweeks"""
+    last_completed_gw = league.last_completed_gw
+    past_gw = max(1, last_completed_gw - 5)
+    
+    # Ranks among the selected teams only (every team when none are selected)
+    matrix = league.matrix
+    rows = league.rows
+    
+    climbers = []
+    fallers = []
+    
+    if last_completed_gw <= matrix.gameweek_count:
+        current_rank, past_rank = matrix.ranks_at(rows, [last_completed_gw, past_gw]).T
+        change = past_rank - current_rank
+        
+        # Teams without a position in both gameweeks have no movement to show
+        moved = np.flatnonzero((current_rank > 0) & (past_rank > 0) & (change != 0))
+        
+        # Biggest change first, ties in league order
+        moved = moved[np.lexsort((current_rank[moved], -change[moved]))]
+        
+        for movers, indices in ((climbers, moved[change[moved] > 0]), (fallers, moved[change[moved] < 0])):
+            for i in indices[:5]:
+                movers.append({
+                    'team_name': matrix.team_names[rows[i]],
+                    'change': abs(int(change[i])),
+                    'current_rank': int(current_rank[i]),
+                    'past_rank': int(past_rank[i])
+                })
+    
+    return {
+        'climbers': climbers,
+        'fallers': fallers
+    }
+
+
+def build_weekly_performance(league):
+    """Weekly performance heatmap"""
+    if not league.selected_teams:
+        return {'teams': []}
+    
+    matrix = league.matrix
+    rows = np.sort(league.rows)  # Rows follow entry_id order
+    series = matrix.series(rows, matrix.points[rows], end_gw=league.last_completed_gw)
+    
+    return {'teams': [{
+        'team_name': matrix.team_names[row],
+        'gameweeks': [{'gameweek': gw, 'points': points} for gw, points in zip(gameweeks, values)]
+    } for row, gameweeks, values in series]}
+
+
+def build_head_to_head(league):
+    """Head-to-head weekly wins among the selected teams"""
+    if len(league.selected_teams) < 2:
+        return {'teams': []}
+    
+    last_completed_gw = league.last_completed_gw
+    
+    matrix = league.matrix
+    rows = league.rows
+    wins, draws = matrix.gameweek_winners(rows, last_completed_gw)
+    
+    # Teams with no gameweeks in range have no record
+    has_played = matrix.played[rows, :last_completed_gw].any(axis=1)
+    
+    result = [
+        {
+            'team_name': matrix.team_names[row],
+            'wins': int(wins[i]),
+            'draws': int(draws[i])
+        }
+        for i, row in enumerate(rows)
+        if has_played[i]
+    ]
+    
+    result.sort(key=lambda x: (x['wins'], x['draws']), reverse=True)
+    
+    return {'teams': result}
+
+
+def build_differentials(league):
+    """Differential tracker - last completed gameweek unless ?gameweek= is given"""
+    selected_teams = league.selected_teams
+    
+    if len(selected_teams) < 2:
+        return {'teams': []}
+    
+    # Use last completed GW for differentials by default
+    gameweek = get_ownership_gameweek(league.league_code, league.args.get('gameweek', type=int))
+    
+    # Packed squad bitsets, cached until the league database changes
+    ownership = get_league_ownership(league.league_code, gameweek)
+    differentials = ownership.differentials(selected_teams)
+    
+    if not differentials:
+        return {'teams': []}
+    
+    conn = get_league_reader(league.league_code)
+    
+    placeholders = ','.join('?' * len(differentials))
+    team_names = dict(conn.execute(f'''
+        SELECT entry_id, team_name FROM teams WHERE entry_id IN ({placeholders})
+    ''', list(differentials)).fetchall())
+    
+    all_player_ids = {player_id for player_ids in differentials.values() for player_id in player_ids}
+    
+    player_names_map = {}
+    if all_player_ids:
+        placeholders_players = ','.join('?' * len(all_player_ids))
+        player_rows = conn.execute(f'''
+            SELECT player_id, web_name
+            FROM players
+            WHERE player_id IN ({placeholders_players})
+        ''', list(all_player_ids)).fetchall()
+        
+        for row in player_rows:
+            player_names_map[row['player_id']] = row['web_name']
+    
+    conn.close()
+    
+    differentials_data = []
+    
+    for entry_id, player_ids in differentials.items():
+        if entry_id not in team_names:
+            continue
+        
+        true_differentials = [
+            player_names_map.get(player_id, f'Player {player_id}') for player_id in player_ids
+        ]
         
-        return jsonify({'teams': list(teams_data.values())})
+        differentials_data.append({
+            'team_name': team_names[entry_id],
+            'differential_count': len(true_differentials),
+            'recent_differentials': true_differentials
+        })
+    
+    return {'teams': differentials_data}
+
+
+def build_podium(league):
+    """Top 3 podium among the selected teams"""
+    if not league.selected_teams:
+        return {'podium': []}
+    
+    matrix = league.matrix
+    rows = league.rows
+    rows = rows[matrix.played[rows].any(axis=1)]
+    
+    totals = matrix.totals(rows)
+    top = np.argsort(-totals, kind='stable')[:3]
+    recent_form = matrix.recent_form(rows[top])
+    
+    podium = []
+    for idx, i in enumerate(top):
+        row = rows[i]
+        podium.append({
+            'position': idx + 1,
+            'team_name': matrix.team_names[row],
+            'manager_name': matrix.manager_names[row],
+            'total_points': int(totals[i]),
+            'recent_form': round(float(recent_form[idx]), 1) if recent_form[idx] else 0,
+            'gap': int(totals[top[0]] - totals[i])
+        })
+    
+    return {'podium': podium}
+
+
+# Panel name (also its /api/<league_code>/<name> endpoint) -> builder
+DASHBOARD_PANELS = {
+    'stats': build_stats,
+    'recent-transfers': build_recent_transfers,
+    'team-comparison': build_team_comparison,
+    'biggest-movers': build_biggest_movers,
+    'weekly-performance': build_weekly_performance,
+    'head-to-head': build_head_to_head,
+    'differentials': build_differentials,
+    'podium': build_podium,
+    'cumulative-points': build_cumulative_points,
+    'league-positions': build_league_positions,
+    'form-chart': build_form_chart,
+    'points-distribution': build_points_distribution,
+}
+
+
+def panel_response(panel, league_code):
+    """One dashboard panel served on its own endpoint"""
+    try:
+        return jsonify(DASHBOARD_PANELS[panel](LeagueSelection(league_code, request.args)))
     except Exception as e:
-        logger.error(f"Error fetching cumulative points: {e}")
+        logger.error(f"Error fetching {panel}: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== API ENDPOINTS (All with Caching) ====================
+
+@app.route('/api/<int:league_code>/dashboard')
+@limiter.limit("120 per minute")
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
+def api_dashboard(league_code):
+    """API endpoint for several dashboard panels in one response
+    
+    ?sections= names the panels (comma-separated; default all of them), and
+    each panel's data is keyed by its name. A panel that fails carries an
+    'error' key without failing the others.
+    """
+    sections = [
+        section for value in request.args.getlist('sections') for section in value.split(',') if section
+    ] or list(DASHBOARD_PANELS)
+    
+    unknown = [section for section in sections if section not in DASHBOARD_PANELS]
+    if unknown:
+        return jsonify({'error': f"Unknown sections: {', '.join(unknown)}"}), 400
+    
+    league = LeagueSelection(league_code, request.args)
+    panels = {}
+    for section in dict.fromkeys(sections):
+        try:
+            panels[section] = DASHBOARD_PANELS[section](league)
+        except Exception as e:
+            logger.error(f"Error fetching {section}: {e}")
+            panels[section] = {'error': str(e)}
+    
+    return jsonify(panels)
+
+
+@app.route('/api/<int:league_code>/cumulative-points')
+@limiter.limit("120 per minute")
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
+def api_cumulative_points(league_code):
+    """API endpoint for cumulative points chart data"""
+    return panel_response('cumulative-points', league_code)
+
+
 @app.route('/api/<int:league_code>/league-positions')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_league_positions(league_code):
     """API endpoint for league position worm chart"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        conn = get_league_connection(league_code)
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                WITH cumulative_points AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        gp.gameweek,
-                        SUM(gp.points) OVER (PARTITION BY t.entry_id ORDER BY gp.gameweek) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE t.entry_id IN ({placeholders}) AND gp.gameweek <= ?
-                ),
-                ranked AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        gameweek,
-                        total_points,
-                        RANK() OVER (PARTITION BY gameweek ORDER BY total_points DESC) as position
-                    FROM cumulative_points
-                )
-                SELECT * FROM ranked ORDER BY gameweek, position
-            '''
-            rows = conn.execute(query, selected_teams + [last_completed_gw]).fetchall()
-        else:
-            rows = conn.execute('''
-                WITH cumulative_points AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        gp.gameweek,
-                        SUM(gp.points) OVER (PARTITION BY t.entry_id ORDER BY gp.gameweek) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE gp.gameweek <= ?
-                ),
-                ranked AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        gameweek,
-                        total_points,
-                        RANK() OVER (PARTITION BY gameweek ORDER BY total_points DESC) as position
-                    FROM cumulative_points
-                )
-                SELECT * FROM ranked ORDER BY gameweek, position
-            ''', [last_completed_gw]).fetchall()
-        
-        if selected_teams:
-            chip_query = f'''
-                SELECT entry_id, gameweek, chip_name
-                FROM chip_usage
-                WHERE entry_id IN ({placeholders}) AND gameweek <= ?
-            '''
-            chips = conn.execute(chip_query, selected_teams + [last_completed_gw]).fetchall()
-        else:
-            chips = conn.execute('''
-                SELECT entry_id, gameweek, chip_name
-                FROM chip_usage
-                WHERE gameweek <= ?
-            ''', [last_completed_gw]).fetchall()
-        
-        conn.close()
-        
-        teams_data = {}
-        for row in rows:
-            entry_id = row['entry_id']
-            if entry_id not in teams_data:
-                teams_data[entry_id] = {
-                    'team_name': row['team_name'],
-                    'data': [],
-                    'chips': []
-                }
-            teams_data[entry_id]['data'].append({
-                'x': row['gameweek'],
-                'y': row['position']
-            })
-        
-        for chip in chips:
-            if chip['entry_id'] in teams_data:
-                teams_data[chip['entry_id']]['chips'].append({
-                    'gameweek': chip['gameweek'],
-                    'chip': chip['chip_name']
-                })
-        
-        return jsonify({'teams': list(teams_data.values())})
-    except Exception as e:
-        logger.error(f"Error fetching league positions: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('league-positions', league_code)
 
 
 @app.route('/api/<int:league_code>/recent-transfers')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_recent_transfers(league_code):
     """API endpoint for recent transfers - uses appropriate gameweek"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        # Use transfer_gameweek instead of current_gw
-        transfer_gw = get_transfer_gameweek(league_code)
-        
-        conn = get_league_connection(league_code)
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                SELECT 
-                    t.team_name,
-                    tr.gameweek,
-                    tr.transfers_in,
-                    tr.transfers_out,
-                    tr.transfer_count,
-                    gp.event_transfers_cost
-                FROM teams t
-                LEFT JOIN transfers tr ON t.entry_id = tr.entry_id AND tr.gameweek = ?
-                LEFT JOIN gameweek_points gp ON t.entry_id = gp.entry_id AND gp.gameweek = ?
-                WHERE t.entry_id IN ({placeholders})
-                ORDER BY t.team_name
-            '''
-            params = [transfer_gw, transfer_gw] + selected_teams
-            rows = conn.execute(query, params).fetchall()
-        else:
-            rows = conn.execute('''
-                SELECT 
-                    t.team_name,
-                    tr.gameweek,
-                    tr.transfers_in,
-                    tr.transfers_out,
-                    tr.transfer_count,
-                    gp.event_transfers_cost
-                FROM teams t
-                LEFT JOIN transfers tr ON t.entry_id = tr.entry_id AND tr.gameweek = ?
-                LEFT JOIN gameweek_points gp ON t.entry_id = gp.entry_id AND gp.gameweek = ?
-                ORDER BY t.team_name
-            ''', [transfer_gw, transfer_gw]).fetchall()
-        
-        # Get chip usage for transfer gameweek
-        if selected_teams:
-            chip_query = f'''
-                SELECT entry_id, chip_name
-                FROM chip_usage
-                WHERE gameweek = ? AND entry_id IN ({placeholders})
-            '''
-            chip_params = [transfer_gw] + selected_teams
-            chips = conn.execute(chip_query, chip_params).fetchall()
-        else:
-            chips = conn.execute('''
-                SELECT cu.entry_id, cu.chip_name
-                FROM chip_usage cu
-                JOIN teams t ON cu.entry_id = t.entry_id
-                WHERE cu.gameweek = ?
-            ''', [transfer_gw]).fetchall()
-        
-        conn.close()
-        
-        # Create chip lookup
-        chip_lookup = {}
-        for chip in chips:
-            chip_lookup[chip['entry_id']] = chip['chip_name']
-        
-        # Get entry_id lookup
-        conn = get_league_connection(league_code)
-        if selected_teams:
-            team_query = f'''
-                SELECT entry_id, team_name
-                FROM teams
-                WHERE entry_id IN ({placeholders})
-            '''
-            teams_data = conn.execute(team_query, selected_teams).fetchall()
-        else:
-            teams_data = conn.execute('SELECT entry_id, team_name FROM teams').fetchall()
-        conn.close()
-        
-        team_to_entry = {team['team_name']: team['entry_id'] for team in teams_data}
-        
-        transfers = []
-        for row in rows:
-            entry_id = team_to_entry.get(row['team_name'])
-            chip_used = chip_lookup.get(entry_id, None) if entry_id else None
-            transfer_cost = row['event_transfers_cost'] if row['event_transfers_cost'] else 0
-            
-            if row['transfer_count'] and row['transfer_count'] > 0:
-                transfers.append({
-                    'team_name': row['team_name'],
-                    'transfers_in': row['transfers_in'].split(',') if row['transfers_in'] else [],
-                    'transfers_out': row['transfers_out'].split(',') if row['transfers_out'] else [],
-                    'count': row['transfer_count'],
-                    'transfer_cost': transfer_cost,
-                    'chip_used': chip_used
-                })
-            else:
-                transfers.append({
-                    'team_name': row['team_name'],
-                    'transfers_in': [],
-                    'transfers_out': [],
-                    'count': 0,
-                    'transfer_cost': 0,
-                    'chip_used': chip_used
-                })
-        
-        return jsonify({'transfers': transfers, 'gameweek': transfer_gw})
-    except Exception as e:
-        logger.error(f"Error fetching recent transfers: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('recent-transfers', league_code)
+
 
 @app.route('/api/<int:league_code>/stats')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_stats(league_code):
     """API endpoint for league statistics"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        conn = get_league_connection(league_code)
-        
-        where_clause = ""
-        params = []
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            where_clause = f"WHERE t.entry_id IN ({placeholders})"
-            params = selected_teams
-        
-        most_goals = conn.execute(f'''
-            SELECT t.team_name, ps.total_goals
-            FROM teams t
-            JOIN player_stats ps ON t.entry_id = ps.entry_id
-            {where_clause}
-            ORDER BY ps.total_goals DESC
-            LIMIT 1
-        ''', params).fetchone()
-        
-        most_clean_sheets = conn.execute(f'''
-            SELECT t.team_name, ps.total_clean_sheets
-            FROM teams t
-            JOIN player_stats ps ON t.entry_id = ps.entry_id
-            {where_clause}
-            ORDER BY ps.total_clean_sheets DESC
-            LIMIT 1
-        ''', params).fetchone()
-        
-        highest_gw_score = conn.execute(f'''
-            SELECT t.team_name, gp.gameweek, gp.points
-            FROM teams t
-            JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-            {where_clause}
-            ORDER BY gp.points DESC
-            LIMIT 1
-        ''', params).fetchone()
-        
-        current_leader = conn.execute(f'''
-            SELECT 
-                t.team_name,
-                SUM(gp.points) as total_points
-            FROM teams t
-            JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-            {where_clause}
-            GROUP BY t.entry_id
-            ORDER BY total_points DESC
-            LIMIT 1
-        ''', params).fetchone()
-        
-        conn.close()
-        
-        return jsonify({
-            'most_goals': {
-                'team': most_goals['team_name'] if most_goals else 'N/A',
-                'goals': most_goals['total_goals'] if most_goals else 0
-            },
-            'most_clean_sheets': {
-                'team': most_clean_sheets['team_name'] if most_clean_sheets else 'N/A',
-                'clean_sheets': most_clean_sheets['total_clean_sheets'] if most_clean_sheets else 0
-            },
-            'highest_gameweek': {
-                'team': highest_gw_score['team_name'] if highest_gw_score else 'N/A',
-                'gameweek': highest_gw_score['gameweek'] if highest_gw_score else 0,
-                'points': highest_gw_score['points'] if highest_gw_score else 0
-            },
-            'current_leader': {
-                'team': current_leader['team_name'] if current_leader else 'N/A',
-                'points': current_leader['total_points'] if current_leader else 0
-            }
-        })
-    except Exception as e:
-        logger.error(f"Error fetching stats: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('stats', league_code)
 
 
 @app.route('/api/<int:league_code>/form-chart')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_form_chart(league_code):
     """API endpoint for recent form (last 5 gameweeks)"""
-    try:
-        conn = get_league_connection(league_code)
-        last_completed = conn.execute('''
-            SELECT MAX(id) as max_gw
-            FROM gameweeks
-            WHERE finished = 1
-        ''').fetchone()
-        
-        if not last_completed or not last_completed['max_gw']:
-            conn.close()
-            return jsonify({'teams': []})
-        
-        end_gw = last_completed['max_gw']
-        start_gw = max(1, end_gw - 4)
-        
-        selected_teams = request.args.getlist('teams')
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                SELECT 
-                    t.entry_id,
-                    t.team_name,
-                    gp.gameweek,
-                    gp.points
-                FROM teams t
-                JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                WHERE gp.gameweek BETWEEN ? AND ? AND t.entry_id IN ({placeholders})
-                ORDER BY gp.gameweek, t.team_name
-            '''
-            params = [start_gw, end_gw] + selected_teams
-            rows = conn.execute(query, params).fetchall()
-        else:
-            rows = conn.execute('''
-                SELECT 
-                    t.entry_id,
-                    t.team_name,
-                    gp.gameweek,
-                    gp.points
-                FROM teams t
-                JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                WHERE gp.gameweek BETWEEN ? AND ?
-                ORDER BY gp.gameweek, t.team_name
-            ''', [start_gw, end_gw]).fetchall()
-        
-        conn.close()
-        
-        teams_data = {}
-        for row in rows:
-            entry_id = row['entry_id']
-            if entry_id not in teams_data:
-                teams_data[entry_id] = {
-                    'team_name': row['team_name'],
-                    'data': []
-                }
-            teams_data[entry_id]['data'].append({
-                'x': row['gameweek'],
-                'y': row['points']
-            })
-        
-        return jsonify({'teams': list(teams_data.values())})
-    except Exception as e:
-        logger.error(f"Error fetching form chart: {e}")
-        return jsonify({'error': str(e), 'teams': []}), 500
+    return panel_response('form-chart', league_code)
 
 
 @app.route('/api/<int:league_code>/points-distribution')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_points_distribution(league_code):
     """API endpoint for points distribution"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        
-        conn = get_league_connection(league_code)
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                SELECT points
-                FROM gameweek_points
-                WHERE entry_id IN ({placeholders})
-                ORDER BY points
-            '''
-            rows = conn.execute(query, selected_teams).fetchall()
-        else:
-            rows = conn.execute('''
-                SELECT points
-                FROM gameweek_points
-                ORDER BY points
-            ''').fetchall()
-        
-        conn.close()
-        
-        points_list = [row['points'] for row in rows]
-        
-        if not points_list:
-            return jsonify({'bins': [], 'counts': []})
-        
-        bins = [0, 20, 40, 60, 80, 100, 150]
-        counts = [0] * (len(bins) - 1)
-        
-        for points in points_list:
-            for i in range(len(bins) - 1):
-                if bins[i] <= points < bins[i + 1]:
-                    counts[i] += 1
-                    break
-            else:
-                if points >= bins[-1]:
-                    counts[-1] += 1
-        
-        bin_labels = [f"{bins[i]}-{bins[i+1]}" for i in range(len(bins) - 1)]
-        
-        return jsonify({
-            'labels': bin_labels,
-            'counts': counts
-        })
-    except Exception as e:
-        logger.error(f"Error fetching points distribution: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('points-distribution', league_code)
+
 
 @app.route('/api/<int:league_code>/team-comparison')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_team_comparison(league_code):
     """API endpoint for detailed team comparison stats"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        
-        if not selected_teams:
-            return jsonify({'teams': []})
-        
-        conn = get_league_connection(league_code)
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        comparison_data = []
-        
-        for team_id in selected_teams:
-            team_info = conn.execute('''
-                SELECT t.team_name, t.manager_name
-                FROM teams t
-                WHERE t.entry_id = ?
-            ''', [team_id]).fetchone()
-            
-            if not team_info:
-                continue
-            
-            total_points = conn.execute('''
-                SELECT SUM(points) as total
-                FROM gameweek_points
-                WHERE entry_id = ? AND gameweek <= ?
-            ''', [team_id, last_completed_gw]).fetchone()
-            
-            avg_points = conn.execute('''
-                SELECT AVG(points) as avg
-                FROM gameweek_points
-                WHERE entry_id = ? AND gameweek <= ?
-            ''', [team_id, last_completed_gw]).fetchone()
-            
-            highest_gw = conn.execute('''
-                SELECT MAX(points) as highest
-                FROM gameweek_points
-                WHERE entry_id = ? AND gameweek <= ?
-            ''', [team_id, last_completed_gw]).fetchone()
-            
-            lowest_gw = conn.execute('''
-                SELECT MIN(points) as lowest
-                FROM gameweek_points
-                WHERE entry_id = ? AND gameweek <= ?
-            ''', [team_id, last_completed_gw]).fetchone()
-            
-            total_transfers = conn.execute('''
-                SELECT SUM(transfer_count) as total
-                FROM transfers
-                WHERE entry_id = ?
-            ''', [team_id]).fetchone()
-            
-            # FIXED: Count hits by checking event_transfers_cost > 0
-            # Each hit costs 4 points, so divide by 4 to get number of hits
-            hits_data = conn.execute('''
-                SELECT SUM(event_transfers_cost) as total_cost
-                FROM gameweek_points
-                WHERE entry_id = ? AND event_transfers_cost > 0
-            ''', [team_id]).fetchone()
-            
-            # Calculate number of hits (each hit = 4 points)
-            total_cost = hits_data['total_cost'] if hits_data['total_cost'] else 0
-            hits_taken = total_cost // 4  # Integer division
-            
-            chips_used = conn.execute('''
-                SELECT COUNT(*) as count
-                FROM chip_usage
-                WHERE entry_id = ?
-            ''', [team_id]).fetchone()
-            
-            comparison_data.append({
-                'team_name': team_info['team_name'],
-                'manager_name': team_info['manager_name'],
-                'total_points': total_points['total'] if total_points['total'] else 0,
-                'avg_points': round(avg_points['avg'], 1) if avg_points['avg'] else 0,
-                'highest_gw': highest_gw['highest'] if highest_gw['highest'] else 0,
-                'lowest_gw': lowest_gw['lowest'] if lowest_gw['lowest'] else 0,
-                'total_transfers': total_transfers['total'] if total_transfers['total'] else 0,
-                'hits_taken': hits_taken,
-                'chips_used': chips_used['count'] if chips_used['count'] else 0
-            })
-        
-        conn.close()
-        
-        return jsonify({'teams': comparison_data})
-    except Exception as e:
-        logger.error(f"Error fetching team comparison: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('team-comparison', league_code)
 
 
 @app.route('/api/<int:league_code>/biggest-movers')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_biggest_movers(league_code):
     """API endpoint for biggest position changes"""
-    try:
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        past_gw = max(1, last_completed_gw - 5)
-        
-        selected_teams = request.args.getlist('teams')
-        
-        conn = get_league_connection(league_code)
-        
-        if selected_teams:
-            placeholders = ','.join('?' * len(selected_teams))
-            query = f'''
-                WITH past_totals AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        SUM(gp.points) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE gp.gameweek <= ? AND t.entry_id IN ({placeholders})
-                    GROUP BY t.entry_id, t.team_name
-                ),
-                past_rankings AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        total_points,
-                        RANK() OVER (ORDER BY total_points DESC) as rank
-                    FROM past_totals
-                ),
-                current_totals AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        SUM(gp.points) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE gp.gameweek <= ? AND t.entry_id IN ({placeholders})
-                    GROUP BY t.entry_id, t.team_name
-                ),
-                current_rankings AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        total_points,
-                        RANK() OVER (ORDER BY total_points DESC) as rank
-                    FROM current_totals
-                )
-                SELECT 
-                    c.team_name,
-                    c.rank as current_rank,
-                    p.rank as past_rank,
-                    (p.rank - c.rank) as change
-                FROM current_rankings c
-                LEFT JOIN past_rankings p ON c.entry_id = p.entry_id
-                ORDER BY change DESC
-            '''
-            params = [past_gw] + selected_teams + [last_completed_gw] + selected_teams
-            rows = conn.execute(query, params).fetchall()
-        else:
-            rows = conn.execute('''
-                WITH past_totals AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        SUM(gp.points) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE gp.gameweek <= ?
-                    GROUP BY t.entry_id, t.team_name
-                ),
-                past_rankings AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        total_points,
-                        RANK() OVER (ORDER BY total_points DESC) as rank
-                    FROM past_totals
-                ),
-                current_totals AS (
-                    SELECT 
-                        t.entry_id,
-                        t.team_name,
-                        SUM(gp.points) as total_points
-                    FROM teams t
-                    JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-                    WHERE gp.gameweek <= ?
-                    GROUP BY t.entry_id, t.team_name
-                ),
-                current_rankings AS (
-                    SELECT 
-                        entry_id,
-                        team_name,
-                        total_points,
-                        RANK() OVER (ORDER BY total_points DESC) as rank
-                    FROM current_totals
-                )
-                SELECT 
-                    c.team_name,
-                    c.rank as current_rank,
-                    p.rank as past_rank,
-                    (p.rank - c.rank) as change
-                FROM current_rankings c
-                LEFT JOIN past_rankings p ON c.entry_id = p.entry_id
-                ORDER BY change DESC
-            ''', [past_gw, last_completed_gw]).fetchall()
-        
-        conn.close()
-        
-        climbers = []
-        fallers = []
-        
-        for row in rows:
-            mover = {
-                'team_name': row['team_name'],
-                'change': abs(row['change']) if row['change'] else 0,
-                'current_rank': row['current_rank'],
-                'past_rank': row['past_rank']
-            }
-            
-            if row['change'] > 0:
-                climbers.append(mover)
-            elif row['change'] < 0:
-                fallers.append(mover)
-        
-        return jsonify({
-            'climbers': climbers[:5],
-            'fallers': fallers[:5]
-        })
-    except Exception as e:
-        logger.error(f"Error fetching biggest movers: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('biggest-movers', league_code)
 
 
 @app.route('/api/<int:league_code>/weekly-performance')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_weekly_performance(league_code):
     """API endpoint for weekly performance heatmap"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        conn = get_league_connection(league_code)
-        
-        if not selected_teams:
-            conn.close()
-            return jsonify({'teams': []})
-        
-        placeholders = ','.join('?' * len(selected_teams))
-        
-        query = f'''
-            SELECT 
-                t.entry_id,
-                t.team_name,
-                gp.gameweek,
-                gp.points
-            FROM teams t
-            JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-            WHERE t.entry_id IN ({placeholders}) AND gp.gameweek <= ?
-            ORDER BY t.entry_id, gp.gameweek
-        '''
-        rows = conn.execute(query, selected_teams + [last_completed_gw]).fetchall()
-        
-        conn.close()
-        
-        teams_data = {}
-        for row in rows:
-            entry_id = row['entry_id']
-            if entry_id not in teams_data:
-                teams_data[entry_id] = {
-                    'team_name': row['team_name'],
-                    'gameweeks': []
-                }
-            teams_data[entry_id]['gameweeks'].append({
-                'gameweek': row['gameweek'],
-                'points': row['points']
-            })
-        
-        return jsonify({'teams': list(teams_data.values())})
-    except Exception as e:
-        logger.error(f"Error fetching weekly performance: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('weekly-performance', league_code)
 
 
 @app.route('/api/<int:league_code>/head-to-head')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_head_to_head(league_code):
     """API endpoint for head-to-head weekly wins"""
-    try:
-        selected_teams = request.args.getlist('teams')
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        conn = get_league_connection(league_code)
-        
-        if not selected_teams or len(selected_teams) < 2:
-            conn.close()
-            return jsonify({'teams': []})
-        
-        placeholders = ','.join('?' * len(selected_teams))
-        
-        query = f'''
-            SELECT 
-                t.entry_id,
-                t.team_name,
-                gp.gameweek,
-                gp.points
-            FROM teams t
-            JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-            WHERE t.entry_id IN ({placeholders}) AND gp.gameweek <= ?
-            ORDER BY gp.gameweek, gp.points DESC
-        '''
-        rows = conn.execute(query, selected_teams + [last_completed_gw]).fetchall()
-        
-        conn.close()
-        
-        gameweeks = {}
-        for row in rows:
-            gw = row['gameweek']
-            if gw not in gameweeks:
-                gameweeks[gw] = []
-            gameweeks[gw].append({
-                'entry_id': row['entry_id'],
-                'team_name': row['team_name'],
-                'points': row['points']
-            })
-        
-        team_records = {}
-        for team_id in selected_teams:
-            team_records[int(team_id)] = {'wins': 0, 'draws': 0, 'team_name': ''}
-        
-        for gw, teams in gameweeks.items():
-            if not teams:
-                continue
-            
-            max_points = max(team['points'] for team in teams)
-            winners = [team for team in teams if team['points'] == max_points]
-            
-            if len(winners) == 1:
-                winner_id = winners[0]['entry_id']
-                team_records[winner_id]['wins'] += 1
-                team_records[winner_id]['team_name'] = winners[0]['team_name']
-            else:
-                for winner in winners:
-                    winner_id = winner['entry_id']
-                    team_records[winner_id]['draws'] += 1
-                    team_records[winner_id]['team_name'] = winner['team_name']
-            
-            for team in teams:
-                team_records[team['entry_id']]['team_name'] = team['team_name']
-        
-        result = [
-            {
-                'team_name': record['team_name'],
-                'wins': record['wins'],
-                'draws': record['draws']
-            }
-            for record in team_records.values()
-            if record['team_name']
-        ]
-        
-        result.sort(key=lambda x: (x['wins'], x['draws']), reverse=True)
-        
-        return jsonify({'teams': result})
-    except Exception as e:
-        logger.error(f"Error fetching head-to-head: {e}")
-        return jsonify({'error': str(e)}), 500
+    return panel_response('head-to-head', league_code)
 
 
 @app.route('/api/<int:league_code>/differentials')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
 def api_differentials(league_code):
-    """API endpoint for differential tracker - uses last completed gameweek"""
+    """API endpoint for differential tracker - last completed gameweek unless ?gameweek= is given"""
+    return panel_response('differentials', league_code)
+
+
+@app.route('/api/<int:league_code>/podium')
+@limiter.limit("120 per minute")
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
+def api_podium(league_code):
+    """API endpoint for top 3 podium"""
+    return panel_response('podium', league_code)
+
+
+@app.route('/api/<int:league_code>/ownership')
+@limiter.limit("120 per minute")
+@cache.cached(timeout=300, make_cache_key=api_cache_key)
+def api_ownership(league_code):
+    """API endpoint for player ownership among the selected teams in any gameweek"""
     try:
-        selected_teams = request.args.getlist('teams')
-        
-        conn = get_league_connection(league_code)
-        
-        if not selected_teams or len(selected_teams) < 2:
-            conn.close()
-            return jsonify({'teams': []})
-        
-        # Use last completed GW for differentials
-        last_completed_gw = get_last_completed_gameweek(league_code)
-        
-        placeholders = ','.join('?' * len(selected_teams))
-        
-        squad_rows = conn.execute(f'''
-            SELECT cs.entry_id, cs.player_ids, t.team_name
-            FROM current_squads cs
-            JOIN teams t ON cs.entry_id = t.entry_id
-            WHERE cs.entry_id IN ({placeholders})
-            AND cs.gameweek = ?
-        ''', selected_teams + [last_completed_gw]).fetchall()
-        
-        if not squad_rows:
-            conn.close()
-            return jsonify({'teams': []})
+        selected_teams = request.args.getlist('teams', type=int)
+        gameweek = get_ownership_gameweek(league_code, request.args.get('gameweek', type=int))
+        limit = request.args.get('limit', default=20, type=int)
         
-        squads = {}
-        team_names = {}
-        for row in squad_rows:
-            entry_id = row['entry_id']
-            team_names[entry_id] = row['team_name']
-            if row['player_ids']:
-                squads[entry_id] = set(map(int, row['player_ids'].split(',')))
-            else:
-                squads[entry_id] = set()
+        ownership = get_league_ownership(league_code, gameweek)
+        entry_ids = selected_teams or None
+        team_count = len(ownership.rows(entry_ids))
         
-        player_ownership = {}
-        for squad in squads.values():
-            for player_id in squad:
-                player_ownership[player_id] = player_ownership.get(player_id, 0) + 1
+        if not team_count:
+            return jsonify({'gameweek': gameweek, 'team_count': 0, 'players': []})
         
-        all_player_ids = set(player_ownership.keys())
+        most_owned = ownership.most_owned(limit, entry_ids)
+        top_player_ids = [player_id for player_id, _ in most_owned]
         
         player_names_map = {}
-        if all_player_ids:
-            placeholders_players = ','.join('?' * len(all_player_ids))
-            player_rows = conn.execute(f'''
-                SELECT player_id, web_name
-                FROM players
-                WHERE player_id IN ({placeholders_players})
-            ''', list(all_player_ids)).fetchall()
-            
-            for row in player_rows:
-                player_names_map[row['player_id']] = row['web_name']
-        
-        conn.close()
-        
-        differentials_data = []
-        
-        for entry_id, squad in squads.items():
-            true_differentials = []
-            
-            for player_id in squad:
-                if player_ownership.get(player_id, 0) == 1:
-                    player_name = player_names_map.get(player_id, f'Player {player_id}')
-                    true_differentials.append(player_name)
-            
-            differentials_data.append({
-                'team_name': team_names[entry_id],
-                'differential_count': len(true_differentials),
-                'recent_differentials': true_differentials
-            })
+        if top_player_ids:
+            conn = get_league_reader(league_code)
+            placeholders = ','.join('?' * len(top_player_ids))
+            player_names_map = dict(conn.execute(f'''
+                SELECT player_id, web_name FROM players WHERE player_id IN ({placeholders})
+            ''', top_player_ids).fetchall())
+            conn.close()
         
-        return jsonify({'teams': differentials_data})
+        players = [{
+            'player_id': player_id,
+            'player_name': player_names_map.get(player_id, f'Player {player_id}'),
+            'owned_by': owned_by,
+            'ownership_pct': round(100 * owned_by / team_count, 1)
+        } for player_id, owned_by in most_owned]
         
+        return jsonify({'gameweek': gameweek, 'team_count': team_count, 'players': players})
     except Exception as e:
-        logger.error(f"Error fetching differentials: {e}")
+        logger.error(f"Error fetching ownership: {e}")
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/<int:league_code>/podium')
+@app.route('/api/<int:league_code>/live')
 @limiter.limit("120 per minute")
-@cache.cached(timeout=300, query_string=True)
-def api_podium(league_code):
-    """API endpoint for top 3 podium"""
+@cache.cached(timeout=config.LIVE_POLL_INTERVAL, make_cache_key=api_cache_key)
+def api_live(league_code):
+    """API endpoint for live points in the gameweek in progress"""
     try:
-        selected_teams = request.args.getlist('teams')
+        selected_teams = request.args.getlist('teams', type=int)
         
-        conn = get_league_connection(league_code)
+        conn = get_league_reader(league_code)
         
-        if not selected_teams:
+        gameweek_row = conn.execute('SELECT MAX(gameweek) as gw FROM live.live_points').fetchone()
+        if not gameweek_row or gameweek_row['gw'] is None:
             conn.close()
-            return jsonify({'podium': []})
+            return jsonify({'gameweek': None, 'teams': []})
         
-        placeholders = ','.join('?' * len(selected_teams))
+        gameweek = gameweek_row['gw']
+        team_filter = ''
+        params = [gameweek, gameweek]
+        if selected_teams:
+            team_filter = f"AND t.entry_id IN ({','.join('?' * len(selected_teams))})"
+            params += selected_teams
         
-        query = f'''
+        # Live total = total after the previous gameweek + live points so far
+        rows = conn.execute(f'''
             SELECT 
                 t.entry_id,
                 t.team_name,
                 t.manager_name,
-                SUM(gp.points) as total_points
+                lp.points as live_points,
+                lp.updated_at,
+                COALESCE((
+                    SELECT gp.total_points
+                    FROM gameweek_points gp
+                    WHERE gp.entry_id = t.entry_id AND gp.gameweek < ?
+                    ORDER BY gp.gameweek DESC
+                    LIMIT 1
+                ), 0) + lp.points as total_points
             FROM teams t
-            JOIN gameweek_points gp ON t.entry_id = gp.entry_id
-            WHERE t.entry_id IN ({placeholders})
-            GROUP BY t.entry_id
-            ORDER BY total_points DESC
-            LIMIT 3
-        '''
-        rows = conn.execute(query, selected_teams).fetchall()
-        
-        podium = []
-        for idx, row in enumerate(rows):
-            recent_form = conn.execute('''
-                SELECT AVG(points) as avg_points
-                FROM (
-                    SELECT points
-                    FROM gameweek_points
-                    WHERE entry_id = ?
-                    ORDER BY gameweek DESC
-                    LIMIT 3
-                )
-            ''', [row['entry_id']]).fetchone()
-            
-            if idx == 0:
-                gap = 0
-            else:
-                leader_points = rows[0]['total_points']
-                gap = leader_points - row['total_points']
-            
-            podium.append({
-                'position': idx + 1,
-                'team_name': row['team_name'],
-                'manager_name': row['manager_name'],
-                'total_points': row['total_points'],
-                'recent_form': round(recent_form['avg_points'], 1) if recent_form['avg_points'] else 0,
-                'gap': gap
-            })
+            JOIN live.live_points lp ON lp.entry_id = t.entry_id AND lp.gameweek = ?
+            WHERE 1 = 1 {team_filter}
+            ORDER BY total_points DESC, live_points DESC
+        ''', params).fetchall()
         
         conn.close()
-        return jsonify({'podium': podium})
+        
+        teams = [{
+            'rank': idx + 1,
+            'team_name': row['team_name'],
+            'manager_name': row['manager_name'],
+            'live_points': row['live_points'],
+            'total_points': row['total_points']
+        } for idx, row in enumerate(rows)]
+        
+        return jsonify({
+            'gameweek': gameweek,
+            'updated_at': max((row['updated_at'] for row in rows), default=None),
+            'teams': teams
+        })
     except Exception as e:
-        logger.error(f"Error fetching podium: {e}")
+        logger.error(f"Error fetching live points: {e}")
         return jsonify({'error': str(e)}), 500
 
 
@@ -1387,9 +1329,6 @@ def api_refresh_league(league_code):
             collector = FPLDataCollector(team_id=None, league_id=league_code)
             collector.collect_all_data()
             
-            # Clear cache for this league
-            cache.clear()
-            
             return jsonify({
                 'status': 'success',
                 'message': f'League {league_code} refreshed successfully',
@@ -1413,6 +1352,9 @@ def api_refresh_all():
         logger.info("Refreshing all leagues")
         results = []
         
+        # Leagues to refresh, with the reason each needs it
+        pending = {}
+        
         for league in config.LEAGUES:
             league_code = league['code']
             
@@ -1437,29 +1379,31 @@ def api_refresh_all():
                 continue
             
             _refresh_lock[league_code] = True
-            
+            pending[league_code] = reason
+            logger.info(f"Refreshing league {league_code}: {reason}")
+        
+        if pending:
             try:
-                logger.info(f"Refreshing league {league_code}: {reason}")
-                collector = FPLDataCollector(team_id=None, league_id=league_code)
-                collector.collect_all_data()
-                
-                results.append({
-                    'league_code': league_code,
-                    'status': 'success',
-                    'reason': reason
-                })
+                if config.COLLECTION_PROCESSES > 1:
+                    # Leagues run side by side in worker processes
+                    errors = LeaguePool(list(pending)).run()
+                else:
+                    # One planned run: entries shared between leagues are fetched once
+                    errors = CollectionPlanner(list(pending)).run()
             except Exception as e:
-                logger.error(f"Error refreshing league {league_code}: {e}")
+                logger.error(f"Error refreshing leagues: {e}")
+                errors = {league_code: str(e) for league_code in pending}
+            finally:
+                for league_code in pending:
+                    _refresh_lock[league_code] = False
+            
+            for league_code, reason in pending.items():
+                error = errors.get(league_code)
                 results.append({
                     'league_code': league_code,
-                    'status': 'error',
-                    'reason': str(e)
+                    'status': 'success' if error is None else 'error',
+                    'reason': reason if error is None else error
                 })
-            finally:
-                _refresh_lock[league_code] = False
-        
-        # Clear all cache
-        cache.clear()
         
         return jsonify({
             'status': 'completed',
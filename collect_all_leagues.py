@@ -6,13 +6,16 @@ Run this script to update data for all leagues at once
 
 import sys
 import os
+import argparse
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import config
 import logging
-from data.fpl_api import FPLDataCollector
+from data.league_pool import LeaguePool
+from data.live import LivePoller
+from data.planner import CollectionPlanner
 
 # Set up logging
 logging.basicConfig(
@@ -23,26 +26,17 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def collect_league_data(league_code, league_name):
-    """Collect data for a single league"""
-    try:
-        logger.info(f"\n{'='*70}")
-        logger.info(f"Collecting data for: {league_name} (Code: {league_code})")
-        logger.info(f"{'='*70}\n")
-        
-        collector = FPLDataCollector(team_id=None, league_id=league_code)
-        collector.collect_all_data()
-        
-        logger.info(f"\n✅ Successfully collected data for {league_name}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"\n❌ Failed to collect data for {league_name}: {e}")
-        return False
-
-
-def main():
+def main(argv=None):
     """Collect data for all configured leagues"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--full', action='store_true',
+                        help='Refetch and rewrite every gameweek instead of collecting incrementally')
+    parser.add_argument('--processes', type=int, default=config.COLLECTION_PROCESSES,
+                        help='Collect leagues in parallel worker processes sharing one API budget')
+    parser.add_argument('--live', action='store_true',
+                        help='Poll live points for the gameweek in progress until interrupted')
+    args = parser.parse_args(argv)
+    
     if not config.LEAGUES:
         logger.error("No leagues configured in config.py!")
         logger.error("Please add leagues to the LEAGUES list in config.py")
@@ -53,16 +47,41 @@ def main():
     logger.info(f"Total leagues: {len(config.LEAGUES)}")
     logger.info(f"{'='*70}")
     
+    league_codes = [league['code'] for league in config.LEAGUES]
+    
+    if args.live:
+        # One event/{gw}/live request per poll updates every league
+        logger.info(f"Polling live points every {config.LIVE_POLL_INTERVAL}s (Ctrl+C to stop)")
+        try:
+            LivePoller(league_codes).run_forever()
+        except KeyboardInterrupt:
+            logger.info("Live polling stopped")
+        return 0
+    
+    incremental = False if args.full else None
+    
+    if args.processes > 1:
+        # Leagues run side by side in worker processes
+        runner = LeaguePool(league_codes, processes=args.processes, incremental=incremental)
+    else:
+        # Plan the run so entries shared between leagues are fetched once
+        runner = CollectionPlanner(league_codes, incremental=incremental)
+    try:
+        errors = runner.run()
+    except Exception as e:
+        logger.error(f"❌ Data collection failed: {e}")
+        return 1
+    
     success_count = 0
     failed_count = 0
     
     for league in config.LEAGUES:
-        league_code = league['code']
-        league_name = league['name']
-        
-        if collect_league_data(league_code, league_name):
+        error = errors.get(league['code'])
+        if error is None:
+            logger.info(f"✅ Successfully collected data for {league['name']}")
             success_count += 1
         else:
+            logger.error(f"❌ Failed to collect data for {league['name']}: {error}")
             failed_count += 1
     
     # Summary
@@ -37,7 +37,57 @@ REFRESH_SCHEDULE = {
 }
 
 # FPL API Configuration
+FPL_API_BASE_URL = os.environ.get('FPL_API_BASE_URL', 'https://fantasy.premierleague.com/api').rstrip('/')
+# 'live', 'record' (save every response to the fixture dir) or 'replay' (serve saved responses)
+FPL_API_MODE = os.environ.get('FPL_API_MODE', 'live')
+FPL_API_FIXTURE_DIR = os.path.join(
+    os.path.dirname(__file__),
+    os.environ.get('FPL_API_FIXTURE_DIR', 'data/api_fixtures')
+)
 API_RATE_LIMIT_DELAY = float(os.environ.get('API_RATE_LIMIT_DELAY', 0.5))
+# Token bucket shared by all collection threads (defaults to the old fixed delay)
+API_REQUESTS_PER_SECOND = float(os.environ.get(
+    'API_REQUESTS_PER_SECOND',
+    1 / API_RATE_LIMIT_DELAY if API_RATE_LIMIT_DELAY > 0 else 0
+))
+API_BURST = int(os.environ.get('API_BURST', 5))
+API_MAX_WORKERS = int(os.environ.get('API_MAX_WORKERS', 8))  # Concurrent per-entry fetches
+# Retries with exponential backoff and jitter for timeouts, 429s and 5xx responses
+API_TIMEOUT = float(os.environ.get('API_TIMEOUT', 15))
+API_MAX_RETRIES = int(os.environ.get('API_MAX_RETRIES', 4))
+API_BACKOFF_BASE = float(os.environ.get('API_BACKOFF_BASE', 0.5))
+API_BACKOFF_MAX = float(os.environ.get('API_BACKOFF_MAX', 30))
+# AIMD: the rate drops by API_RATE_DECREASE on throttling and recovers by API_RATE_INCREASE/s
+API_MIN_REQUESTS_PER_SECOND = float(os.environ.get('API_MIN_REQUESTS_PER_SECOND', 0.5))
+API_RATE_INCREASE = float(os.environ.get('API_RATE_INCREASE', 0.5))
+API_RATE_DECREASE = float(os.environ.get('API_RATE_DECREASE', 0.5))
+# Per-endpoint circuit breaker: open after N consecutive failures, retry after the cooldown
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 30))
+# Token bucket file shared by collection worker processes (one machine-wide budget)
+API_LIMITER_PATH = os.path.join(
+    os.path.dirname(__file__),
+    os.environ.get('API_LIMITER_PATH', 'data/api_limiter.db')
+)
+
+# Worker processes for multi-league collection (1 = single-process planner)
+COLLECTION_PROCESSES = int(os.environ.get('COLLECTION_PROCESSES', 1))
+
+# Incremental collection: only fetch/write gameweeks newer than those stored
+COLLECTION_INCREMENTAL = os.environ.get('COLLECTION_INCREMENTAL', 'True') == 'True'
+# Live mode: seconds between event/{gw}/live polls, and between bootstrap re-checks
+LIVE_POLL_INTERVAL = int(os.environ.get('LIVE_POLL_INTERVAL', 60))
+LIVE_BOOTSTRAP_INTERVAL = int(os.environ.get('LIVE_BOOTSTRAP_INTERVAL', 900))
+
+# Keep every finished gameweek's squad (backfilled once, then one gameweek per run)
+COLLECTION_SQUAD_HISTORY = os.environ.get('COLLECTION_SQUAD_HISTORY', 'True') == 'True'
+# Entries stored between durable commits (an interrupted run resumes from the last one)
+COLLECTION_CHECKPOINT_ENTRIES = int(os.environ.get('COLLECTION_CHECKPOINT_ENTRIES', 50))
+
+# FPL API response cache (set HTTP_CACHE_DIR empty to disable the on-disk cache)
+HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', 'data/http_cache')
+HTTP_CACHE_DIR = os.path.join(os.path.dirname(__file__), HTTP_CACHE_DIR) if HTTP_CACHE_DIR else ''
+HTTP_MEMO_SIZE = int(os.environ.get('HTTP_MEMO_SIZE', 2048))  # Responses memoized per run
 FPL_TEAM_ID = None  # Not needed for multi-league
 
 # Database Configuration
@@ -46,6 +96,19 @@ DATABASE_PATH = os.path.join(
     os.environ.get('DATABASE_PATH', 'data/fpl_data.db')
 )
 
+# Rows buffered by the collector before each executemany flush
+DB_WRITE_BATCH_ROWS = int(os.environ.get('DB_WRITE_BATCH_ROWS', 5000))
+
+# SQLite tuning for pooled connections (page cache per connection, memory-mapped I/O)
+SQLITE_CACHE_KB = int(os.environ.get('SQLITE_CACHE_KB', 16384))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 134217728))
+
+# Shared player/gameweek reference store used by every league database
+REFERENCE_DATABASE_PATH = os.path.join(
+    os.path.dirname(__file__),
+    os.environ.get('REFERENCE_DATABASE_PATH', 'data/fpl_reference.db')
+)
+
 # Logging Configuration
 LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
 LOG_FILE = os.path.join(
@@ -58,6 +121,10 @@ CACHE_TYPE = 'SimpleCache'
 CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
 CACHE_THRESHOLD = 100  # Max items in cache
 
+# Browser cache lifetime (seconds) for /api/<league_code>/* responses; they
+# always carry an ETag, so after this they are revalidated with a cheap 304
+API_CACHE_MAX_AGE = int(os.environ.get('API_CACHE_MAX_AGE', 0))
+
 # Rate Limiting Configuration
 RATELIMIT_ENABLED = True
 RATELIMIT_STORAGE_URL = "memory://"
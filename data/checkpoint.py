@@ -0,0 +1,87 @@
+"""
+Resumable collection checkpoints
+Records each stored entry in the league database and commits in batches, so
+an interrupted run keeps its progress and the next run resumes where it stopped
+"""
+
+import logging
+from datetime import datetime
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SQL = '''
+    INSERT OR REPLACE INTO collection_checkpoint (entry_id, squad_data_gw, completed_at)
+    VALUES (?, ?, ?)
+'''
+
+
+class CollectionCheckpoint:
+    """Per-entry progress for one league's collection, committed in durable batches"""
+
+    def __init__(self, conn, writer, squad_data_gw, batch_entries=None):
+        self.conn = conn
+        self.writer = writer
+        self.squad_data_gw = squad_data_gw
+        self.batch_entries = max(1, batch_entries or config.COLLECTION_CHECKPOINT_ENTRIES)
+        self.completed = set()  # Entry IDs already stored (this run or a resumed one)
+        self._uncommitted = 0
+
+    def __contains__(self, entry_id):
+        return entry_id in self.completed
+
+    def resume(self, all_squads):
+        """Load entries committed by an interrupted run for the same gameweek
+
+        Their stored squads are added to all_squads so differentials still
+        cover the whole league without refetching them.
+        """
+        cursor = self.conn.cursor()
+
+        # Progress from a run for an older gameweek is no longer usable
+        cursor.execute(
+            'DELETE FROM collection_checkpoint WHERE squad_data_gw != ?',
+            (self.squad_data_gw,)
+        )
+
+        rows = cursor.execute('''
+            SELECT cc.entry_id, cs.player_ids
+            FROM collection_checkpoint cc
+            LEFT JOIN current_squads cs ON cs.entry_id = cc.entry_id
+                AND cs.gameweek = (
+                    SELECT MAX(gameweek) FROM current_squads WHERE entry_id = cc.entry_id
+                )
+        ''').fetchall()
+
+        for row in rows:
+            self.completed.add(row['entry_id'])
+            if row['player_ids']:
+                all_squads[row['entry_id']] = list(map(int, row['player_ids'].split(',')))
+
+        if self.completed:
+            logger.info(f"Resuming interrupted collection: {len(self.completed)} entries already stored")
+
+        return self.completed
+
+    def mark(self, entry_id):
+        """Record an entry as stored, committing once a batch is complete"""
+        self.writer.add(CHECKPOINT_SQL, (entry_id, self.squad_data_gw, datetime.now()))
+        self.completed.add(entry_id)
+        self._uncommitted += 1
+
+        if self._uncommitted >= self.batch_entries:
+            self.commit()
+
+    def commit(self):
+        """Durably commit everything stored so far"""
+        self.writer.flush()
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def finish(self):
+        """Commit the final batch and clear the checkpoint (the run is complete)"""
+        self.writer.flush()
+        self.conn.execute('DELETE FROM collection_checkpoint')
+        self.conn.commit()
+        self._uncommitted = 0
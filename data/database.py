@@ -2,18 +2,42 @@
 Database initialization and connection management
 """
 
+import fcntl
+import glob
+import logging
+import re
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import time
+from urllib.parse import quote
 import config
+from data.migrations import (
+    LEAGUE_MIGRATIONS, LIVE_MIGRATIONS, REFERENCE_MIGRATIONS, migrate, migrate_file, schema_version
+)
+
+logger = logging.getLogger(__name__)
 
 DATABASE_PATH = config.DATABASE_PATH
+REFERENCE_DATABASE_PATH = config.REFERENCE_DATABASE_PATH
+REFERENCE_VERSION_PATH = REFERENCE_DATABASE_PATH + '.version'  # Replaced on every content change
+
+# Collected league tables, emptied by clear_data()
+LEAGUE_DATA_TABLES = (
+    'differentials', 'player_stats', 'chip_usage', 'transfers', 'transfer_moves',
+    'gameweek_points', 'current_squads', 'squad_picks', 'squad_history', 'live_points',
+    'standings_by_gw', 'entry_sync', 'collection_checkpoint', 'league_meta', 'teams'
+)
+LIVE_DATA_TABLES = ('live_points', 'live_picks')
 
 
 def get_db_connection():
-    """Get a database connection with row factory"""
+    """Get a connection to the default database (reference store attached as 'ref')"""
+    _ensure_schema(DATABASE_PATH, LEAGUE_MIGRATIONS)
+    _ensure_schema(REFERENCE_DATABASE_PATH, REFERENCE_MIGRATIONS)
     conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
+    conn.execute('ATTACH DATABASE ? AS ref', (REFERENCE_DATABASE_PATH,))
     return conn
 
 
@@ -23,375 +47,531 @@ def get_league_db_path(league_code):
     return os.path.join(db_dir, f'fpl_data_{league_code}.db')
 
 
-def get_league_connection(league_code):
-    """Get database connection for a specific league"""
-    db_path = get_league_db_path(league_code)
-    if not os.path.exists(db_path):
-        # Initialize database for this league
-        init_db_for_league(league_code)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+def get_live_db_path(league_code):
+    """Get the path of a league's live points database (updated in place, not snapshotted)"""
+    db_dir = os.path.dirname(DATABASE_PATH)
+    return os.path.join(db_dir, f'fpl_live_{league_code}.db')
 
 
-def init_db_for_league(league_code):
-    """Initialize database for a specific league"""
-    db_path = get_league_db_path(league_code)
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Run all table creation statements
-    _create_tables(cursor)
-    
-    conn.commit()
-    conn.close()
-
-
-def _create_tables(cursor):
-    """Create all required tables"""
-    # Teams table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS teams (
-            entry_id INTEGER PRIMARY KEY,
-            team_name TEXT NOT NULL,
-            manager_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Gameweeks table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gameweeks (
-            id INTEGER PRIMARY KEY,
-            deadline TEXT NOT NULL,
-            finished INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Gameweek points table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gameweek_points (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            points INTEGER NOT NULL,
-            total_points INTEGER DEFAULT 0,
-            rank INTEGER,
-            bank REAL DEFAULT 0,
-            value REAL DEFAULT 0,
-            event_transfers INTEGER DEFAULT 0,
-            event_transfers_cost INTEGER DEFAULT 0,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Transfers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transfers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            transfer_count INTEGER DEFAULT 0,
-            transfers_in TEXT,
-            transfers_out TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Chip usage table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chip_usage (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            chip_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek, chip_name)
-        )
-    ''')
-    
-    # Player stats table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS player_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            total_goals INTEGER DEFAULT 0,
-            total_assists INTEGER DEFAULT 0,
-            total_clean_sheets INTEGER DEFAULT 0,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id)
-        )
-    ''')
+def _file_signature(path):
+    """(inode, mtime, size) of a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def get_league_db_version(league_code):
+    """Signature that changes whenever a new league snapshot is published
+
+    Published databases are never modified in place, only replaced, so the
+    file's inode and mtime identify its contents.
+    """
+    return _file_signature(get_league_db_path(league_code))
+
+
+def get_reference_db_version():
+    """Signature that changes whenever the reference store's content changes
+
+    The store is updated in place, and its database and -wal files also change
+    on checkpoints and when connections close, so the signature is taken from
+    a stamp file that writers replace after committing new content.
+    """
+    return _file_signature(REFERENCE_VERSION_PATH)
+
+
+def get_live_db_version(league_code):
+    """Signature that changes whenever the live poller commits new live points
+
+    Taken from a stamp file, like the reference store's.
+    """
+    return _file_signature(get_live_db_path(league_code) + '.version')
+
+
+def _bump_version(version_path, *lines):
+    staging_path = f'{version_path}.{os.getpid()}'
+    with open(staging_path, 'w') as f:
+        f.write(''.join(f'{line}\n' for line in (time.time_ns(), *lines)))
+    os.replace(staging_path, version_path)
+
+
+def _read_version(version_path):
+    """Lines of a version stamp file, or None if it does not exist"""
+    try:
+        with open(version_path) as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return None
+
+
+def bump_reference_db_version():
+    """Record a committed content change in the reference store
+    
+    The stamp also carries the deadline of the first unfinished gameweek, so
+    the API can tell when it passes without opening the store.
+    """
+    conn = sqlite3.connect(_readonly_uri(REFERENCE_DATABASE_PATH), uri=True)
+    try:
+        row = conn.execute('SELECT deadline FROM gameweeks WHERE finished = 0 ORDER BY id LIMIT 1').fetchone()
+    finally:
+        conn.close()
+    _bump_version(REFERENCE_VERSION_PATH, row[0] if row and row[0] else '')
+
+
+def get_reference_next_deadline():
+    """Deadline of the first unfinished gameweek, as recorded in the reference version stamp
     
-    # Differentials table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS differentials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            differential_players TEXT,
-            differential_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
+    A file read, no database access; None when there is none.
+    """
+    lines = _read_version(REFERENCE_VERSION_PATH)
+    return lines[1] if lines and len(lines) > 1 and lines[1] else None
+
+
+def bump_live_db_version(league_code):
+    """Record a committed change in a league's live points"""
+    _bump_version(get_live_db_path(league_code) + '.version')
+
+
+class BatchWriter:
+    """Buffers rows per statement and flushes each buffer with executemany"""
+    
+    def __init__(self, cursor, batch_rows=None):
+        self.cursor = cursor
+        self.batch_rows = batch_rows or config.DB_WRITE_BATCH_ROWS
+        self._pending = {}  # SQL statement -> list of parameter tuples
+        self._count = 0
+        self.rows_written = 0
+    
+    def add(self, sql, row):
+        """Queue one row for a statement"""
+        self._pending.setdefault(sql, []).append(row)
+        self._count += 1
+        if self._count >= self.batch_rows:
+            self.flush()
+    
+    def add_many(self, sql, rows):
+        """Queue several rows for a statement"""
+        for row in rows:
+            self.add(sql, row)
+    
+    def flush(self):
+        """Write every buffered row (statements run in first-queued order)"""
+        for sql, rows in self._pending.items():
+            self.cursor.executemany(sql, rows)
+            self.rows_written += len(rows)
+        self._pending = {}
+        self._count = 0
+
+
+class PooledConnection(sqlite3.Connection):
+    """Connection owned by the per-thread pool
+
+    close() only rolls back an unfinished transaction, so existing
+    open/use/close call sites reuse one connection per thread.
+    """
     
-    # Current squads table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS current_squads (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            player_ids TEXT NOT NULL,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
     
-    # Players table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            player_id INTEGER PRIMARY KEY,
-            web_name TEXT NOT NULL,
-            full_name TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    def close_pooled(self):
+        """Really close the underlying connection"""
+        super().close()
+
+
+_pool = threading.local()
+_schema_checked = set()  # Databases migrated to the current schema by this process
+_schema_lock = threading.RLock()
+
+
+def _pooled_connection(key, open_connection, signature=None):
+    """This thread's connection for key, opened on first use
+
+    A connection opened under a different signature (e.g. before a new
+    snapshot was published) is closed and reopened. The pool is dropped
+    after a fork; worker processes open their own.
+    """
+    if getattr(_pool, 'pid', None) != os.getpid():
+        _pool.pid = os.getpid()
+        _pool.connections = {}
+    entry = _pool.connections.get(key)
+    if entry is not None and entry[1] != signature:
+        entry[0].close_pooled()
+        entry = None
+    if entry is None:
+        entry = _pool.connections[key] = (open_connection(), signature)
+    return entry[0]
+
+
+def close_pooled_connections():
+    """Close every pooled connection held by the calling thread"""
+    if getattr(_pool, 'pid', None) != os.getpid():
+        return
+    for conn, _ in _pool.connections.values():
+        conn.close_pooled()
+    _pool.connections = {}
+
+
+def _tune_connection(conn, schemas=('main',), readonly=False):
+    """Apply the cache/mmap/temp-store pragmas, plus WAL for writers"""
+    conn.execute(f'PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    for schema in schemas:
+        conn.execute(f'PRAGMA {schema}.cache_size = -{config.SQLITE_CACHE_KB}')
+        if readonly:
+            continue
+        # WAL lets API readers run alongside a collection; NORMAL is durable in WAL
+        conn.execute(f'PRAGMA {schema}.journal_mode = WAL')
+        conn.execute(f'PRAGMA {schema}.synchronous = NORMAL')
+    if readonly:
+        conn.execute('PRAGMA query_only = ON')
+
+
+def _ensure_schema(path, migrations):
+    """Create or migrate a database the first time this process opens it"""
+    if path in _schema_checked:
+        return
+    with _schema_lock:
+        if path not in _schema_checked:
+            migrate_file(path, migrations)
+            _schema_checked.add(path)
+
+
+def _readonly_uri(path, immutable=False):
+    return f"file:{quote(os.path.abspath(path))}?{'immutable=1' if immutable else 'mode=ro'}"
+
+
+def _remove_database_files(path, suffixes=('', '-wal', '-shm', '-journal')):
+    for suffix in suffixes:
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def _fsync_directory(directory):
+    """Make a rename in directory durable"""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SnapshotBusyError(RuntimeError):
+    """Another run is already building a snapshot of this league"""
+
+
+class LeagueSnapshot:
+    """A league refresh built in a staging file and published atomically
+    
+    The staging file starts as a copy of the published database (or, when
+    resume is set, whatever an interrupted run left behind, provided the
+    published database has not been replaced since it was copied; the
+    signature it was copied from is kept in <stage>.base). publish() folds
+    the WAL into the staging file and renames it over the published one, so
+    readers only ever see complete refreshes. Only one snapshot per league is
+    open at a time, guarded by an flock on <db>.lock.
+    
+        with LeagueSnapshot(league_code, 'collect', resume=True) as snapshot:
+            ...write through snapshot.conn...
+            snapshot.publish()
+    
+    Leaving the block without publishing rolls back and keeps a resumable
+    staging file for the next run.
+    """
+    
+    def __init__(self, league_code, stage, resume=False, blocking=True):
+        self.league_code = league_code
+        self.path = get_league_db_path(league_code)
+        self.staging_path = f'{self.path}.{stage}'
+        self.base_path = f'{self.staging_path}.base'
+        self.resume = resume
+        self.blocking = blocking
+        self.conn = None
+        self._lock_file = None
+    
+    def __enter__(self):
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn is not None:
+            self.abandon()
+    
+    def open(self):
+        """Lock the league and open the staging database (migrated, 'ref' attached)"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock_file = open(f'{self.path}.lock', 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | (0 if self.blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            self._release()
+            raise SnapshotBusyError(f"League {self.league_code} is already being refreshed")
+        
+        try:
+            if self.resume and self._stage_is_current():
+                logger.info(f"Resuming staged refresh {self.staging_path}")
+            else:
+                self._copy_published()
+            
+            _ensure_schema(REFERENCE_DATABASE_PATH, REFERENCE_MIGRATIONS)
+            conn = sqlite3.connect(self.staging_path)
+            conn.row_factory = sqlite3.Row
+            migrate(conn, LEAGUE_MIGRATIONS)
+            conn.execute('ATTACH DATABASE ? AS ref', (REFERENCE_DATABASE_PATH,))
+            _tune_connection(conn, schemas=('main', 'ref'))
+        except Exception:
+            self._release()
+            raise
+        
+        self.conn = conn
+        return conn
+    
+    def _stage_is_current(self):
+        """Whether a leftover staging file was copied from the database published now"""
+        if not os.path.exists(self.staging_path):
+            return False
+        try:
+            with open(self.base_path) as f:
+                base = f.read().strip()
+        except FileNotFoundError:
+            base = None
+        if base != repr(_file_signature(self.path)):
+            logger.info(f"Discarding {self.staging_path}: the published database has changed since it was staged")
+            return False
+        return True
+    
+    def _copy_published(self):
+        """Start the staging file as a consistent copy of the published database"""
+        _remove_database_files(self.staging_path)
+        if not os.path.exists(self.path):
+            # A new league starts from the same empty database readers would create
+            _create_published(self.path)
+        source = sqlite3.connect(_readonly_uri(self.path), uri=True)
+        target = sqlite3.connect(self.staging_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        # The lock is held, so the published file cannot be replaced under the copy
+        with open(self.base_path, 'w') as f:
+            f.write(f'{_file_signature(self.path)!r}\n')
+    
+    def publish(self):
+        """Commit and atomically replace the published database with the staged one"""
+        conn, self.conn = self.conn, None
+        try:
+            conn.commit()
+            conn.execute('DETACH DATABASE ref')
+            # Fold the WAL in: published files are single, self-contained
+            # files that readers open with immutable=1
+            conn.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            conn.close()
+        
+        try:
+            _remove_database_files(self.path, suffixes=('-wal', '-shm'))
+            os.replace(self.staging_path, self.path)
+            _fsync_directory(os.path.dirname(self.path))
+            _remove_database_files(self.base_path, suffixes=('',))
+        finally:
+            self._release()
+        logger.info(f"Published {self.path}")
+    
+    def abandon(self):
+        """Roll back and unlock; a resumable stage keeps its committed batches"""
+        conn, self.conn = self.conn, None
+        try:
+            conn.rollback()
+            conn.close()
+        finally:
+            if not self.resume:
+                _remove_database_files(self.staging_path)
+                _remove_database_files(self.base_path, suffixes=('',))
+            self._release()
+    
+    def _release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()  # Closing the file drops the flock
+            self._lock_file = None
+
+
+def _needs_upgrade(db_path):
+    """Whether a published database predates the current schema or snapshot format"""
+    conn = sqlite3.connect(_readonly_uri(db_path), uri=True)
+    try:
+        return (
+            schema_version(conn) < LEAGUE_MIGRATIONS[-1][0]
+            or conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
         )
-    ''')
-    
-    # Create indexes
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_gameweek_points_entry ON gameweek_points(entry_id, gameweek)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transfers_entry ON transfers(entry_id, gameweek)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chip_usage_entry ON chip_usage(entry_id, gameweek)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_differentials_entry ON differentials(entry_id, gameweek)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_current_squads_entry ON current_squads(entry_id, gameweek)')
+    finally:
+        conn.close()
 
 
-def init_db():
-    """Initialize default database (for backwards compatibility)"""
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    _create_tables(cursor)
-    
-    conn.commit()
-    conn.close()
+def _create_published(db_path):
+    """Publish an empty, fully migrated league database unless one appears first"""
+    staging_path = f'{db_path}.create-{os.getpid()}-{threading.get_ident()}'
+    try:
+        migrate_file(staging_path, LEAGUE_MIGRATIONS)
+        os.link(staging_path, db_path)
+    except FileExistsError:
+        pass
+    finally:
+        _remove_database_files(staging_path)
 
 
-def clear_data():
-    """Clear all data from tables (useful for fresh data collection)"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM differentials')
-    cursor.execute('DELETE FROM player_stats')
-    cursor.execute('DELETE FROM chip_usage')
-    cursor.execute('DELETE FROM transfers')
-    cursor.execute('DELETE FROM gameweek_points')
-    cursor.execute('DELETE FROM gameweeks')
-    cursor.execute('DELETE FROM teams')
+def ensure_league_database(league_code, blocking=False):
+    """Create a league database, or republish it migrated, once per process
     
-    conn.commit()
-    conn.close()
-    
-    print("All data cleared from database")
+    Returns False when an out-of-date database could not be upgraded because
+    a refresh holds the league (the refresh publishes it migrated anyway).
+    """
+    db_path = get_league_db_path(league_code)
+    if db_path in _schema_checked:
+        return True
+    with _schema_lock:
+        if db_path in _schema_checked:
+            return True
+        if not os.path.exists(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            _create_published(db_path)
+        elif _needs_upgrade(db_path):
+            try:
+                with LeagueSnapshot(league_code, 'migrate', blocking=blocking) as snapshot:
+                    snapshot.publish()
+            except SnapshotBusyError:
+                logger.info(f"League {league_code} is being refreshed; schema upgrade left to that run")
+                return False
+        _schema_checked.add(db_path)
+        return True
 
 
-if __name__ == '__main__':
-    init_db()
-    print(f"Database initialized at {DATABASE_PATH}")
+def get_league_reader(league_code):
+    """Get this thread's pooled read-only connection to a league's published snapshot
+    
+    Used by the API. Snapshots are never modified in place, so they are
+    opened with immutable=1 (no locking or change detection at all); the
+    connection is reopened when a new snapshot replaces the file. The
+    reference store and the league's live points database are attached
+    read-only as 'ref' and 'live'.
+    """
+    db_path = get_league_db_path(league_code)
+    live_path = get_live_db_path(league_code)
+    ensure_league_database(league_code)
+    _ensure_schema(REFERENCE_DATABASE_PATH, REFERENCE_MIGRATIONS)
+    _ensure_schema(live_path, LIVE_MIGRATIONS)
+    
+    def open_connection():
+        conn = sqlite3.connect(_readonly_uri(db_path, immutable=True), uri=True, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        # The reference store and live points are updated in place, so they are only read-only
+        conn.execute('ATTACH DATABASE ? AS ref', (_readonly_uri(REFERENCE_DATABASE_PATH),))
+        conn.execute('ATTACH DATABASE ? AS live', (_readonly_uri(live_path),))
+        _tune_connection(conn, schemas=('main', 'ref', 'live'), readonly=True)
+        return conn
+    
+    return _pooled_connection(('read', db_path), open_connection, _file_signature(db_path))
+
+
+def get_reference_connection():
+    """Get this thread's pooled connection to the shared player/gameweek reference store"""
+    def open_connection():
+        _ensure_schema(REFERENCE_DATABASE_PATH, REFERENCE_MIGRATIONS)
+        conn = sqlite3.connect(REFERENCE_DATABASE_PATH, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        _tune_connection(conn)
+        return conn
+    
+    return _pooled_connection(('write', REFERENCE_DATABASE_PATH), open_connection)
+
+
+def get_live_connection(league_code):
+    """Get this thread's pooled connection to a league's live points database (used by the live poller)"""
+    live_path = get_live_db_path(league_code)
+    
+    def open_connection():
+        _ensure_schema(live_path, LIVE_MIGRATIONS)
+        conn = sqlite3.connect(live_path, factory=PooledConnection)
+        conn.row_factory = sqlite3.Row
+        _tune_connection(conn)
+        return conn
+    
+    return _pooled_connection(('write', live_path), open_connection)
+
+
+def init_reference_db():
+    """Create or upgrade the reference store shared by all leagues"""
+    applied = migrate_file(REFERENCE_DATABASE_PATH, REFERENCE_MIGRATIONS)
+    
+    # Stamps written before they carried the next deadline
+    lines = _read_version(REFERENCE_VERSION_PATH)
+    if lines is None or len(lines) < 2:
+        bump_reference_db_version()
+    return applied
+
+
+def init_db_for_league(league_code):
+    """Create or upgrade the database for a specific league (waits for a running refresh)"""
+    return ensure_league_database(league_code, blocking=True)
+
 
+def league_codes_on_disk():
+    """League codes with a published database in the data directory"""
+    pattern = re.compile(r'fpl_data_(\w+)\.db$')
+    codes = []
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(DATABASE_PATH), 'fpl_data_*.db'))):
+        match = pattern.search(os.path.basename(path))
+        if match:
+            code = match.group(1)
+            codes.append(int(code) if code.isdigit() else code)
+    return codes
 
 
 def init_db():
-    """Initialize database with required tables"""
-    os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    # Teams table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS teams (
-            entry_id INTEGER PRIMARY KEY,
-            team_name TEXT NOT NULL,
-            manager_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Gameweeks table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gameweeks (
-            id INTEGER PRIMARY KEY,
-            deadline TEXT NOT NULL,
-            finished INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Gameweek points table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS gameweek_points (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            points INTEGER NOT NULL,
-            total_points INTEGER NOT NULL,
-            rank INTEGER,
-            bank REAL,
-            value REAL,
-            event_transfers INTEGER,
-            event_transfers_cost INTEGER,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            FOREIGN KEY (gameweek) REFERENCES gameweeks (id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Transfers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS transfers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            transfer_count INTEGER DEFAULT 0,
-            transfers_in TEXT,
-            transfers_out TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Chip usage table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS chip_usage (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            chip_name TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek, chip_name)
-        )
-    ''')
-    
-    # Player stats table (aggregated goals, assists, clean sheets per team)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS player_stats (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            total_goals INTEGER DEFAULT 0,
-            total_assists INTEGER DEFAULT 0,
-            total_clean_sheets INTEGER DEFAULT 0,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id)
-        )
-    ''')
-    
-    # Differentials table (players unique to each team)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS differentials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            differential_players TEXT,
-            differential_count INTEGER DEFAULT 0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Current squads table (stores full 15-player squad for each team)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS current_squads (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            entry_id INTEGER NOT NULL,
-            gameweek INTEGER NOT NULL,
-            player_ids TEXT NOT NULL,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
-            UNIQUE(entry_id, gameweek)
-        )
-    ''')
-    
-    # Players table (stores player ID to name mapping)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS players (
-            player_id INTEGER PRIMARY KEY,
-            web_name TEXT NOT NULL,
-            full_name TEXT,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create indexes for better query performance
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_gameweek_points_entry 
-        ON gameweek_points(entry_id, gameweek)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_transfers_entry 
-        ON transfers(entry_id, gameweek)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_chip_usage_entry 
-        ON chip_usage(entry_id, gameweek)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_differentials_entry 
-        ON differentials(entry_id, gameweek)
-    ''')
-    
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_current_squads_entry 
-        ON current_squads(entry_id, gameweek)
-    ''')
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"Database initialized at {DATABASE_PATH}")
+    """Bring the reference store and every league database up to date
+    
+    Returns {path: whether it is at the current schema}. Databases already
+    current are only opened for a user_version read; league databases are
+    upgraded by publishing a migrated snapshot, never in place.
+    """
+    init_reference_db()
+    migrate_file(DATABASE_PATH, LEAGUE_MIGRATIONS)
+    _schema_checked.update((REFERENCE_DATABASE_PATH, DATABASE_PATH))
+    current = {REFERENCE_DATABASE_PATH: True, DATABASE_PATH: True}
+    
+    league_codes = set(league_codes_on_disk()) | {league['code'] for league in config.LEAGUES}
+    for code in sorted(league_codes, key=str):
+        current[get_league_db_path(code)] = ensure_league_database(code)
+    return current
 
 
-def clear_data():
-    """Clear all data from tables (useful for fresh data collection)"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM differentials')
-    cursor.execute('DELETE FROM player_stats')
-    cursor.execute('DELETE FROM chip_usage')
-    cursor.execute('DELETE FROM transfers')
-    cursor.execute('DELETE FROM gameweek_points')
-    cursor.execute('DELETE FROM gameweeks')
-    cursor.execute('DELETE FROM teams')
-    
-    conn.commit()
-    conn.close()
-    
-    print("All data cleared from database")
+def clear_data(league_code=None):
+    """Clear collected data from a league (or every configured league) for a fresh collection"""
+    league_codes = [league_code] if league_code is not None else [league['code'] for league in config.LEAGUES]
+    for code in league_codes:
+        with LeagueSnapshot(code, 'clear') as snapshot:
+            for table in LEAGUE_DATA_TABLES:
+                snapshot.conn.execute(f'DELETE FROM main.{table}')
+            
+            # Drop interrupted refreshes too (under the lock), so none is resumed on top of the cleared data
+            for path in glob.glob(f'{glob.escape(snapshot.path)}.*'):
+                if not (path.endswith('.lock') or path.startswith(snapshot.staging_path)):
+                    _remove_database_files(path, suffixes=('',))
+            snapshot.publish()
+        
+        live = get_live_connection(code)
+        for table in LIVE_DATA_TABLES:
+            live.execute(f'DELETE FROM {table}')
+        live.commit()
+        live.close()
+        bump_live_db_version(code)
+    
+    print(f"All data cleared from {len(league_codes)} league database(s)")
 
 
 if __name__ == '__main__':
     init_db()
+    print(f"Databases initialized in {os.path.dirname(DATABASE_PATH)}")
@@ -0,0 +1,54 @@
+"""
+Recorded FPL API responses for offline, deterministic collection runs
+Fixtures are keyed by request path and query, so a recording made against
+the live API replays against any base URL
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+import config
+
+
+class FixtureStore:
+    """Directory of recorded API responses (one JSON file per request)"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or config.FPL_API_FIXTURE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def request_key(url):
+        """Path plus query of a request, without scheme, host or API prefix"""
+        key = re.sub(r'^https?://[^/]+', '', url)
+        if key.startswith('/api/'):
+            key = key[len('/api'):]
+        return key
+
+    def _path(self, url):
+        key = self.request_key(url)
+        readable = re.sub(r'[^A-Za-z0-9]+', '_', key).strip('_')[:80]
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.directory, f'{readable}-{digest}.json')
+
+    def save(self, url, body):
+        """Record a response body"""
+        path = self._path(url)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'request': self.request_key(url), 'body': body}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, url):
+        """Replay a recorded response body
+
+        Raises LookupError if the request was never recorded.
+        """
+        try:
+            with open(self._path(url), 'r') as f:
+                return json.load(f)['body']
+        except FileNotFoundError:
+            raise LookupError(f"No recorded fixture for {self.request_key(url)} in {self.directory}")
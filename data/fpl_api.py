@@ -3,55 +3,237 @@ FPL API Wrapper and Data Collection
 """
 
 import requests
-import time
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
 import config
-from data.database import get_db_connection
+from data.checkpoint import CollectionCheckpoint
+from data.database import (
+    BatchWriter, LeagueSnapshot, bump_reference_db_version, get_db_connection, get_reference_connection
+)
+from data.fixtures import FixtureStore
+from data.http_cache import HTTPCache
+from data.ownership import OwnershipMatrix
+from data.players import PlayerIndex
+from data.standings import rebuild_standings
+from data.rate_limiter import get_default_limiter
+from data.squads import pack_picks
+from data.resilience import (
+    RETRYABLE_STATUSES, CircuitOpenError, backoff_delay, endpoint_key, get_breaker
+)
 
 logger = logging.getLogger(__name__)
 
+# Statements used by the batched write stage
+TEAMS_SQL = '''
+    INSERT OR REPLACE INTO teams (entry_id, team_name, manager_name)
+    VALUES (?, ?, ?)
+'''
+
+GAMEWEEK_POINTS_SQL = '''
+    INSERT OR REPLACE INTO gameweek_points 
+    (entry_id, gameweek, points, total_points, rank, bank, value, 
+     event_transfers, event_transfers_cost, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+CHIP_USAGE_SQL = '''
+    INSERT OR IGNORE INTO chip_usage (entry_id, gameweek, chip_name)
+    VALUES (?, ?, ?)
+'''
+
+TRANSFERS_SQL = '''
+    INSERT OR REPLACE INTO transfers 
+    (entry_id, gameweek, transfer_count, transfers_in, transfers_out)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+PLAYER_STATS_SQL = '''
+    INSERT OR REPLACE INTO player_stats 
+    (entry_id, total_goals, total_assists, total_clean_sheets, updated_at)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+ENTRY_SYNC_SQL = '''
+    INSERT OR REPLACE INTO entry_sync
+    (entry_id, last_finished_gw, transfers_total, updated_at)
+    VALUES (?, ?, ?, ?)
+'''
+
+CURRENT_SQUADS_SQL = '''
+    INSERT OR REPLACE INTO current_squads
+    (entry_id, gameweek, player_ids, updated_at)
+    VALUES (?, ?, ?, ?)
+'''
+
+SQUAD_PICKS_SQL = '''
+    INSERT OR REPLACE INTO squad_picks
+    (entry_id, gameweek, player_id, position, multiplier, is_captain)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+TRANSFER_MOVES_SQL = '''
+    INSERT OR REPLACE INTO transfer_moves (entry_id, gameweek, player_in, player_out, time)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+SQUAD_HISTORY_SQL = '''
+    INSERT OR REPLACE INTO squad_history (entry_id, gameweek, picks)
+    VALUES (?, ?, ?)
+'''
+
+DIFFERENTIALS_SQL = '''
+    INSERT OR REPLACE INTO differentials
+    (entry_id, gameweek, differential_players, differential_count)
+    VALUES (?, ?, ?, ?)
+'''
+
+LEAGUE_META_SQL = '''
+    INSERT OR REPLACE INTO league_meta (key, value, updated_at)
+    VALUES (?, ?, ?)
+'''
+
+
+class BootstrapSnapshot:
+    """Parsed bootstrap-static data, fetched once and shared by every league collector"""
+    
+    def __init__(self, events, players, current_gw, last_completed_gw, gameweek_started, season_tag):
+        self.events = events
+        self.players = players  # PlayerIndex
+        self.current_gw = current_gw
+        self.last_completed_gw = last_completed_gw
+        self.gameweek_started = gameweek_started
+        self.season_tag = season_tag
+        self.finished_gameweeks = {e['id'] for e in events if e['finished']}
+        self.reference_stored = False  # Players/gameweeks written to the reference store
+        self.lock = threading.Lock()
+
 
 class FPLDataCollector:
     """Handles all FPL API interactions and data collection"""
     
-    BASE_URL = "https://fantasy.premierleague.com/api"
+    BASE_URL = config.FPL_API_BASE_URL
     
-    def __init__(self, team_id, league_id):
+    def __init__(self, team_id, league_id, max_workers=None, rate_limiter=None, http_cache=None,
+                 bootstrap=None, incremental=None, api_mode=None):
         self.team_id = team_id
         self.league_id = league_id
         self.league_code = league_id  # Store as league_code for clarity
+        self.max_workers = max(1, max_workers or config.API_MAX_WORKERS)
+        self.rate_limiter = rate_limiter or get_default_limiter()
+        self.http_cache = http_cache or HTTPCache()  # Share one instance to coalesce across leagues
+        self.bootstrap = bootstrap  # Optional shared BootstrapSnapshot
+        # Only fetch/write what changed since the last run (False forces a full rewrite)
+        self.incremental = config.COLLECTION_INCREMENTAL if incremental is None else incremental
+        # 'live' (default), 'record' (save every response) or 'replay' (serve saved responses)
+        self.api_mode = api_mode or config.FPL_API_MODE
+        if self.api_mode not in ('live', 'record', 'replay'):
+            raise ValueError(f"Unknown FPL API mode: {self.api_mode}")
+        self.fixtures = FixtureStore() if self.api_mode != 'live' else None
         self.session = requests.Session()
-        self.player_map = {}  # Cache for player ID to name mapping
-        self.player_details = {}  # Cache for full player details
+        # One pooled connection per worker thread
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.players = PlayerIndex([])  # Indexed player table, rebuilt per bootstrap
         self.current_season_start_gw = 1  # FPL seasons always start at GW1
+        self.finished_gameweeks = set()  # Gameweeks whose picks can never change
+        self.season_tag = None  # Scopes immutable cache entries to one season
+        self.run_timestamp = None  # Stamped once per run on every written row
         
-    def _get_db_connection(self):
-        """Get database connection for this league"""
-        from data.database import get_league_connection
-        return get_league_connection(self.league_code)
+    def open_snapshot(self):
+        """Resumable staging snapshot this league's refresh is written into"""
+        return LeagueSnapshot(self.league_code, 'collect', resume=True)
         
-    def _make_request(self, url):
-        """Make API request with rate limiting and error handling"""
-        try:
-            time.sleep(config.API_RATE_LIMIT_DELAY)
-            response = self.session.get(url, timeout=30)
+    def _make_request(self, url, immutable=False):
+        """Make API request through the response cache (or recorded fixtures)"""
+        if self.api_mode == 'replay':
+            return self.fixtures.load(url)
+        
+        immutable_tag = self.season_tag if immutable else None
+        body = self.http_cache.get(url, self._send_request, immutable_tag=immutable_tag)
+        
+        if self.api_mode == 'record':
+            self.fixtures.save(url, body)
+        return body
+    
+    def _send_request(self, url, headers):
+        """Send a GET with rate limiting, retries and a per-endpoint circuit breaker
+        
+        Timeouts, connection errors, 429s and 5xx responses are retried with
+        jittered exponential backoff; throttling responses also slow the shared
+        limiter down (AIMD), and successes let it recover.
+        """
+        breaker = get_breaker(endpoint_key(url))
+        attempt = 0
+        
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {endpoint_key(url)}, not requesting {url}")
+            
+            retry_after = None
+            try:
+                self.rate_limiter.acquire()
+                response = self.session.get(url, headers=headers, timeout=config.API_TIMEOUT)
+                
+                if response.status_code not in RETRYABLE_STATUSES:
+                    # Other 4xx are permanent and say nothing about endpoint health
+                    breaker.record_success()
+                    break
+                
+                self.rate_limiter.record_throttled()
+                retry_after = response.headers.get('Retry-After')
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {url}", response=response
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except requests.exceptions.RequestException as e:
+                # Not retried, but it still ends a half-open trial
+                breaker.record_failure()
+                logger.error(f"API request failed for {url}: {e}")
+                raise
+            
+            breaker.record_failure()
+            if attempt >= config.API_MAX_RETRIES:
+                logger.error(f"API request failed for {url} after {attempt + 1} attempts: {error}")
+                raise error
+            
+            delay = backoff_delay(attempt)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            logger.warning(f"Retrying {url} in {delay:.1f}s ({error})")
+            time.sleep(delay)
+            attempt += 1
+        
+        if response.status_code != 304:
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API request failed for {url}: {e}")
-            raise
+        self.rate_limiter.record_success()
+        return response
     
     def get_bootstrap_data(self):
         """Fetch bootstrap-static data (players, teams, gameweeks)"""
         url = f"{self.BASE_URL}/bootstrap-static/"
         return self._make_request(url)
     
-    def get_league_standings(self):
-        """Fetch classic league standings"""
-        url = f"{self.BASE_URL}/leagues-classic/{self.league_id}/standings/"
+    def get_league_standings(self, page=1):
+        """Fetch one page of classic league standings"""
+        url = f"{self.BASE_URL}/leagues-classic/{self.league_id}/standings/?page_standings={page}"
         return self._make_request(url)
     
+    def iter_standings_pages(self):
+        """Yield each page of standings results, following has_next"""
+        page = 1
+        while True:
+            standings = self.get_league_standings(page)['standings']
+            yield standings['results']
+            
+            if not standings.get('has_next'):
+                return
+            page += 1
+    
     def get_entry_history(self, entry_id):
         """Fetch team's gameweek history"""
         url = f"{self.BASE_URL}/entry/{entry_id}/history/"
@@ -60,7 +242,8 @@ class FPLDataCollector:
     def get_entry_event_live(self, entry_id, gameweek):
         """Fetch live data for a team in a specific gameweek (includes player points)"""
         url = f"{self.BASE_URL}/entry/{entry_id}/event/{gameweek}/picks/"
-        return self._make_request(url)
+        # Picks for a finished gameweek are final, so never refetch them
+        return self._make_request(url, immutable=gameweek in self.finished_gameweeks)
     
     def get_entry_picks(self, entry_id, gameweek):
         """Alias for get_entry_event_live"""
@@ -68,6 +251,11 @@ class FPLDataCollector:
 
 
     
+    def get_event_live(self, gameweek):
+        """Fetch live points for every player in a gameweek"""
+        url = f"{self.BASE_URL}/event/{gameweek}/live/"
+        return self._make_request(url)
+    
     def get_entry_transfers(self, entry_id):
         """Fetch team's transfer history"""
         url = f"{self.BASE_URL}/entry/{entry_id}/transfers/"
@@ -97,6 +285,11 @@ class FPLDataCollector:
         # If no gameweek is finished yet, return 1
         return 1
     
+    def get_season_tag(self, bootstrap):
+        """Identify the season by the year of the GW1 deadline (e.g. '2024')"""
+        events = bootstrap['events']
+        return events[0]['deadline_time'][:4] if events else None
+    
     def is_gameweek_started(self, bootstrap, gameweek_id):
         """Check if a gameweek has started (deadline passed)"""
         events = bootstrap['events']
@@ -112,248 +305,491 @@ class FPLDataCollector:
         
         return now >= deadline
     
-    def collect_all_data(self):
-        """Main method to collect all FPL data and store in database"""
-        logger.info(f"Starting data collection for league {self.league_code}...")
+    def load_sync_state(self, cursor):
+        """Load each entry's incremental high-water marks from the league DB
         
-        conn = self._get_db_connection()
-        cursor = conn.cursor()
+        Returns {entry_id: state} where state holds the last finished gameweek
+        stored, the transfer count seen, the latest stored squad, and the
+        gameweeks already kept in squad_history.
+        """
+        rows = cursor.execute('''
+            SELECT es.entry_id, es.last_finished_gw, es.transfers_total,
+                   cs.gameweek AS squad_gw, cs.player_ids
+            FROM entry_sync es
+            LEFT JOIN current_squads cs ON cs.entry_id = es.entry_id
+                AND cs.gameweek = (
+                    SELECT MAX(gameweek) FROM current_squads WHERE entry_id = es.entry_id
+                )
+        ''').fetchall()
         
-        try:
-            # 1. Get bootstrap data for players and gameweeks
-            logger.info("Fetching bootstrap data...")
-            bootstrap = self.get_bootstrap_data()
-            
-            # Determine current and last completed gameweeks
-            current_gw = self.get_current_gameweek(bootstrap)
-            last_completed_gw = self.get_last_completed_gameweek(bootstrap)
-            gameweek_started = self.is_gameweek_started(bootstrap, current_gw)
+        history_gws = {}
+        for entry_id, gameweek in cursor.execute('SELECT entry_id, gameweek FROM squad_history'):
+            history_gws.setdefault(entry_id, set()).add(gameweek)
+        
+        return {
+            row['entry_id']: {
+                'last_finished_gw': row['last_finished_gw'],
+                'transfers_total': row['transfers_total'],
+                'squad_gw': row['squad_gw'],
+                'squad_ids': list(map(int, row['player_ids'].split(','))) if row['player_ids'] else None,
+                'history_gws': history_gws.get(row['entry_id'], set())
+            }
+            for row in rows
+        }
+    
+    def _fetch_entry_data(self, entry_id, squad_data_gw, state=None):
+        """Fetch history, transfers and squad picks for a single team
+        
+        With a sync state (incremental mode) the transfers call is skipped when
+        the entry's transfer count is unchanged and no new gameweek has finished
+        since the last run, and the picks call is skipped when the stored squad
+        is already current. The count only covers gameweeks already in the
+        history, so transfers made for the upcoming gameweek are picked up on
+        the first run after the next gameweek finishes.
+        """
+        history = self.get_entry_history(entry_id)
+        transfers_total = sum(gw['event_transfers'] for gw in history['current'])
+        last_finished_gw = max(
+            (gw['event'] for gw in history['current'] if gw['event'] in self.finished_gameweeks), default=0
+        )
+        transfers_unchanged = (
+            bool(state)
+            and state['transfers_total'] == transfers_total
+            and state['last_finished_gw'] == last_finished_gw
+        )
+        
+        transfers = None if transfers_unchanged else self.get_entry_transfers(entry_id)
+        
+        picks = None
+        squad_ids = None
+        if state and state['squad_ids'] and state['squad_gw'] == squad_data_gw:
+            squad_ids = state['squad_ids']
+        else:
+            # Captaincy and bench order change without transfers, so a new
+            # gameweek's picks are always fetched (once; they are immutable)
+            try:
+                # Use squad_data_gw (last completed) for player stats and current squad
+                picks = self.get_entry_picks(entry_id, squad_data_gw)
+                squad_ids = [pick['element'] for pick in picks['picks']]
+            except Exception as e:
+                logger.warning(f"Could not fetch squad for team {entry_id} (GW {squad_data_gw}): {e}")
+        
+        # Picks for every finished gameweek not yet in squad_history; each
+        # (entry, gameweek) is immutable, so it is fetched once and never again
+        squad_history = {}
+        if config.COLLECTION_SQUAD_HISTORY:
+            stored_gws = state['history_gws'] if state else set()
+            for gw in history['current']:
+                gameweek = gw['event']
+                if gameweek not in self.finished_gameweeks or gameweek in stored_gws:
+                    continue
+                if gameweek == squad_data_gw and picks:
+                    squad_history[gameweek] = picks
+                    continue
+                try:
+                    squad_history[gameweek] = self.get_entry_picks(entry_id, gameweek)
+                except Exception as e:
+                    logger.warning(f"Could not fetch squad for team {entry_id} (GW {gameweek}): {e}")
+        
+        return {
+            'history': history,
+            'transfers': transfers,  # None when unchanged since the last run
+            'transfers_total': transfers_total,
+            'last_finished_gw': last_finished_gw,
+            'picks': picks,
+            'squad_ids': squad_ids,
+            'squad_history': squad_history  # {gameweek: picks} not yet stored
+        }
+    
+    def fetch_entries(self, teams, squad_data_gw, sync_state=None):
+        """Fetch per-team data in parallel, yielding (team, data) as each completes
+        
+        Requests are paced by the shared token bucket, so wall-clock time is
+        bounded by the API budget rather than by round-trip latency. teams may
+        be a lazy iterable (e.g. streamed standings pages); only a bounded
+        number of entries are in flight, so memory stays flat for huge leagues.
+        """
+        sync_state = sync_state or {}
+        max_in_flight = self.max_workers * 4
+        teams = iter(teams)
+        exhausted = False
+        pending = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Top up the work queue (may pull the next standings page)
+                while not exhausted and len(pending) < max_in_flight:
+                    team = next(teams, None)
+                    if team is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(
+                        self._fetch_entry_data, team['entry'], squad_data_gw, sync_state.get(team['entry'])
+                    )
+                    pending[future] = team
+                
+                if not pending:
+                    return
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    team = pending.pop(future)
+                    try:
+                        entry_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Error collecting data for team {team['entry']}: {e}")
+                        continue
+                    yield team, entry_data
+    
+    def _store_entry_data(self, writer, entry_id, entry_data, squad_data_gw, state=None):
+        """Write one team's fetched data; returns its squad player IDs (or None)
+        
+        Gameweeks at or below the entry's high-water mark are final and
+        already stored, so only newer or unfinished gameweeks are written.
+        """
+        history = entry_data['history']
+        last_finished_gw = state['last_finished_gw'] if state else 0
+        new_gameweeks = [
+            gw for gw in history['current']
+            if gw['event'] > last_finished_gw or gw['event'] not in self.finished_gameweeks
+        ]
+        
+        # Store gameweek points
+        writer.add_many(GAMEWEEK_POINTS_SQL, (
+            (
+                entry_id,
+                gw['event'],
+                gw['points'],
+                gw['total_points'],
+                gw['rank'],
+                gw['bank'] / 10,  # Convert to actual value
+                gw['value'] / 10,
+                gw['event_transfers'],
+                gw['event_transfers_cost'],
+                self.run_timestamp
+            )
+            for gw in new_gameweeks
+        ))
+        
+        # Store chip usage
+        writer.add_many(CHIP_USAGE_SQL, (
+            (entry_id, chip['event'], chip['name'])
+            for chip in history.get('chips', [])
+            if chip['event'] > last_finished_gw
+        ))
+        
+        # Group transfers by gameweek (skipped when unchanged since the last run)
+        transfers_by_gw = {}
+        for transfer in entry_data['transfers'] or []:
+            gw = transfer['event']
+            if gw not in transfers_by_gw:
+                transfers_by_gw[gw] = {
+                    'in': [],
+                    'out': [],
+                    'count': 0
+                }
             
-            logger.info(f"Current gameweek: {current_gw}")
-            logger.info(f"Last completed gameweek: {last_completed_gw}")
-            logger.info(f"Current gameweek started: {gameweek_started}")
+            player_in = self.players.name(transfer['element_in'])
+            player_out = self.players.name(transfer['element_out'])
             
-            # Use last completed GW for current squad data
-            squad_data_gw = last_completed_gw
-            logger.info(f"Using GW {squad_data_gw} for squad/differential data")
+            transfers_by_gw[gw]['in'].append(player_in)
+            transfers_by_gw[gw]['out'].append(player_out)
+            transfers_by_gw[gw]['count'] += 1
+        
+        # Store individual moves by player ID
+        writer.add_many(TRANSFER_MOVES_SQL, (
+            (entry_id, transfer['event'], transfer['element_in'], transfer['element_out'], transfer['time'])
+            for transfer in entry_data['transfers'] or []
+        ))
+        
+        # Store transfers
+        writer.add_many(TRANSFERS_SQL, (
+            (
+                entry_id,
+                gw,
+                data['count'],
+                ','.join(data['in']),
+                ','.join(data['out'])
+            )
+            for gw, data in transfers_by_gw.items()
+        ))
+        
+        # Store newly fetched finished-gameweek squads compactly
+        writer.add_many(SQUAD_HISTORY_SQL, (
+            (entry_id, gameweek, pack_picks(picks['picks']))
+            for gameweek, picks in entry_data['squad_history'].items()
+        ))
+        
+        # Store cumulative player stats for this manager
+        squad_player_ids = entry_data['squad_ids']
+        total_goals, total_assists, total_clean_sheets = self.players.squad_totals(squad_player_ids or [])
+        
+        writer.add(PLAYER_STATS_SQL, (
+            entry_id,
+            total_goals,
+            total_assists,
+            total_clean_sheets,
+            self.run_timestamp
+        ))
+        
+        # Record the high-water mark for the next incremental run
+        writer.add(ENTRY_SYNC_SQL, (
+            entry_id,
+            entry_data['last_finished_gw'],
+            entry_data['transfers_total'],
+            self.run_timestamp
+        ))
+        
+        if not squad_player_ids:
+            return None
+        
+        if state and state['squad_gw'] == squad_data_gw:
+            # Stored squad is already current
+            return squad_player_ids
+        
+        # Store current squad for filter-aware differentials
+        writer.add(CURRENT_SQUADS_SQL, (
+            entry_id,
+            squad_data_gw,
+            ','.join(map(str, squad_player_ids)),
+            self.run_timestamp
+        ))
+        
+        if entry_data['picks']:
+            writer.add_many(SQUAD_PICKS_SQL, (
+                (entry_id, squad_data_gw, pick['element'], pick['position'], pick['multiplier'], pick['is_captain'])
+                for pick in entry_data['picks']['picks']
+            ))
+        
+        return squad_player_ids
+    
+    def load_bootstrap(self):
+        """Fetch and parse bootstrap-static into a snapshot shareable across leagues"""
+        logger.info("Fetching bootstrap data...")
+        bootstrap = self.get_bootstrap_data()
+        
+        current_gw = self.get_current_gameweek(bootstrap)
+        
+        return BootstrapSnapshot(
+            events=bootstrap['events'],
+            players=PlayerIndex(bootstrap['elements']),
+            current_gw=current_gw,
+            last_completed_gw=self.get_last_completed_gameweek(bootstrap),
+            gameweek_started=self.is_gameweek_started(bootstrap, current_gw),
+            season_tag=self.get_season_tag(bootstrap)
+        )
+    
+    def use_bootstrap(self, snapshot):
+        """Adopt a bootstrap snapshot for player lookups and request caching"""
+        self.bootstrap = snapshot
+        self.finished_gameweeks = snapshot.finished_gameweeks
+        self.season_tag = snapshot.season_tag
+        self.players = snapshot.players
+        return snapshot
+    
+    def store_reference_data(self, snapshot):
+        """Write players and gameweeks to the shared reference store (once per snapshot)"""
+        with snapshot.lock:
+            if snapshot.reference_stored:
+                return
             
-            # Build player maps with full details
-            for player in bootstrap['elements']:
-                self.player_map[player['id']] = player['web_name']
-                self.player_details[player['id']] = {
-                    'name': player['web_name'],
-                    'position': player['element_type'],  # 1=GK, 2=DEF, 3=MID, 4=FWD
-                    'team': player['team']
+            conn = get_reference_connection()
+            try:
+                cursor = conn.cursor()
+                now = datetime.now()
+                
+                # Skip players whose stored content hash is unchanged
+                stored_hashes = dict(cursor.execute('SELECT player_id, content_hash FROM players'))
+                changed_players = []
+                for player in snapshot.players:
+                    content_hash = player.content_hash()
+                    if stored_hashes.get(player.id) != content_hash:
+                        changed_players.append((player.id, player.name, player.full_name, content_hash, now))
+                
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO players (player_id, web_name, full_name, content_hash, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', changed_players)
+                
+                # Likewise gameweeks whose deadline and finished flag are unchanged
+                stored_gameweeks = {
+                    row[0]: (row[1], row[2]) for row in cursor.execute('SELECT id, deadline, finished FROM gameweeks')
                 }
+                changed_gameweeks = [
+                    (event['id'], event['deadline_time'], event['finished']) for event in snapshot.events
+                    if stored_gameweeks.get(event['id']) != (event['deadline_time'], event['finished'])
+                ]
                 
-                # Store in database for quick lookup
-                cursor.execute('''
-                    INSERT OR REPLACE INTO players (player_id, web_name, full_name, updated_at)
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    player['id'],
-                    player['web_name'],
-                    player['first_name'] + ' ' + player['second_name'],
-                    datetime.now()
-                ))
-            
-            # Store gameweeks
-            for event in bootstrap['events']:
-                cursor.execute('''
+                cursor.executemany('''
                     INSERT OR REPLACE INTO gameweeks (id, deadline, finished)
                     VALUES (?, ?, ?)
-                ''', (event['id'], event['deadline_time'], event['finished']))
-            
-            logger.info(f"Stored {len(bootstrap['events'])} gameweeks")
-            
-            # 2. Get league standings and teams
-            logger.info("Fetching league standings...")
-            league_data = self.get_league_standings()
+                ''', changed_gameweeks)
+                
+                conn.commit()
+            finally:
+                conn.close()
             
-            teams = league_data['standings']['results']
+            # API ETags include the reference store version
+            if changed_players or changed_gameweeks:
+                bump_reference_db_version()
             
-            for team in teams:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO teams (entry_id, team_name, manager_name)
-                    VALUES (?, ?, ?)
-                ''', (
-                    team['entry'],
-                    team['entry_name'],
-                    team['player_name']
-                ))
+            snapshot.reference_stored = True
+            logger.info(
+                f"Reference store: {len(changed_players)}/{len(snapshot.players)} players changed, "
+                f"{len(changed_gameweeks)}/{len(snapshot.events)} gameweeks changed"
+            )
+    
+    def begin_league(self, writer):
+        """Apply the bootstrap snapshot and record league metadata
+        
+        Returns the gameweek used for squad/differential data.
+        """
+        # Get bootstrap data for players and gameweeks (shared if provided)
+        snapshot = self.use_bootstrap(self.bootstrap or self.load_bootstrap())
+        self.store_reference_data(snapshot)
+        
+        logger.info(f"Current gameweek: {snapshot.current_gw}")
+        logger.info(f"Last completed gameweek: {snapshot.last_completed_gw}")
+        logger.info(f"Current gameweek started: {snapshot.gameweek_started}")
+        
+        # Use last completed GW for current squad data
+        squad_data_gw = snapshot.last_completed_gw
+        logger.info(f"Using GW {squad_data_gw} for squad/differential data")
+        
+        # One timestamp for every row written in this run
+        self.run_timestamp = datetime.now()
+        writer.add(LEAGUE_META_SQL, ('season', snapshot.season_tag, self.run_timestamp))
+        
+        return squad_data_gw
+    
+    def fetch_teams(self):
+        """Fetch all of the league's teams from every standings page"""
+        logger.info("Fetching league standings...")
+        return [team for page in self.iter_standings_pages() for team in page]
+    
+    def store_teams(self, writer, teams):
+        """Write the league's teams"""
+        writer.add_many(TEAMS_SQL, (
+            (team['entry'], team['entry_name'], team['player_name'])
+            for team in teams
+        ))
+        
+        logger.info(f"Stored {len(teams)} teams")
+    
+    def stream_teams(self, writer):
+        """Yield teams page by page, storing each page as it arrives
+        
+        Lets per-entry collection start while later pages are still downloading.
+        """
+        logger.info("Streaming league standings...")
+        for page_number, page in enumerate(self.iter_standings_pages(), start=1):
+            logger.info(f"Standings page {page_number}: {len(page)} teams")
+            self.store_teams(writer, page)
+            yield from page
+    
+    def store_entry(self, writer, team, entry_data, squad_data_gw, all_squads, state=None):
+        """Write one team's fetched data, recording its squad for differentials
+        
+        Returns True if the team was stored.
+        """
+        logger.info(f"Storing data for team: {team['entry_name']}")
+        
+        try:
+            squad_player_ids = self._store_entry_data(
+                writer, team['entry'], entry_data, squad_data_gw, state
+            )
+            if squad_player_ids is not None:
+                all_squads[team['entry']] = squad_player_ids
+            return True
+        except Exception as e:
+            logger.error(f"Error storing data for team {team['entry']}: {e}")
+            return False
+    
+    def prune_squad_picks(self, writer, squad_data_gw):
+        """Drop normalized picks for older gameweeks (squad_history keeps them)"""
+        if config.COLLECTION_SQUAD_HISTORY:
+            writer.add('DELETE FROM squad_picks WHERE gameweek < ?', (squad_data_gw,))
+    
+    def store_standings(self, writer):
+        """Rebuild the league's standings_by_gw in one pass over the stored points"""
+        writer.flush()
+        rows = rebuild_standings(writer.cursor)
+        logger.info(f"Rebuilt standings ({rows} rows)")
+    
+    def store_differentials(self, writer, all_squads, squad_data_gw):
+        """Calculate differentials (players owned by ONLY this team, not by anyone else)"""
+        if not all_squads:
+            return
+        
+        logger.info("Calculating true differentials...")
+        
+        # TRUE differential = only owned by this team (ownership count == 1)
+        differentials = OwnershipMatrix(all_squads).differentials()
+        
+        for entry_id, player_ids in differentials.items():
+            true_differentials = [self.players.name(player_id) for player_id in player_ids]
             
-            logger.info(f"Stored {len(teams)} teams")
+            writer.add(DIFFERENTIALS_SQL, (
+                entry_id,
+                squad_data_gw,
+                ','.join(true_differentials) if true_differentials else '',
+                len(true_differentials)
+            ))
+    
+    def collect_all_data(self):
+        """Main method to collect all FPL data and store in database"""
+        logger.info(f"Starting data collection for league {self.league_code}...")
+        
+        snapshot = self.open_snapshot()
+        conn = snapshot.open()
+        cursor = conn.cursor()
+        writer = BatchWriter(cursor)
+        
+        try:
+            # 1. Get bootstrap data for players and gameweeks
+            squad_data_gw = self.begin_league(writer)
             
             # Collect all squads for differential analysis
             all_squads = {}
             
-            # 3. Get detailed history for each team
-            for team in teams:
-                entry_id = team['entry']
-                logger.info(f"Fetching data for team: {team['entry_name']}")
-                
-                try:
-                    # Get team history
-                    history = self.get_entry_history(entry_id)
-                    
-                    # Store gameweek points
-                    for gw in history['current']:
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO gameweek_points 
-                            (entry_id, gameweek, points, total_points, rank, bank, value, 
-                             event_transfers, event_transfers_cost, updated_at)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (
-                            entry_id,
-                            gw['event'],
-                            gw['points'],
-                            gw['total_points'],
-                            gw['rank'],
-                            gw['bank'] / 10,  # Convert to actual value
-                            gw['value'] / 10,
-                            gw['event_transfers'],
-                            gw['event_transfers_cost'],
-                            datetime.now()
-                        ))
-                    
-                    # Store chip usage
-                    for chip in history.get('chips', []):
-                        cursor.execute('''
-                            INSERT OR IGNORE INTO chip_usage (entry_id, gameweek, chip_name)
-                            VALUES (?, ?, ?)
-                        ''', (entry_id, chip['event'], chip['name']))
-                    
-                    # Get transfers
-                    transfers_data = self.get_entry_transfers(entry_id)
-                    
-                    # Group transfers by gameweek
-                    transfers_by_gw = {}
-                    for transfer in transfers_data:
-                        gw = transfer['event']
-                        if gw not in transfers_by_gw:
-                            transfers_by_gw[gw] = {
-                                'in': [],
-                                'out': [],
-                                'count': 0
-                            }
-                        
-                        player_in = self.player_map.get(transfer['element_in'], 'Unknown')
-                        player_out = self.player_map.get(transfer['element_out'], 'Unknown')
-                        
-                        transfers_by_gw[gw]['in'].append(player_in)
-                        transfers_by_gw[gw]['out'].append(player_out)
-                        transfers_by_gw[gw]['count'] += 1
-                    
-                    # Store transfers
-                    for gw, data in transfers_by_gw.items():
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO transfers 
-                            (entry_id, gameweek, transfer_count, transfers_in, transfers_out)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (
-                            entry_id,
-                            gw,
-                            data['count'],
-                            ','.join(data['in']),
-                            ','.join(data['out'])
-                        ))
-                    
-                    # Store cumulative player stats for this manager
-                    total_goals = 0
-                    total_assists = 0
-                    total_clean_sheets = 0
-                    
-                    try:
-                        # Use squad_data_gw (last completed) for player stats
-                        picks = self.get_entry_picks(entry_id, squad_data_gw)
-                        for pick in picks['picks']:
-                            player_id = pick['element']
-                            # Get player from bootstrap data
-                            player = next((p for p in bootstrap['elements'] if p['id'] == player_id), None)
-                            if player:
-                                total_goals += player.get('goals_scored', 0)
-                                total_assists += player.get('assists', 0)
-                                total_clean_sheets += player.get('clean_sheets', 0)
-                    except Exception as e:
-                        logger.warning(f"Could not calculate player stats: {e}")
-                    
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO player_stats 
-                        (entry_id, total_goals, total_assists, total_clean_sheets, updated_at)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (
-                        entry_id,
-                        total_goals,
-                        total_assists,
-                        total_clean_sheets,
-                        datetime.now()
-                    ))
-                    
-                    # Store current squad for differential analysis
-                    try:
-                        # Use squad_data_gw (last completed) for current squad
-                        current_picks = self.get_entry_picks(entry_id, squad_data_gw)
-                        squad_player_ids = [pick['element'] for pick in current_picks['picks']]
-                        all_squads[entry_id] = squad_player_ids
-                        
-                        # Store squad in database for filter-aware differentials
-                        cursor.execute('''
-                            INSERT OR REPLACE INTO current_squads
-                            (entry_id, gameweek, player_ids, updated_at)
-                            VALUES (?, ?, ?, ?)
-                        ''', (
-                            entry_id,
-                            squad_data_gw,
-                            ','.join(map(str, squad_player_ids)),
-                            datetime.now()
-                        ))
-                        
-                    except Exception as e:
-                        logger.warning(f"Could not fetch squad for differential (GW {squad_data_gw}): {e}")
-                    
-                except Exception as e:
-                    logger.error(f"Error collecting data for team {entry_id}: {e}")
-                    continue
+            # Entries committed by an interrupted run are not fetched again
+            checkpoint = CollectionCheckpoint(conn, writer, squad_data_gw)
+            checkpoint.resume(all_squads)
             
-            # 4. Calculate differentials (players owned by ONLY this team, not by anyone else)
-            if len(all_squads) > 0:
-                logger.info("Calculating true differentials...")
-                
-                player_ownership = {}
-                for squad in all_squads.values():
-                    for player_id in squad:
-                        player_ownership[player_id] = player_ownership.get(player_id, 0) + 1
-                
-                for entry_id, squad in all_squads.items():
-                    true_differentials = []
-                    for player_id in squad:
-                        ownership_count = player_ownership.get(player_id, 0)
-                        
-                        # TRUE differential = only owned by this team (count == 1)
-                        if ownership_count == 1:
-                            player_name = self.player_map.get(player_id, 'Unknown')
-                            true_differentials.append(player_name)
-                    
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO differentials
-                        (entry_id, gameweek, differential_players, differential_count)
-                        VALUES (?, ?, ?, ?)
-                    ''', (
-                        entry_id,
-                        squad_data_gw,
-                        ','.join(true_differentials) if true_differentials else '',
-                        len(true_differentials)
-                    ))
+            # Per-entry high-water marks (empty in full mode, so everything is rewritten)
+            sync_state = self.load_sync_state(cursor) if self.incremental else {}
+            
+            # 2. Stream league standings page by page, and
+            # 3. get detailed history for each team (fetched concurrently)
+            teams = (team for team in self.stream_teams(writer) if team['entry'] not in checkpoint)
+            for team, entry_data in self.fetch_entries(teams, squad_data_gw, sync_state):
+                if self.store_entry(
+                    writer, team, entry_data, squad_data_gw, all_squads, sync_state.get(team['entry'])
+                ):
+                    checkpoint.mark(team['entry'])
+            
+            # 4. Calculate differentials
+            self.store_differentials(writer, all_squads, squad_data_gw)
+            self.prune_squad_picks(writer, squad_data_gw)
+            
+            # 5. Materialize cumulative points and ranks for the dashboard
+            self.store_standings(writer)
+            
+            checkpoint.finish()
             
-            conn.commit()
+            # 6. Swap the finished refresh in for dashboard readers
+            snapshot.publish()
+            logger.info(f"Wrote {writer.rows_written} rows")
+            logger.info(f"HTTP cache: {self.http_cache.stats}")
             logger.info("Data collection completed successfully!")
             
         except Exception as e:
+            # Batches already committed stay in the staging file; the next run resumes after them
             logger.error(f"Data collection failed: {e}")
-            conn.rollback()
             raise
         finally:
-            conn.close()
+            if snapshot.conn is not None:
+                snapshot.abandon()
 
 
 if __name__ == '__main__':
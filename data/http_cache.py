@@ -0,0 +1,168 @@
+"""
+HTTP response caching for the FPL API client
+Coalesces identical requests within a run and keeps an on-disk cache that is
+revalidated with ETag/Last-Modified (or never refetched for immutable data)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """Per-run request memoization backed by an on-disk conditional cache"""
+
+    def __init__(self, cache_dir=None, memo_size=None):
+        self.cache_dir = config.HTTP_CACHE_DIR if cache_dir is None else cache_dir
+        self.memo_size = memo_size or config.HTTP_MEMO_SIZE
+        self._memo = OrderedDict()  # url -> parsed JSON body for this run
+        self._inflight = {}  # url -> Event set when the leading request finishes
+        self._lock = threading.Lock()
+        self.stats = {'memo_hits': 0, 'disk_hits': 0, 'revalidated': 0, 'fetched': 0}
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        """Cache file path for a URL"""
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f'{digest}.json')
+
+    def _load(self, url):
+        """Load a cached response from disk, or None"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(url), 'r') as f:
+                entry = json.load(f)
+            return entry if entry.get('url') == url else None
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, url, body, etag, last_modified, immutable_tag):
+        """Atomically write a response to the disk cache"""
+        if not self.cache_dir:
+            return
+        path = self._path(url)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'url': url,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'immutable_tag': immutable_tag,
+                    'body': body
+                }, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write HTTP cache entry for {url}: {e}")
+
+    def prune(self, season_tag):
+        """Delete immutable entries tagged for another season, plus abandoned temp files
+
+        Returns the number of files removed. Entries without an immutable tag
+        are revalidated on use and kept.
+        """
+        if not self.cache_dir:
+            return 0
+        removed = 0
+        for directory, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if not filename.endswith('.tmp'):
+                    try:
+                        with open(path, 'r') as f:
+                            tag = json.load(f).get('immutable_tag')
+                    except (OSError, ValueError):
+                        tag = None
+                    if tag is None or tag == season_tag:
+                        continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not prune HTTP cache file {path}: {e}")
+        return removed
+
+    def _remember(self, url, body):
+        """Add a body to the per-run memo, evicting the oldest entries (lock held)"""
+        self._memo[url] = body
+        self._memo.move_to_end(url)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+
+    def get(self, url, send, immutable_tag=None):
+        """Return the JSON body for url, calling send(url, headers) only when needed
+
+        immutable_tag marks a response that never changes once stored (e.g.
+        picks for a finished gameweek); a disk entry stored with the same tag
+        is served without touching the network.
+        """
+        while True:
+            with self._lock:
+                if url in self._memo:
+                    self._memo.move_to_end(url)
+                    self.stats['memo_hits'] += 1
+                    return self._memo[url]
+
+                event = self._inflight.get(url)
+                if event is None:
+                    event = self._inflight[url] = threading.Event()
+                    break
+
+            # Another thread is fetching the same URL; wait and reuse its result
+            event.wait()
+
+        try:
+            body = self._fetch(url, send, immutable_tag)
+            with self._lock:
+                self._remember(url, body)
+            return body
+        finally:
+            with self._lock:
+                del self._inflight[url]
+            event.set()
+
+    def _fetch(self, url, send, immutable_tag):
+        """Serve from disk, revalidate, or fetch a fresh copy"""
+        entry = self._load(url)
+
+        if entry and immutable_tag and entry.get('immutable_tag') == immutable_tag:
+            self.stats['disk_hits'] += 1
+            return entry['body']
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = send(url, headers)
+
+        if response.status_code == 304 and entry:
+            self.stats['revalidated'] += 1
+            if immutable_tag:
+                self._store(url, entry['body'], entry.get('etag'),
+                            entry.get('last_modified'), immutable_tag)
+            return entry['body']
+
+        body = response.json()
+        self.stats['fetched'] += 1
+        self._store(
+            url,
+            body,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            immutable_tag
+        )
+        return body
@@ -0,0 +1,196 @@
+"""
+Dense points matrix for dashboard queries
+Each league's materialized standings (standings_by_gw joined to
+gameweek_points) are loaded once into teams x gameweeks NumPy arrays, so
+standings, form, head-to-head and distributions for any team selection are
+vectorized slices instead of SQL plus Python row loops
+"""
+
+import threading
+
+import numpy as np
+
+from data.database import get_league_db_version, get_league_reader
+
+
+def _rank_desc(values, played):
+    """SQL RANK() of each column by descending value, among played cells (others 0)"""
+    ranks = np.zeros(values.shape, dtype=np.int64)
+    if not values.size:
+        return ranks
+
+    masked = np.where(played, values, np.iinfo(np.int64).min)
+    order = np.argsort(masked, axis=0, kind='stable')[::-1]
+    ordered = np.take_along_axis(masked, order, axis=0)
+
+    # Ties share the position of the first cell in their run
+    positions = np.arange(values.shape[0])[:, None]
+    run_start = np.ones(values.shape, dtype=bool)
+    run_start[1:] = ordered[1:] != ordered[:-1]
+    first_positions = np.maximum.accumulate(np.where(run_start, positions, 0), axis=0)
+
+    np.put_along_axis(ranks, order, first_positions + 1, axis=0)
+    ranks[~played] = 0
+    return ranks
+
+
+class LeagueMatrix:
+    """gameweek_points as dense teams x gameweeks arrays; column 0 is gameweek 1
+
+    Rows follow teams ordered by entry_id; played marks the cells that have a
+    standings row (teams that joined late have gaps). Cumulative points and
+    league ranks come from standings_by_gw; ranks within a team selection
+    are computed from them.
+    """
+
+    def __init__(self, teams, points_rows):
+        """teams: [(entry_id, team_name, manager_name)] ordered by entry_id
+        points_rows: [(entry_id, gameweek, points, total_points, transfer cost, bank, value,
+                       cumulative points, league rank)]
+        """
+        self.entry_ids = np.array([team[0] for team in teams], dtype=np.int64)
+        self.team_names = [team[1] for team in teams]
+        self.manager_names = [team[2] for team in teams]
+        self._rows = {int(entry_id): row for row, entry_id in enumerate(self.entry_ids)}
+
+        data = np.array(points_rows, dtype=np.float64).reshape(-1, 9)
+        entry_rows = np.searchsorted(self.entry_ids, data[:, 0].astype(np.int64))
+        known = entry_rows < len(self.entry_ids)
+        known[known] = self.entry_ids[entry_rows[known]] == data[known, 0]
+        data, entry_rows = data[known], entry_rows[known]  # Rows of teams no longer in the league
+
+        columns = data[:, 1].astype(np.int64) - 1
+        self.gameweek_count = int(columns.max()) + 1 if len(columns) else 0
+        shape = (len(self.entry_ids), self.gameweek_count)
+
+        self.played = np.zeros(shape, dtype=bool)
+        self.played[entry_rows, columns] = True
+        self.points = self._fill(shape, entry_rows, columns, data[:, 2], np.int64)
+        self.total_points = self._fill(shape, entry_rows, columns, data[:, 3], np.int64)
+        self.transfer_cost = self._fill(shape, entry_rows, columns, data[:, 4], np.int64)
+        self.bank = self._fill(shape, entry_rows, columns, data[:, 5], np.float64)
+        self.value = self._fill(shape, entry_rows, columns, data[:, 6], np.float64)
+        self.league_rank = self._fill(shape, entry_rows, columns, data[:, 8], np.int64)
+
+        # Gaps carry the cumulative points of the team's last played gameweek
+        cumulative = self._fill(shape, entry_rows, columns, data[:, 7], np.int64)
+        last_played = np.maximum.accumulate(np.where(self.played, np.arange(shape[1]), -1), axis=1)
+        self.cumulative_points = np.where(
+            last_played >= 0, np.take_along_axis(cumulative, np.maximum(last_played, 0), axis=1), 0
+        )
+
+    @staticmethod
+    def _fill(shape, rows, columns, values, dtype):
+        array = np.zeros(shape, dtype=dtype)
+        array[rows, columns] = values
+        return array
+
+    def row(self, entry_id):
+        """Row index of one team, or None if it is not in the league"""
+        return self._rows.get(int(entry_id))
+
+    def rows(self, entry_ids=None):
+        """Row indices for a team selection (None = every team)
+
+        Unknown and repeated IDs are ignored; the selection order is kept.
+        """
+        if entry_ids is None:
+            return np.arange(len(self.entry_ids))
+        rows = (self._rows.get(int(entry_id)) for entry_id in entry_ids)
+        return np.array(list(dict.fromkeys(row for row in rows if row is not None)), dtype=np.int64)
+
+    def totals(self, rows):
+        """Points over every collected gameweek for each selected row"""
+        if not self.gameweek_count:
+            return np.zeros(len(rows), dtype=np.int64)
+        return self.cumulative_points[rows, -1]
+
+    def _whole_league(self, rows):
+        return len(rows) == len(self.entry_ids)
+
+    def ranks(self, rows, end_gw):
+        """League position among the selected rows for gameweeks 1..end_gw (0 = not played)"""
+        if self._whole_league(rows):
+            return self.league_rank[rows, :end_gw]
+        return _rank_desc(self.cumulative_points[rows, :end_gw], self.played[rows, :end_gw])
+
+    def ranks_at(self, rows, gameweeks):
+        """League position among the selected rows in just the given gameweeks, one column each"""
+        columns = np.asarray(gameweeks, dtype=np.int64) - 1
+        if self._whole_league(rows):
+            return self.league_rank[rows][:, columns]
+        return _rank_desc(self.cumulative_points[rows][:, columns], self.played[rows][:, columns])
+
+    def series(self, rows, values, start_gw=1, end_gw=None):
+        """[(row, gameweeks, values)] for selected rows with a played gameweek in range
+
+        values is aligned with rows, column 0 being gameweek 1.
+        """
+        columns = slice(max(start_gw, 1) - 1, end_gw)
+        played = self.played[rows, columns]
+        gameweeks = np.arange(self.gameweek_count)[columns] + 1
+        values = values[:, columns]
+        return [
+            (int(row), gameweeks[mask].tolist(), row_values[mask].tolist())
+            for row, mask, row_values in zip(rows, played, values)
+            if mask.any()
+        ]
+
+    def recent_form(self, rows, gameweeks=3):
+        """Average points over each row's last few played gameweeks (0 if none)"""
+        played = self.played[rows]
+        from_end = np.cumsum(played[:, ::-1], axis=1)[:, ::-1]
+        recent = played & (from_end <= gameweeks)
+        counts = recent.sum(axis=1)
+        sums = np.where(recent, self.points[rows], 0).sum(axis=1)
+        return np.divide(sums, counts, out=np.zeros(len(rows)), where=counts > 0)
+
+    def gameweek_winners(self, rows, end_gw):
+        """(outright wins, shared wins) per selected row over gameweeks 1..end_gw"""
+        played = self.played[rows, :end_gw]
+        points = np.where(played, self.points[rows, :end_gw], np.iinfo(np.int64).min)
+        winners = played & (points == points.max(axis=0, initial=np.iinfo(np.int64).min))
+        winner_count = winners.sum(axis=0)
+        return (winners & (winner_count == 1)).sum(axis=1), (winners & (winner_count > 1)).sum(axis=1)
+
+    def histogram(self, rows, bins):
+        """Played gameweek scores per bin; scores past the last edge count in the last bin"""
+        points = self.points[rows][self.played[rows]]
+        bin_index = np.searchsorted(bins, points, side='right') - 1
+        bin_index = np.minimum(bin_index[bin_index >= 0], len(bins) - 2)
+        return points.size, np.bincount(bin_index, minlength=len(bins) - 1).tolist()
+
+
+_matrix_cache = {}  # league_code -> (db version, LeagueMatrix)
+_matrix_cache_lock = threading.Lock()
+
+
+def get_league_matrix(league_code):
+    """Points matrix for a league, cached until a new snapshot of the league is published"""
+    version = get_league_db_version(league_code)
+
+    with _matrix_cache_lock:
+        cached = _matrix_cache.get(league_code)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    conn = get_league_reader(league_code)
+    try:
+        teams = [tuple(row) for row in conn.execute(
+            'SELECT entry_id, team_name, manager_name FROM teams ORDER BY entry_id'
+        )]
+        points_rows = [tuple(row) for row in conn.execute('''
+            SELECT s.entry_id, s.gameweek, s.points, COALESCE(gp.total_points, 0),
+                   COALESCE(gp.event_transfers_cost, 0), COALESCE(gp.bank, 0), COALESCE(gp.value, 0),
+                   s.cumulative_points, s.league_rank
+            FROM standings_by_gw s
+            JOIN gameweek_points gp ON gp.entry_id = s.entry_id AND gp.gameweek = s.gameweek
+        ''')]
+    finally:
+        conn.close()
+
+    matrix = LeagueMatrix(teams, points_rows)
+
+    with _matrix_cache_lock:
+        _matrix_cache[league_code] = (version, matrix)
+    return matrix
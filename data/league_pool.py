@@ -0,0 +1,100 @@
+"""
+Process-pool multi-league collection
+Collects several leagues at once in worker processes that all draw from one
+machine-wide API budget (a SQLite-backed token bucket)
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from data.fpl_api import FPLDataCollector
+from data.rate_limiter import SharedTokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+def _collect_league(league_code, incremental):
+    """Worker entry point: collect one league
+
+    Returns (league_code, error message or None, start time, end time).
+    """
+    started = time.time()
+    error = None
+
+    try:
+        limiter = SharedTokenBucket(
+            config.API_LIMITER_PATH,
+            config.API_REQUESTS_PER_SECOND,
+            config.API_BURST
+        )
+        collector = FPLDataCollector(
+            team_id=None,
+            league_id=league_code,
+            rate_limiter=limiter,
+            incremental=incremental
+        )
+        collector.collect_all_data()
+    except Exception as e:
+        logger.error(f"Collection failed for league {league_code}: {e}")
+        error = str(e)
+
+    return league_code, error, started, time.time()
+
+
+class LeaguePool:
+    """Collect leagues in parallel worker processes under a shared rate limit"""
+
+    def __init__(self, league_codes, processes=None, incremental=None):
+        self.league_codes = list(league_codes)
+        self.processes = max(1, processes or config.COLLECTION_PROCESSES)
+        self.incremental = incremental
+        self.timings = {}  # league_code -> (start, end) wall-clock times
+
+    def run(self):
+        """Collect all leagues; returns {league_code: error message or None}"""
+        errors = {}
+        run_started = time.time()
+
+        with ProcessPoolExecutor(max_workers=min(self.processes, len(self.league_codes) or 1)) as executor:
+            futures = {
+                executor.submit(_collect_league, league_code, self.incremental): league_code
+                for league_code in self.league_codes
+            }
+
+            for future in as_completed(futures):
+                league_code = futures[future]
+                try:
+                    _, error, started, finished = future.result()
+                    self.timings[league_code] = (started, finished)
+                except Exception as e:
+                    # The worker process itself died
+                    error = str(e)
+                errors[league_code] = error
+
+        self.log_overlap(run_started, time.time())
+        return errors
+
+    def log_overlap(self, run_started, run_finished):
+        """Log when each league ran relative to the run and how much they overlapped"""
+        wall_time = max(run_finished - run_started, 1e-9)
+        busy_time = 0.0
+
+        for league_code in self.league_codes:
+            if league_code not in self.timings:
+                logger.info(f"League {league_code}: no timing (worker failed)")
+                continue
+            started, finished = self.timings[league_code]
+            duration = finished - started
+            busy_time += duration
+            logger.info(
+                f"League {league_code}: +{started - run_started:.1f}s to "
+                f"+{finished - run_started:.1f}s ({duration:.1f}s)"
+            )
+
+        logger.info(
+            f"Collected {len(self.league_codes)} leagues in {wall_time:.1f}s "
+            f"across {self.processes} processes "
+            f"(sum of league times {busy_time:.1f}s, average overlap {busy_time / wall_time:.2f}x)"
+        )
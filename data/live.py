@@ -0,0 +1,192 @@
+"""
+Live gameweek polling
+One event/{gw}/live request per poll is joined against each league's stored
+picks to score every entry. Live points go to each league's own live
+database (data.database.get_live_db_path), written in place; only entries
+whose live points changed are written, and the league snapshot is left to
+the full collection
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config
+from data.database import BatchWriter, bump_live_db_version, get_league_reader, get_live_connection
+from data.fpl_api import FPLDataCollector
+from data.http_cache import HTTPCache
+
+logger = logging.getLogger(__name__)
+
+LIVE_POINTS_SQL = '''
+    INSERT OR REPLACE INTO live_points (entry_id, gameweek, points, updated_at)
+    VALUES (?, ?, ?, ?)
+'''
+
+LIVE_PICKS_SQL = '''
+    INSERT OR REPLACE INTO live_picks (entry_id, gameweek, player_id, multiplier)
+    VALUES (?, ?, ?, ?)
+'''
+
+
+class LivePoller:
+    """Keep every league's live table current for the gameweek in progress"""
+
+    def __init__(self, league_codes):
+        self.league_codes = list(league_codes)
+        self.fetcher = FPLDataCollector(team_id=None, league_id=None)
+        self.bootstrap = None
+        self._bootstrap_loaded_at = 0.0
+
+    def live_gameweek(self):
+        """The gameweek in progress (deadline passed, not finished), or None
+
+        bootstrap-static is only re-checked every LIVE_BOOTSTRAP_INTERVAL seconds.
+        """
+        if self.bootstrap is None or time.monotonic() - self._bootstrap_loaded_at >= config.LIVE_BOOTSTRAP_INTERVAL:
+            self.bootstrap = self.fetcher.use_bootstrap(self.fetcher.load_bootstrap())
+            self._bootstrap_loaded_at = time.monotonic()
+
+        gameweek = self.bootstrap.current_gw
+        if not self.bootstrap.gameweek_started or gameweek in self.bootstrap.finished_gameweeks:
+            return None
+        return gameweek
+
+    def fetch_live_points(self, gameweek):
+        """Fetch every player's live points in one request: {player_id: points}"""
+        live = self.fetcher.get_event_live(gameweek)
+        return {
+            element['id']: element['stats']['total_points']
+            for element in live['elements']
+        }
+
+    def _fetch_missing_picks(self, conn, gameweek):
+        """Fetch picks once per gameweek for entries that have none stored yet: {entry_id: picks}"""
+        missing = [row['entry_id'] for row in conn.execute('''
+            SELECT t.entry_id
+            FROM teams t
+            WHERE NOT EXISTS (
+                SELECT 1 FROM squad_picks sp
+                WHERE sp.entry_id = t.entry_id AND sp.gameweek = ?
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM live.live_picks lp
+                WHERE lp.entry_id = t.entry_id AND lp.gameweek = ?
+            )
+        ''', (gameweek, gameweek))]
+
+        if not missing:
+            return {}
+
+        logger.info(f"Fetching GW {gameweek} picks for {len(missing)} entries")
+
+        def fetch_picks(entry_id):
+            try:
+                return entry_id, self.fetcher.get_entry_picks(entry_id, gameweek)
+            except Exception as e:
+                logger.warning(f"Could not fetch GW {gameweek} picks for team {entry_id}: {e}")
+                return entry_id, None
+
+        with ThreadPoolExecutor(max_workers=self.fetcher.max_workers) as executor:
+            return {
+                entry_id: picks['picks']
+                for entry_id, picks in executor.map(fetch_picks, missing)
+                if picks
+            }
+
+    def update_league(self, league_code, gameweek, player_points):
+        """Score a league's entries from live player points; returns entries changed"""
+        # Work out the changes against the published snapshot and live points first
+        conn = get_league_reader(league_code)
+        fetched = self._fetch_missing_picks(conn, gameweek)
+
+        picks = [
+            (row['entry_id'], row['player_id'], row['multiplier'])
+            for row in conn.execute('''
+                SELECT entry_id, player_id, multiplier FROM squad_picks WHERE gameweek = ?
+                UNION ALL
+                SELECT entry_id, player_id, multiplier FROM live.live_picks WHERE gameweek = ?
+            ''', (gameweek, gameweek))
+        ]
+        picks += [
+            (entry_id, pick['element'], pick['multiplier'])
+            for entry_id, entry_picks in fetched.items() for pick in entry_picks
+        ]
+
+        live_points = {}
+        for entry_id, player_id, multiplier in picks:
+            points = player_points.get(player_id, 0) * multiplier
+            live_points[entry_id] = live_points.get(entry_id, 0) + points
+
+        stored = dict(conn.execute(
+            'SELECT entry_id, points FROM live.live_points WHERE gameweek = ?', (gameweek,)
+        ).fetchall())
+        superseded = conn.execute('''
+            SELECT (SELECT COUNT(*) FROM live.live_points WHERE gameweek < ?)
+                 + (SELECT COUNT(*) FROM live.live_picks WHERE gameweek < ?)
+        ''', (gameweek, gameweek)).fetchone()[0]
+        conn.close()
+
+        now = datetime.now()
+        changed = [
+            (entry_id, gameweek, points, now)
+            for entry_id, points in live_points.items()
+            if stored.get(entry_id) != points
+        ]
+        if not (fetched or changed or superseded):
+            return 0
+
+        live = get_live_connection(league_code)
+        try:
+            writer = BatchWriter(live.cursor())
+            for entry_id, entry_picks in fetched.items():
+                writer.add_many(LIVE_PICKS_SQL, (
+                    (entry_id, gameweek, pick['element'], pick['multiplier'])
+                    for pick in entry_picks
+                ))
+            writer.add_many(LIVE_POINTS_SQL, changed)
+
+            # Live rows from earlier gameweeks are superseded by the full collection
+            writer.add('DELETE FROM live_points WHERE gameweek < ?', (gameweek,))
+            writer.add('DELETE FROM live_picks WHERE gameweek < ?', (gameweek,))
+
+            writer.flush()
+            live.commit()
+        finally:
+            live.close()
+        bump_live_db_version(league_code)
+        return len(changed)
+
+    def poll(self):
+        """Run one live update across all leagues; returns {league_code: entries changed}"""
+        # A fresh per-run memo each poll; the disk cache still revalidates with ETags
+        self.fetcher.http_cache = HTTPCache()
+
+        gameweek = self.live_gameweek()
+        if gameweek is None:
+            logger.info("No gameweek in progress")
+            return {}
+
+        player_points = self.fetch_live_points(gameweek)
+
+        results = {}
+        for league_code in self.league_codes:
+            try:
+                results[league_code] = self.update_league(league_code, gameweek, player_points)
+            except Exception as e:
+                logger.error(f"Live update failed for league {league_code}: {e}")
+
+        logger.info(f"GW {gameweek} live update: {results}")
+        return results
+
+    def run_forever(self, interval=None):
+        """Poll until interrupted"""
+        interval = interval or config.LIVE_POLL_INTERVAL
+        while True:
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Live poll failed: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,385 @@
+"""
+Versioned schema migrations
+Each database records the last migration applied in PRAGMA user_version, so
+opening a current database costs one pragma read and runs no DDL. New schema
+changes are appended as the next numbered migration; they run once per file.
+"""
+
+import logging
+import os
+import sqlite3
+
+from data.standings import rebuild_standings
+
+logger = logging.getLogger(__name__)
+
+LEAGUE_MIGRATIONS = []     # [(version, function)] in version order
+REFERENCE_MIGRATIONS = []
+LIVE_MIGRATIONS = []
+
+
+def _migration(registry, version):
+    """Register a migration; versions must be added in increasing order"""
+    def register(function):
+        assert not registry or registry[-1][0] < version, 'migrations must be added in order'
+        registry.append((version, function))
+        return function
+    return register
+
+
+def league_migration(version):
+    return _migration(LEAGUE_MIGRATIONS, version)
+
+
+def reference_migration(version):
+    return _migration(REFERENCE_MIGRATIONS, version)
+
+
+def live_migration(version):
+    return _migration(LIVE_MIGRATIONS, version)
+
+
+def schema_version(conn, schema='main'):
+    """The last migration applied to a database"""
+    return conn.execute(f'PRAGMA {schema}.user_version').fetchone()[0]
+
+
+def migrate(conn, migrations):
+    """Apply pending migrations in order; returns the number applied
+
+    Each migration runs in its own write transaction together with its
+    user_version bump, and the version is re-read under the write lock so
+    concurrent processes never apply a migration twice.
+    """
+    latest = migrations[-1][0]
+    if schema_version(conn) >= latest:
+        return 0
+    
+    applied = 0
+    for version, function in migrations:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            function(conn.cursor())
+            conn.execute(f'PRAGMA main.user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied += 1
+        logger.info(f"Applied migration {version} ({function.__name__})")
+    return applied
+
+
+def migrate_file(path, migrations):
+    """Create or upgrade one database file; returns the number of migrations applied"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        return migrate(conn, migrations)
+    finally:
+        conn.close()
+
+
+# ==================== LEAGUE MIGRATIONS ====================
+
+@league_migration(1)
+def _league_baseline(cursor):
+    """League tables and indexes, folding in upgrades made before schema versioning"""
+    existing = {row[0] for row in cursor.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+    
+    # Teams table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS teams (
+            entry_id INTEGER PRIMARY KEY,
+            team_name TEXT NOT NULL,
+            manager_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Gameweek points table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS gameweek_points (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            gameweek INTEGER NOT NULL,
+            points INTEGER NOT NULL,
+            total_points INTEGER DEFAULT 0,
+            rank INTEGER,
+            bank REAL DEFAULT 0,
+            value REAL DEFAULT 0,
+            event_transfers INTEGER DEFAULT 0,
+            event_transfers_cost INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id, gameweek)
+        )
+    ''')
+    
+    # Transfers table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transfers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            gameweek INTEGER NOT NULL,
+            transfer_count INTEGER DEFAULT 0,
+            transfers_in TEXT,
+            transfers_out TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id, gameweek)
+        )
+    ''')
+    
+    # Chip usage table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chip_usage (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            gameweek INTEGER NOT NULL,
+            chip_name TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id, gameweek, chip_name)
+        )
+    ''')
+    
+    # Player stats table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS player_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            total_goals INTEGER DEFAULT 0,
+            total_assists INTEGER DEFAULT 0,
+            total_clean_sheets INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id)
+        )
+    ''')
+    
+    # Differentials table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS differentials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            gameweek INTEGER NOT NULL,
+            differential_players TEXT,
+            differential_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id, gameweek)
+        )
+    ''')
+    
+    # Current squads table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS current_squads (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            gameweek INTEGER NOT NULL,
+            player_ids TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id),
+            UNIQUE(entry_id, gameweek)
+        )
+    ''')
+    
+    # Per-entry incremental collection high-water marks
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS entry_sync (
+            entry_id INTEGER PRIMARY KEY,
+            last_finished_gw INTEGER DEFAULT 0,
+            transfers_total INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (entry_id) REFERENCES teams (entry_id)
+        )
+    ''')
+    
+    # Squad picks, one row per player, for the latest finished and live gameweeks
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS squad_picks (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            player_id INTEGER,
+            position INTEGER,
+            multiplier INTEGER,
+            is_captain BOOLEAN,
+            PRIMARY KEY (entry_id, gameweek, position)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Squads for every finished gameweek, packed by data.squads (3 bytes per pick)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS squad_history (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            picks BLOB NOT NULL,
+            PRIMARY KEY (entry_id, gameweek)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Individual transfers by player ID
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transfer_moves (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            player_in INTEGER,
+            player_out INTEGER,
+            time TIMESTAMP,
+            PRIMARY KEY (entry_id, time, player_in)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Live points for the gameweek in progress
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_points (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            points INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (entry_id, gameweek)
+        )
+    ''')
+    
+    # Entries committed by an interrupted collection run (cleared when a run completes)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS collection_checkpoint (
+            entry_id INTEGER PRIMARY KEY,
+            squad_data_gw INTEGER NOT NULL,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # League metadata (season, refresh bookkeeping)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS league_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Create indexes
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_gameweek_points_entry ON gameweek_points(entry_id, gameweek)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transfers_entry ON transfers(entry_id, gameweek)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_chip_usage_entry ON chip_usage(entry_id, gameweek)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_differentials_entry ON differentials(entry_id, gameweek)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_current_squads_entry ON current_squads(entry_id, gameweek)')
+    # Covering indexes for "who owns X" and "most transferred in/out this gameweek"
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_squad_picks_player ON squad_picks(gameweek, player_id, entry_id, multiplier)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transfer_moves_entry ON transfer_moves(entry_id, gameweek)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transfer_moves_in ON transfer_moves(gameweek, player_in, entry_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transfer_moves_out ON transfer_moves(gameweek, player_out, entry_id)')
+    
+    # Player and gameweek reference data now live in the shared store
+    cursor.execute('DROP TABLE IF EXISTS main.players')
+    cursor.execute('DROP TABLE IF EXISTS main.gameweeks')
+    
+    # Live picks are kept in squad_picks
+    cursor.execute('DROP TABLE IF EXISTS main.live_picks')
+    
+    if existing and 'squad_picks' not in existing:
+        # Seed picks from the stored squads (multipliers are filled in as picks are refetched)
+        squads = cursor.execute('SELECT entry_id, gameweek, player_ids FROM current_squads').fetchall()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO squad_picks (entry_id, gameweek, player_id, position)
+            VALUES (?, ?, ?, ?)
+        ''', (
+            (entry_id, gameweek, int(player_id), position)
+            for entry_id, gameweek, player_ids in squads if player_ids
+            for position, player_id in enumerate(player_ids.split(','), start=1)
+        ))
+    
+    if existing and 'transfer_moves' not in existing:
+        # Stored transfers only hold names, so refetch every entry's transfers once
+        cursor.execute('UPDATE entry_sync SET transfers_total = -1')
+
+
+@league_migration(2)
+def _standings_by_gw(cursor):
+    """Materialized cumulative points and ranks per gameweek (data.standings)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS standings_by_gw (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            points INTEGER,
+            cumulative_points INTEGER,
+            league_rank INTEGER,
+            gw_rank INTEGER,
+            PRIMARY KEY (gameweek, entry_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_standings_rank ON standings_by_gw(gameweek, league_rank)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_standings_entry ON standings_by_gw(entry_id, gameweek)')
+    
+    # Backfill from data already collected
+    rebuild_standings(cursor)
+
+
+# ==================== REFERENCE MIGRATIONS ====================
+
+@reference_migration(1)
+def _reference_baseline(cursor):
+    """Shared player and gameweek tables"""
+    # Gameweeks table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS gameweeks (
+            id INTEGER PRIMARY KEY,
+            deadline TEXT NOT NULL,
+            finished INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Players table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            player_id INTEGER PRIMARY KEY,
+            web_name TEXT NOT NULL,
+            full_name TEXT,
+            content_hash TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(players)')}
+    if 'content_hash' not in columns:
+        cursor.execute('ALTER TABLE players ADD COLUMN content_hash TEXT')
+
+
+# ==================== LIVE MIGRATIONS ====================
+
+@live_migration(1)
+def _live_baseline(cursor):
+    """Per-league live points and the picks fetched by the live poller"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_points (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            points INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (entry_id, gameweek)
+        )
+    ''')
+    
+    # Picks for entries the last collection had none for
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS live_picks (
+            entry_id INTEGER,
+            gameweek INTEGER,
+            player_id INTEGER,
+            multiplier INTEGER,
+            PRIMARY KEY (gameweek, entry_id, player_id)
+        ) WITHOUT ROWID
+    ''')
+
+
+if __name__ == '__main__':
+    from data.database import init_db
+    for path, current in init_db().items():
+        print(f"{path}: {'current' if current else 'upgrade deferred (refresh in progress)'}")
@@ -0,0 +1,152 @@
+"""
+Bitset ownership engine for differentials
+Each squad is a fixed-width bitset over player IDs packed into uint64 words,
+so ownership counts and differentials for any team selection are a handful
+of vectorized NumPy operations
+"""
+
+import threading
+
+import numpy as np
+
+from data.database import get_league_db_version, get_league_reader
+from data.squads import unpack_player_ids
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        """Set bits per row of uint64 words"""
+        return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+else:
+    def _popcount(words):
+        """Set bits per row of uint64 words"""
+        return np.unpackbits(words.view(np.uint8), axis=-1).sum(axis=-1, dtype=np.int64)
+
+
+class OwnershipMatrix:
+    """Squads packed as bitsets: one row of uint64 words per team"""
+
+    def __init__(self, squads):
+        """squads: {entry_id: iterable of player IDs}"""
+        self.entry_ids = np.fromiter(squads.keys(), dtype=np.int64, count=len(squads))
+        self._rows = {int(entry_id): row for row, entry_id in enumerate(self.entry_ids)}
+
+        player_ids = [np.fromiter(squad, dtype=np.intp) for squad in squads.values()]
+        max_player_id = max((int(ids.max()) for ids in player_ids if ids.size), default=0)
+        self.bit_count = (max_player_id // 64 + 1) * 64
+
+        owned = np.zeros((len(squads), self.bit_count), dtype=bool)
+        for row, ids in enumerate(player_ids):
+            owned[row, ids] = True
+        self.words = self._pack(owned)
+
+    @staticmethod
+    def _pack(bits):
+        """Pack a boolean array (last axis = player ID) into uint64 words"""
+        return np.packbits(bits, axis=-1, bitorder='little').view(np.uint64)
+
+    def _unpack(self, words):
+        """Unpack uint64 words back into booleans indexed by player ID"""
+        return np.unpackbits(words.view(np.uint8), axis=-1, bitorder='little').astype(bool)
+
+    def rows(self, entry_ids=None):
+        """Row indices for a team selection (None = every team); unknown and repeated IDs are ignored"""
+        if entry_ids is None:
+            return np.arange(len(self.entry_ids))
+        rows = (self._rows.get(entry_id) for entry_id in entry_ids)
+        return np.array(list(dict.fromkeys(row for row in rows if row is not None)), dtype=np.int64)
+
+    def ownership_counts(self, entry_ids=None):
+        """How many selected teams own each player (array indexed by player ID)"""
+        selected = self.words[self.rows(entry_ids)]
+        return self._unpack(selected).sum(axis=0, dtype=np.int64)
+
+    def most_owned(self, limit, entry_ids=None):
+        """[(player_id, teams owning)] for the most-owned players, ties by player ID"""
+        counts = self.ownership_counts(entry_ids)
+        top = np.argsort(-counts, kind='stable')[:limit]
+        return [(int(player_id), int(counts[player_id])) for player_id in top if counts[player_id] > 0]
+
+    def _owned_by_at_most_mask(self, k, rows):
+        """Packed mask of players owned by 1..k of the selected teams"""
+        counts = self._unpack(self.words[rows]).sum(axis=0, dtype=np.int64)
+        return self._pack((counts > 0) & (counts <= k))
+
+    def differential_counts(self, entry_ids=None, k=1):
+        """Players each selected team owns that at most k selected teams own
+
+        Returns {entry_id: count}; k=1 gives true differentials.
+        """
+        rows = self.rows(entry_ids)
+        if not len(rows):
+            return {}
+        mask = self._owned_by_at_most_mask(k, rows)
+        counts = _popcount(self.words[rows] & mask)
+        return dict(zip(self.entry_ids[rows].tolist(), counts.tolist()))
+
+    def owned_by_at_most(self, k, entry_ids=None):
+        """Player IDs each selected team owns that at most k selected teams own
+
+        Returns {entry_id: [player IDs]}; k=1 gives true differentials.
+        """
+        rows = self.rows(entry_ids)
+        if not len(rows):
+            return {}
+        mask = self._owned_by_at_most_mask(k, rows)
+        owned = self._unpack(self.words[rows] & mask)
+        return {
+            int(entry_id): np.flatnonzero(owned_row).tolist()
+            for entry_id, owned_row in zip(self.entry_ids[rows], owned)
+        }
+
+    def differentials(self, entry_ids=None):
+        """True differentials: players owned by only this team within the selection"""
+        return self.owned_by_at_most(1, entry_ids)
+
+
+_matrix_cache = {}  # (league_code, gameweek) -> (db version, OwnershipMatrix)
+_matrix_cache_lock = threading.Lock()
+
+
+def get_league_ownership(league_code, gameweek):
+    """Ownership matrix for a league's squads in any gameweek, cached until the league DB changes
+
+    Callers clamp the gameweek to 1..current gameweek first, since each one
+    is cached separately.
+
+    Finished gameweeks come from squad_history; the live gameweek (not yet
+    archived) falls back to squad_picks.
+    """
+    key = (league_code, gameweek)
+    version = get_league_db_version(league_code)
+
+    with _matrix_cache_lock:
+        cached = _matrix_cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    conn = get_league_reader(league_code)
+    try:
+        squads = {
+            row['entry_id']: unpack_player_ids(row['picks'])
+            for row in conn.execute(
+                'SELECT entry_id, picks FROM squad_history WHERE gameweek = ?', (gameweek,)
+            )
+        }
+
+        if not squads:
+            # Served from the (gameweek, player_id, entry_id) covering index
+            for row in conn.execute(
+                'SELECT entry_id, player_id FROM squad_picks WHERE gameweek = ?', (gameweek,)
+            ):
+                squads.setdefault(row['entry_id'], []).append(row['player_id'])
+    finally:
+        conn.close()
+
+    matrix = OwnershipMatrix(squads)
+
+    with _matrix_cache_lock:
+        # Keep only matrices of the league's current snapshot
+        for stale in [k for k, (v, _) in _matrix_cache.items() if k[0] == league_code and v != version]:
+            del _matrix_cache[stale]
+        _matrix_cache[key] = (version, matrix)
+    return matrix
@@ -0,0 +1,148 @@
+"""
+Multi-league collection planner
+Gathers every league's standings first, fetches each unique entry exactly
+once, then fans the results out to every league database containing it
+"""
+
+import logging
+
+from data.checkpoint import CollectionCheckpoint
+from data.database import BatchWriter
+from data.fpl_api import FPLDataCollector
+from data.http_cache import HTTPCache
+
+logger = logging.getLogger(__name__)
+
+
+class _LeagueRun:
+    """Open write state for one league during a planned collection"""
+
+    def __init__(self, collector):
+        self.collector = collector
+        self.snapshot = collector.open_snapshot()
+        self.conn = None
+        self.cursor = None
+        self.writer = None
+        self.squad_data_gw = None
+        self.teams = []
+        self.sync_state = {}
+        self.all_squads = {}
+        self.checkpoint = None
+        self.error = None
+
+
+class CollectionPlanner:
+    """Refresh several leagues while fetching each shared entry only once"""
+
+    def __init__(self, league_codes, http_cache=None, bootstrap=None, incremental=None):
+        self.league_codes = list(league_codes)
+        self.http_cache = http_cache or HTTPCache()
+        self.bootstrap = bootstrap
+        self.incremental = incremental
+        self.fetcher = FPLDataCollector(team_id=None, league_id=None, http_cache=self.http_cache)
+
+    def _open_league(self, league_code):
+        """Start a league: apply the shared bootstrap and store its teams"""
+        collector = FPLDataCollector(
+            team_id=None,
+            league_id=league_code,
+            http_cache=self.http_cache,
+            bootstrap=self.bootstrap,
+            incremental=self.incremental
+        )
+        run = _LeagueRun(collector)
+
+        try:
+            run.conn = run.snapshot.open()
+            run.cursor = run.conn.cursor()
+            run.writer = BatchWriter(run.cursor)
+            run.squad_data_gw = collector.begin_league(run.writer)
+            run.checkpoint = CollectionCheckpoint(run.conn, run.writer, run.squad_data_gw)
+            run.checkpoint.resume(run.all_squads)
+            run.teams = collector.fetch_teams()
+            collector.store_teams(run.writer, run.teams)
+            if collector.incremental:
+                run.sync_state = collector.load_sync_state(run.cursor)
+        except Exception as e:
+            logger.error(f"Failed to start collection for league {league_code}: {e}")
+            run.error = str(e)
+
+        return run
+
+    def _finish_league(self, league_code, run):
+        """Store differentials and publish, or roll back a failed league's last batch"""
+        try:
+            if run.error is None:
+                run.collector.store_differentials(run.writer, run.all_squads, run.squad_data_gw)
+                run.collector.prune_squad_picks(run.writer, run.squad_data_gw)
+                run.collector.store_standings(run.writer)
+                run.checkpoint.finish()
+                run.snapshot.publish()
+                logger.info(f"League {league_code} collected ({len(run.teams)} teams)")
+        except Exception as e:
+            logger.error(f"Failed to finish collection for league {league_code}: {e}")
+            run.error = str(e)
+        finally:
+            # Failed leagues keep their committed batches in the staging file
+            if run.snapshot.conn is not None:
+                run.snapshot.abandon()
+
+    def run(self):
+        """Collect all leagues; returns {league_code: error message or None}"""
+        # 1. Fetch bootstrap-static once for every league
+        if self.bootstrap is None:
+            self.bootstrap = self.fetcher.load_bootstrap()
+        self.fetcher.use_bootstrap(self.bootstrap)
+        self.fetcher.store_reference_data(self.bootstrap)
+
+        # 2. Gather every league's standings before fetching any entry
+        runs = {code: self._open_league(code) for code in self.league_codes}
+
+        # 3. Build the set of unique entries and the leagues each belongs to
+        unique_teams = {}
+        entry_leagues = {}
+        for run in runs.values():
+            if run.error is not None:
+                continue
+            for team in run.teams:
+                # Already stored by an interrupted run of this league
+                if team['entry'] in run.checkpoint:
+                    continue
+                unique_teams.setdefault(team['entry'], team)
+                entry_leagues.setdefault(team['entry'], []).append(run)
+        
+        # An entry can skip calls only if every league holding it agrees on its state
+        fetch_state = {}
+        for entry_id, league_runs in entry_leagues.items():
+            states = [run.sync_state.get(entry_id) for run in league_runs]
+            if states[0] and all(state == states[0] for state in states):
+                fetch_state[entry_id] = states[0]
+
+        total_memberships = sum(len(leagues) for leagues in entry_leagues.values())
+        logger.info(
+            f"Planned {len(unique_teams)} unique entries for {total_memberships} "
+            f"league memberships across {len(runs)} leagues"
+        )
+
+        # 4. Fetch each entry exactly once and fan it out to its leagues
+        squad_data_gw = self.bootstrap.last_completed_gw
+        try:
+            teams = list(unique_teams.values())
+            for team, entry_data in self.fetcher.fetch_entries(teams, squad_data_gw, fetch_state):
+                for run in entry_leagues[team['entry']]:
+                    if run.collector.store_entry(
+                        run.writer, team, entry_data, squad_data_gw, run.all_squads,
+                        run.sync_state.get(team['entry'])
+                    ):
+                        run.checkpoint.mark(team['entry'])
+        except Exception as e:
+            logger.error(f"Entry collection failed: {e}")
+            for run in runs.values():
+                run.error = run.error or str(e)
+
+        # 5. Finish each league in its own transaction
+        for league_code, run in runs.items():
+            self._finish_league(league_code, run)
+
+        logger.info(f"HTTP cache: {self.http_cache.stats}")
+        return {league_code: run.error for league_code, run in runs.items()}
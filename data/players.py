@@ -0,0 +1,69 @@
+"""
+Indexed player table built from FPL bootstrap data
+"""
+
+import hashlib
+
+
+class PlayerRecord:
+    """Compact per-player record holding the fields the collector needs"""
+
+    __slots__ = ('id', 'name', 'full_name', 'position', 'team',
+                 'goals', 'assists', 'clean_sheets')
+
+    def __init__(self, element):
+        self.id = element['id']
+        self.name = element['web_name']
+        self.full_name = element['first_name'] + ' ' + element['second_name']
+        self.position = element['element_type']  # 1=GK, 2=DEF, 3=MID, 4=FWD
+        self.team = element['team']
+        self.goals = element.get('goals_scored', 0)
+        self.assists = element.get('assists', 0)
+        self.clean_sheets = element.get('clean_sheets', 0)
+
+    def content_hash(self):
+        """Hash of the fields stored in the players table, to skip unchanged upserts"""
+        content = f'{self.name}\x1f{self.full_name}'
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+
+
+class PlayerIndex:
+    """Id-keyed player lookups (O(1)), built once per bootstrap payload"""
+
+    def __init__(self, elements):
+        # FPL player IDs are small dense integers, so a list beats a dict
+        max_id = max((element['id'] for element in elements), default=0)
+        self._records = [None] * (max_id + 1)
+        self._count = 0
+
+        for element in elements:
+            self._records[element['id']] = PlayerRecord(element)
+            self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return (record for record in self._records if record is not None)
+
+    def get(self, player_id):
+        """Get the record for a player ID, or None if unknown"""
+        if 0 <= player_id < len(self._records):
+            return self._records[player_id]
+        return None
+
+    def name(self, player_id, default='Unknown'):
+        """Get a player's display name"""
+        record = self.get(player_id)
+        return record.name if record else default
+
+    def squad_totals(self, player_ids):
+        """Sum goals, assists and clean sheets across a squad"""
+        goals = assists = clean_sheets = 0
+        for player_id in player_ids:
+            record = self.get(player_id)
+            if record:
+                goals += record.goals
+                assists += record.assists
+                clean_sheets += record.clean_sheets
+        return goals, assists, clean_sheets
@@ -0,0 +1,163 @@
+"""
+Token-bucket rate limiting for FPL API requests
+"""
+
+import sqlite3
+import threading
+import time
+
+import config
+
+
+class AdaptiveRate:
+    """AIMD control of a limiter's rate: creep up on success, halve on throttling
+
+    The configured rate is the ceiling, so a healthy API runs at full budget
+    and a degraded one (429/5xx) is backed off quickly.
+    """
+
+    def _init_adaptive(self, rate, min_rate=None):
+        self.rate = float(rate)  # Tokens added per second (0 disables limiting)
+        self.max_rate = self.rate
+        min_rate = config.API_MIN_REQUESTS_PER_SECOND if min_rate is None else min_rate
+        self.min_rate = min(self.max_rate, float(min_rate))
+        self._last_decrease = 0.0
+        self._rate_lock = threading.Lock()
+
+    def set_rate(self, rate):
+        """Change the refill rate (subclasses settle accrued tokens first)"""
+        self.rate = rate
+
+    def record_success(self):
+        """Additive increase: about +API_RATE_INCREASE requests/second per second of traffic"""
+        if self.max_rate <= 0 or self.rate >= self.max_rate:
+            return
+        with self._rate_lock:
+            self.set_rate(min(self.max_rate, self.rate + config.API_RATE_INCREASE / self.rate))
+
+    def record_throttled(self):
+        """Multiplicative decrease, at most once per second so a burst of failures counts once"""
+        if self.max_rate <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            self.set_rate(max(self.min_rate, self.rate * config.API_RATE_DECREASE))
+
+
+class TokenBucket(AdaptiveRate):
+    """Thread-safe token bucket shared by every request sent to the FPL API"""
+
+    def __init__(self, rate, burst, min_rate=None):
+        self._init_adaptive(rate, min_rate)
+        self.burst = max(1.0, float(burst))  # Maximum tokens held at once
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Top up tokens for the time elapsed since the last refill (lock held)"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def acquire(self, tokens=1):
+        """Block until enough tokens are available, then consume them"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+
+class SharedTokenBucket(AdaptiveRate):
+    """Token bucket stored in a SQLite file so every process on the machine shares one budget
+    
+    Each acquire runs a short BEGIN IMMEDIATE transaction, which serializes
+    refills across processes; wall-clock time is used since monotonic clocks
+    are not comparable between processes. AIMD adjustments apply to this
+    process's refill rate.
+    """
+
+    def __init__(self, path, rate, burst, min_rate=None):
+        self.path = path
+        self._init_adaptive(rate, min_rate)
+        self.burst = max(1.0, float(burst))
+        self._local = threading.local()  # One connection per thread
+
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_bucket (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute(
+            'INSERT OR IGNORE INTO token_bucket (id, tokens, updated_at) VALUES (1, ?, ?)',
+            (self.burst, time.time())
+        )
+
+    def _connect(self):
+        """Get this thread's connection to the bucket file"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, tokens=1):
+        """Block until enough tokens are available, then consume them"""
+        if self.rate <= 0:
+            return
+
+        conn = self._connect()
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                stored, updated_at = conn.execute(
+                    'SELECT tokens, updated_at FROM token_bucket WHERE id = 1'
+                ).fetchone()
+                now = time.time()
+                available = min(self.burst, stored + max(0.0, now - updated_at) * self.rate)
+                granted = available >= tokens
+                conn.execute(
+                    'UPDATE token_bucket SET tokens = ?, updated_at = ? WHERE id = 1',
+                    (available - tokens if granted else available, now)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+            if granted:
+                return
+            time.sleep((tokens - available) / self.rate)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter():
+    """Get the process-wide limiter so all collectors share one API budget"""
+    global _default_limiter
+
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = TokenBucket(config.API_REQUESTS_PER_SECOND, config.API_BURST)
+        return _default_limiter
@@ -0,0 +1,90 @@
+"""
+Resilience helpers for the FPL API transport
+Exponential backoff with jitter and per-endpoint circuit breakers
+"""
+
+import random
+import re
+import threading
+import time
+
+import requests
+
+import config
+
+# Statuses worth retrying: rate limited or a transient server-side failure
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without sending when an endpoint's circuit breaker is open"""
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter exponential backoff delay (seconds) for a 0-based retry attempt"""
+    base = config.API_BACKOFF_BASE if base is None else base
+    cap = config.API_BACKOFF_MAX if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def endpoint_key(url):
+    """Group URLs by endpoint shape, e.g. /entry/{id}/event/{id}/picks/"""
+    path = re.sub(r'^https?://[^/]+', '', url).split('?')[0]
+    return re.sub(r'/\d+', '/{id}', path)
+
+
+class CircuitBreaker:
+    """Fails fast after repeated failures, letting a single trial through after a cooldown
+
+    closed -> open after failure_threshold consecutive failures;
+    open -> half-open once reset_timeout has passed (one trial request);
+    half-open -> closed on success, or back to open on failure.
+    """
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a request may be sent now"""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+            if self.state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint):
+    """Get the process-wide circuit breaker for an endpoint"""
+    with _breakers_lock:
+        breaker = _breakers.get(endpoint)
+        if breaker is None:
+            breaker = _breakers[endpoint] = CircuitBreaker()
+        return breaker
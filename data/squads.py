@@ -0,0 +1,48 @@
+"""
+Compact squad encoding for squad_history
+A squad is 15 fixed-width 3-byte records in pick order: the player ID
+(uint16) and a flags byte holding the multiplier, captain and vice-captain
+"""
+
+import struct
+
+import numpy as np
+
+PICK_DTYPE = np.dtype([('player_id', '<u2'), ('flags', 'u1')])
+
+_PICK_FORMAT = struct.Struct('<HB')
+_MULTIPLIER_MASK = 0x0F
+_CAPTAIN_FLAG = 0x10
+_VICE_CAPTAIN_FLAG = 0x20
+
+
+def pack_picks(picks):
+    """Encode the API's picks list (in position order) as bytes"""
+    return b''.join(
+        _PICK_FORMAT.pack(
+            pick['element'],
+            (pick['multiplier'] & _MULTIPLIER_MASK)
+            | (_CAPTAIN_FLAG if pick.get('is_captain') else 0)
+            | (_VICE_CAPTAIN_FLAG if pick.get('is_vice_captain') else 0)
+        )
+        for pick in sorted(picks, key=lambda pick: pick['position'])
+    )
+
+
+def unpack_picks(blob):
+    """Decode a squad into pick dicts (position, player_id, multiplier, is_captain, is_vice_captain)"""
+    return [
+        {
+            'position': position,
+            'player_id': player_id,
+            'multiplier': flags & _MULTIPLIER_MASK,
+            'is_captain': bool(flags & _CAPTAIN_FLAG),
+            'is_vice_captain': bool(flags & _VICE_CAPTAIN_FLAG)
+        }
+        for position, (player_id, flags) in enumerate(_PICK_FORMAT.iter_unpack(blob), start=1)
+    ]
+
+
+def unpack_player_ids(blob):
+    """Decode just the player IDs of a squad (NumPy view, no per-pick objects)"""
+    return np.frombuffer(blob, dtype=PICK_DTYPE)['player_id']
@@ -0,0 +1,34 @@
+"""
+Materialized league standings
+standings_by_gw holds each entry's cumulative points, league rank and
+gameweek rank for every gameweek. It is rebuilt in one pass after a
+collection, so dashboard reads are indexed range scans instead of
+window functions over gameweek_points.
+"""
+
+REBUILD_STANDINGS_SQL = '''
+    INSERT INTO standings_by_gw (entry_id, gameweek, points, cumulative_points, league_rank, gw_rank)
+    SELECT
+        entry_id,
+        gameweek,
+        points,
+        cumulative_points,
+        RANK() OVER (PARTITION BY gameweek ORDER BY cumulative_points DESC),
+        RANK() OVER (PARTITION BY gameweek ORDER BY points DESC)
+    FROM (
+        SELECT
+            gp.entry_id,
+            gp.gameweek,
+            gp.points,
+            SUM(gp.points) OVER (PARTITION BY gp.entry_id ORDER BY gp.gameweek) as cumulative_points
+        FROM gameweek_points gp
+        JOIN teams t ON t.entry_id = gp.entry_id
+    )
+'''
+
+
+def rebuild_standings(cursor):
+    """Recompute standings_by_gw from gameweek_points and teams; returns rows written"""
+    cursor.execute('DELETE FROM standings_by_gw')
+    cursor.execute(REBUILD_STANDINGS_SQL)
+    return cursor.rowcount
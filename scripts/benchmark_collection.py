@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark league collection offline against the local FPL API simulator
+Runs a full collection (and optionally incremental re-runs) into a
+throwaway data directory and reports throughput
+
+Usage:
+    python scripts/benchmark_collection.py --teams 10000 --latency 0.02 --runs 2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPTS_DIR))
+
+from fpl_simulator import SimulatedFPL, start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=1000, help='Teams per league')
+    parser.add_argument('--leagues', type=int, default=1, help='Leagues to collect (consecutive IDs overlap)')
+    parser.add_argument('--finished-gw', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.02, help='Mean simulated response latency (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 429/503 responses')
+    parser.add_argument('--rps', type=float, default=0, help='Request rate limit (0 = unlimited)')
+    parser.add_argument('--workers', type=int, default=None, help='Concurrent entry fetches')
+    parser.add_argument('--runs', type=int, default=1, help='Collections to run (later runs are incremental)')
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark data directory')
+    args = parser.parse_args()
+
+    simulator = SimulatedFPL(teams=args.teams, finished_gw=args.finished_gw)
+    server, base_url, stats = start_server(simulator, latency=args.latency, error_rate=args.error_rate)
+
+    # Point every path at a scratch directory before config is imported
+    work_dir = tempfile.mkdtemp(prefix='vantix-bench-')
+    os.environ.update({
+        'FPL_API_BASE_URL': base_url,
+        'FPL_API_MODE': 'live',
+        'DATABASE_PATH': os.path.join(work_dir, 'fpl_data.db'),
+        'REFERENCE_DATABASE_PATH': os.path.join(work_dir, 'fpl_reference.db'),
+        'HTTP_CACHE_DIR': os.path.join(work_dir, 'http_cache'),
+        'API_REQUESTS_PER_SECOND': str(args.rps),
+    })
+    if args.workers:
+        os.environ['API_MAX_WORKERS'] = str(args.workers)
+
+    from data.planner import CollectionPlanner
+
+    league_codes = list(range(1, args.leagues + 1))
+    print(f"Benchmarking {args.leagues} league(s) x {args.teams} teams against {base_url}")
+    print(f"Data directory: {work_dir}")
+
+    try:
+        for run in range(1, args.runs + 1):
+            requests_before = stats['requests']
+            started = time.perf_counter()
+            errors = CollectionPlanner(league_codes).run()
+            elapsed = time.perf_counter() - started
+            requests = stats['requests'] - requests_before
+
+            failed = [code for code, error in errors.items() if error]
+            print(
+                f"Run {run}: {elapsed:.2f}s, {requests} requests "
+                f"({requests / elapsed:.0f} req/s, {args.teams * args.leagues / elapsed:.0f} entries/s)"
+                + (f", failed leagues: {failed}" if failed else "")
+            )
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"Kept {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Simulator: {stats['requests']} requests, {stats['errors']} errors, {stats['not_modified']} not modified")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Query-plan and timing regression check for the dashboard API
+Builds a synthetic league database, calls every GET /api/<league_code>/*
+endpoint through the Flask test client (full league and a team selection),
+traces the SQL each one runs (plus the one-off load of the league's points
+matrix), and checks:
+
+  * EXPLAIN QUERY PLAN: no statement full-scans a table that is not listed
+    for that endpoint in EXPECTED_SCANS
+  * timings: with a baseline recorded on the same machine, no statement is
+    slower than --tolerance x its baseline
+
+Exits nonzero on any regression.
+
+Usage:
+    python scripts/check_query_plans.py --record     # save a timing baseline
+    python scripts/check_query_plans.py              # compare against it
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPTS_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+LEAGUE_CODE = 1
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'data', 'query_timings.json')
+
+# Tables each endpoint is allowed to full-scan, per mode ('league' = no team
+# filter, 'teams' = ?teams=...). Anything else is treated as a lost index.
+# The reference tables are small and may always be scanned.
+EXPECTED_SCANS = {
+    ('dashboard', 'league'): {'teams', 'chip_usage', 'player_stats'},
+    ('dashboard', 'teams'): set(),
+    ('cumulative-points', 'league'): set(),
+    ('cumulative-points', 'teams'): set(),
+    ('league-positions', 'league'): {'chip_usage'},
+    ('league-positions', 'teams'): set(),
+    ('recent-transfers', 'league'): {'teams', 'chip_usage'},
+    ('recent-transfers', 'teams'): set(),
+    ('stats', 'league'): {'teams', 'player_stats'},
+    ('stats', 'teams'): set(),
+    ('form-chart', 'league'): set(),
+    ('form-chart', 'teams'): set(),
+    ('points-distribution', 'league'): set(),
+    ('points-distribution', 'teams'): set(),
+    ('team-comparison', 'league'): set(),
+    ('team-comparison', 'teams'): set(),
+    ('biggest-movers', 'league'): set(),
+    ('biggest-movers', 'teams'): set(),
+    ('weekly-performance', 'league'): set(),
+    ('weekly-performance', 'teams'): set(),
+    ('head-to-head', 'league'): set(),
+    ('head-to-head', 'teams'): set(),
+    ('differentials', 'league'): set(),
+    ('differentials', 'teams'): set(),
+    ('ownership', 'league'): set(),
+    ('ownership', 'teams'): set(),
+    ('podium', 'league'): set(),
+    ('podium', 'teams'): set(),
+    ('live', 'league'): {'live_points'},
+    ('live', 'teams'): set(),
+    # Loaded once per published snapshot, then shared by the endpoints above
+    ('league-matrix', 'load'): {'teams', 'standings_by_gw', 'gameweek_points'},
+}
+
+ALWAYS_SCANNABLE = {'gameweeks', 'players'}
+
+TOLERANCE = 2.0          # Default allowed slowdown factor against the baseline
+MIN_REGRESSION_MS = 2.0  # Ignore slowdowns smaller than this (timer noise)
+
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(?:\w+\.)?(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|GROUP\b|ORDER\b)(\w+))?', re.I)
+_SCAN = re.compile(r'^SCAN (\w+)')
+
+
+def build_league(db_path, reference_path, live_path, teams, finished_gw, seed=1):
+    """Create a synthetic league (teams x finished gameweeks) through the real migrations"""
+    import sqlite3
+    from data.migrations import LEAGUE_MIGRATIONS, LIVE_MIGRATIONS, REFERENCE_MIGRATIONS, migrate_file
+    from data.squads import pack_picks
+    from data.standings import rebuild_standings
+
+    rng = random.Random(seed)
+    migrate_file(reference_path, REFERENCE_MIGRATIONS)
+    migrate_file(db_path, LEAGUE_MIGRATIONS)
+    migrate_file(live_path, LIVE_MIGRATIONS)
+
+    live_gw = finished_gw + 1
+    now = datetime.now()
+    ref = sqlite3.connect(reference_path)
+    ref.executemany('INSERT INTO gameweeks (id, deadline, finished) VALUES (?, ?, ?)', [
+        (gw, (now - timedelta(days=7 * (live_gw - gw)) - timedelta(hours=1)).isoformat() + 'Z', int(gw <= finished_gw))
+        for gw in range(1, 39)
+    ])
+    ref.executemany('INSERT INTO players (player_id, web_name, full_name) VALUES (?, ?, ?)', [
+        (player_id, f'P{player_id}', f'Player {player_id}') for player_id in range(1, 701)
+    ])
+    ref.commit()
+    ref.close()
+
+    conn = sqlite3.connect(db_path)
+    entry_ids = list(range(1001, 1001 + teams))
+    conn.executemany('INSERT INTO teams (entry_id, team_name, manager_name) VALUES (?, ?, ?)', [
+        (entry_id, f'Team {entry_id}', f'Manager {entry_id}') for entry_id in entry_ids
+    ])
+
+    points_rows, transfer_rows, chip_rows, history_rows, move_rows = [], [], [], [], []
+    squads = {}
+    for entry_id in entry_ids:
+        total = 0
+        squad = rng.sample(range(1, 701), 15)
+        for gw in range(1, live_gw + 1):
+            transfers = rng.choice((0, 0, 1, 1, 2))
+            moves = []
+            for _ in range(transfers):
+                player_out = squad.pop(rng.randrange(15))
+                player_in = rng.randint(1, 700)
+                while player_in in squad:
+                    player_in = rng.randint(1, 700)
+                squad.append(player_in)
+                moves.append((player_in, player_out))
+                move_rows.append((entry_id, gw, player_in, player_out, f'{gw:02d}-{player_in}'))
+            picks = [
+                {'element': player_id, 'position': position, 'multiplier': 2 if position == 1 else int(position <= 11),
+                 'is_captain': position == 1, 'is_vice_captain': position == 2}
+                for position, player_id in enumerate(squad, start=1)
+            ]
+            if gw > finished_gw:
+                squads[entry_id] = picks
+                continue
+            points = rng.randint(20, 100)
+            total += points
+            cost = 4 * max(0, transfers - 1)
+            points_rows.append((entry_id, gw, points, total, rng.randint(1, 9_000_000), 0.5, 100.0, transfers, cost))
+            if transfers:
+                transfer_rows.append((
+                    entry_id, gw, transfers,
+                    ','.join(f'P{player_in}' for player_in, _ in moves),
+                    ','.join(f'P{player_out}' for _, player_out in moves)
+                ))
+            if rng.random() < 0.03:
+                chip_rows.append((entry_id, gw, rng.choice(('wildcard', 'bboost', '3xc', 'freehit'))))
+            history_rows.append((entry_id, gw, pack_picks(picks)))
+
+    conn.executemany('''
+        INSERT INTO gameweek_points (entry_id, gameweek, points, total_points, rank, bank, value,
+                                     event_transfers, event_transfers_cost)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', points_rows)
+    conn.executemany('''
+        INSERT INTO transfers (entry_id, gameweek, transfer_count, transfers_in, transfers_out)
+        VALUES (?, ?, ?, ?, ?)
+    ''', transfer_rows)
+    conn.executemany('INSERT OR IGNORE INTO chip_usage (entry_id, gameweek, chip_name) VALUES (?, ?, ?)', chip_rows)
+    conn.executemany('INSERT INTO squad_history (entry_id, gameweek, picks) VALUES (?, ?, ?)', history_rows)
+    conn.executemany('''
+        INSERT OR REPLACE INTO transfer_moves (entry_id, gameweek, player_in, player_out, time)
+        VALUES (?, ?, ?, ?, ?)
+    ''', move_rows)
+    conn.executemany('''
+        INSERT INTO squad_picks (entry_id, gameweek, player_id, position, multiplier, is_captain)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        (entry_id, live_gw, pick['element'], pick['position'], pick['multiplier'], pick['is_captain'])
+        for entry_id, picks in squads.items() for pick in picks
+    ))
+    conn.executemany('''
+        INSERT INTO current_squads (entry_id, gameweek, player_ids) VALUES (?, ?, ?)
+    ''', ((entry_id, live_gw, ','.join(str(pick['element']) for pick in picks)) for entry_id, picks in squads.items()))
+    conn.executemany('''
+        INSERT INTO player_stats (entry_id, total_goals, total_assists, total_clean_sheets) VALUES (?, ?, ?, ?)
+    ''', ((entry_id, rng.randint(0, 60), rng.randint(0, 60), rng.randint(0, 40)) for entry_id in entry_ids))
+    conn.executemany('''
+        INSERT INTO differentials (entry_id, gameweek, differential_players, differential_count) VALUES (?, ?, ?, ?)
+    ''', ((entry_id, live_gw, 'P5,P6', 2) for entry_id in entry_ids))
+    rebuild_standings(conn.cursor())
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+    live = sqlite3.connect(live_path)
+    live.executemany('INSERT INTO live_points (entry_id, gameweek, points) VALUES (?, ?, ?)', (
+        (entry_id, live_gw, rng.randint(0, 60)) for entry_id in entry_ids
+    ))
+    live.commit()
+    live.execute('ANALYZE')
+    live.close()
+    return entry_ids
+
+
+def full_scans(conn, sql):
+    """Tables a statement reads with a full (table or index) scan
+
+    Scans of CTEs and subquery results are not counted; their inputs are.
+    """
+    tables = {row[0] for schema in ('main', 'ref', 'live') for row in conn.execute(
+        f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'"
+    )}
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    scans = set()
+    for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'):
+        match = _SCAN.match(row[3])
+        if match:
+            table = aliases.get(match.group(1), match.group(1))
+            if table in tables:
+                scans.add(table)
+    return scans
+
+
+def time_statement(conn, sql, repeat):
+    """Best wall time of a statement in milliseconds, after one warm-up run
+
+    The minimum is the least noisy estimate of what the query itself costs.
+    """
+    conn.execute(sql).fetchall()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--teams', type=int, default=5000, help='Teams in the synthetic league')
+    parser.add_argument('--finished-gw', type=int, default=20)
+    parser.add_argument('--selected', type=int, default=5, help='Teams in the ?teams= selection')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per statement (best is kept)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Timing baseline file')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='Allowed slowdown factor')
+    parser.add_argument('--record', action='store_true', help='Write timings to the baseline file')
+    parser.add_argument('--keep', action='store_true', help='Keep the synthetic database directory')
+    args = parser.parse_args()
+
+    # Point every path at a scratch directory before config is imported
+    work_dir = tempfile.mkdtemp(prefix='vantix-plans-')
+    os.environ.update({
+        'DATABASE_PATH': os.path.join(work_dir, 'fpl_data.db'),
+        'REFERENCE_DATABASE_PATH': os.path.join(work_dir, 'fpl_reference.db'),
+        'LOG_FILE': os.path.join(work_dir, 'app.log'),
+    })
+
+    try:
+        from data.database import get_league_db_path, get_live_db_path, REFERENCE_DATABASE_PATH
+
+        print(f"Building synthetic league: {args.teams} teams x {args.finished_gw} gameweeks")
+        entry_ids = build_league(
+            get_league_db_path(LEAGUE_CODE), REFERENCE_DATABASE_PATH, get_live_db_path(LEAGUE_CODE),
+            args.teams, args.finished_gw
+        )
+
+        import app as dashboard
+        from data.database import get_league_reader
+        dashboard.limiter.enabled = False
+        client = dashboard.app.test_client()
+
+        reader = get_league_reader(LEAGUE_CODE)
+        traced = []
+        reader.set_trace_callback(traced.append)
+
+        endpoints = sorted(
+            rule.rule.rsplit('/', 1)[1] for rule in dashboard.app.url_map.iter_rules()
+            if rule.rule.startswith('/api/<int:league_code>/') and 'GET' in rule.methods
+        )
+        selection = '&'.join(f'teams={entry_id}' for entry_id in entry_ids[:args.selected])
+
+        statements = {}  # "endpoint [mode] #n" -> (endpoint, mode, sql)
+
+        from data.league_matrix import get_league_matrix
+        get_league_matrix(LEAGUE_CODE)
+        for index, sql in enumerate(traced, start=1):
+            statements[f'league-matrix [load] #{index}'] = ('league-matrix', 'load', sql)
+
+        for endpoint in endpoints:
+            for mode, query in (('league', ''), ('teams', selection)):
+                dashboard.cache.clear()
+                traced.clear()
+                response = client.get(f'/api/{LEAGUE_CODE}/{endpoint}?{query}')
+                if response.status_code != 200:
+                    print(f"FAIL {endpoint} [{mode}]: HTTP {response.status_code}")
+                    statements[f'{endpoint} [{mode}] HTTP'] = None
+                    continue
+                selects = [sql for sql in traced if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+                for index, sql in enumerate(selects, start=1):
+                    statements[f'{endpoint} [{mode}] #{index}'] = (endpoint, mode, sql)
+        reader.set_trace_callback(None)
+
+        baseline = {}
+        if not args.record and os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+
+        failures = 0
+        timings = {}
+        for key, statement in statements.items():
+            if statement is None:
+                failures += 1
+                continue
+            endpoint, mode, sql = statement
+
+            problems = []
+            allowed = EXPECTED_SCANS.get((endpoint, mode))
+            unexpected = full_scans(reader, sql) - ALWAYS_SCANNABLE - (allowed or set())
+            if allowed is None:
+                problems.append('no EXPECTED_SCANS entry for this endpoint')
+            elif unexpected:
+                problems.append(f"full scan of {', '.join(sorted(unexpected))}")
+
+            elapsed = timings[key] = round(time_statement(reader, sql, args.repeat), 3)
+            previous = baseline.get(key)
+            timing = f"{elapsed:.2f} ms" + (f" (baseline {previous:.2f} ms)" if previous is not None else '')
+            if previous is not None and elapsed > previous * args.tolerance and elapsed - previous > MIN_REGRESSION_MS:
+                problems.append('slower than baseline')
+
+            if problems:
+                failures += 1
+                print(f"FAIL {key}: {timing}; {'; '.join(problems)}\n     {' '.join(sql.split())[:200]}")
+            else:
+                print(f"ok   {key}: {timing}")
+
+        if args.record:
+            os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+            with open(args.baseline, 'w') as f:
+                json.dump(timings, f, indent=2, sort_keys=True)
+            print(f"Recorded {len(timings)} timings in {args.baseline}")
+        elif not baseline:
+            print(f"No timing baseline at {args.baseline} (run with --record to create one)")
+
+        print(f"{len(statements)} statements checked, {failures} failure(s)")
+        return 1 if failures else 0
+    finally:
+        if args.keep:
+            print(f"Kept {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
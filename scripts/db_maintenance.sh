@@ -1,6 +1,6 @@
 #!/bin/bash
 # Vantix Database Maintenance Script
-# Runs: VACUUM to optimize + Archive old seasons
+# Runs: VACUUM to optimize + Archive old seasons + Prune old-season API cache
 # Schedule: Weekly (Sundays at 2 AM)
 
 set -e
@@ -34,6 +34,7 @@ source venv/bin/activate
 
 # Run Python maintenance script
 python3 << 'PYTHON_SCRIPT'
+import fcntl
 import os
 import sys
 import sqlite3
@@ -64,15 +65,27 @@ def get_season_from_gameweek_dates(db_path):
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
-        # Get earliest gameweek deadline
-        result = cursor.execute(
-            "SELECT MIN(deadline) FROM gameweeks WHERE id = 1"
-        ).fetchone()
+        tables = {row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )}
+        
+        if 'league_meta' in tables:
+            # Season tag (GW1 deadline year) recorded by the collector
+            result = cursor.execute(
+                "SELECT value FROM league_meta WHERE key = 'season'"
+            ).fetchone()
+        elif 'gameweeks' in tables:
+            # Older databases kept their own copy of the gameweeks table
+            result = cursor.execute(
+                "SELECT MIN(deadline) FROM gameweeks WHERE id = 1"
+            ).fetchone()
+        else:
+            result = None
         
         conn.close()
         
         if result and result[0]:
-            # Parse deadline (format: 2024-08-16T17:30:00Z)
+            # Parse year (deadline format: 2024-08-16T17:30:00Z)
             deadline_year = int(result[0][:4])
             
             # FPL season starts in August
@@ -89,6 +102,7 @@ def vacuum_database(db_path):
         conn = sqlite3.connect(db_path)
         print(f"  Running VACUUM on {db_path.name}...")
         conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
         conn.close()
         print(f"  ✓ VACUUM completed")
         return True
@@ -96,6 +110,31 @@ def vacuum_database(db_path):
         print(f"  ✗ VACUUM failed: {e}")
         return False
 
+def league_lock(db_path):
+    """Hold the league's snapshot lock so no refresh publishes underneath us"""
+    lock_file = open(f"{db_path}.lock", "a")
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    return lock_file
+
+def vacuum_league_database(db_path):
+    """VACUUM a published league snapshot into a new file and swap it in"""
+    vacuumed = Path(f"{db_path}.vacuum")
+    try:
+        with league_lock(db_path):
+            print(f"  Running VACUUM on {db_path.name}...")
+            vacuumed.unlink(missing_ok=True)
+            conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+            conn.execute("VACUUM INTO ?", (str(vacuumed),))
+            conn.close()
+            # Readers hold the old file open and pick up the new one on their next request
+            os.replace(vacuumed, db_path)
+        print(f"  ✓ VACUUM completed")
+        return True
+    except Exception as e:
+        vacuumed.unlink(missing_ok=True)
+        print(f"  ✗ VACUUM failed: {e}")
+        return False
+
 def archive_old_season(league_code, db_path):
     """Archive database if it contains old season data"""
     current_season = get_current_fpl_season()
@@ -113,16 +152,52 @@ def archive_old_season(league_code, db_path):
         archive_path = ARCHIVE_DIR / archive_filename
         
         print(f"  → Archiving old season to {archive_filename}")
-        shutil.copy2(db_path, archive_path)
-        
-        # Remove the old database (will be recreated on next data collection)
-        db_path.unlink()
+        with league_lock(db_path):
+            # Published snapshots are single self-contained files
+            shutil.copy2(db_path, archive_path)
+            
+            # Remove the old database and any half-built refresh (recreated on next data collection)
+            db_path.unlink()
+            for staged in db_path.parent.glob(f"{db_path.name}.*"):
+                if staged.suffix != ".lock":
+                    staged.unlink(missing_ok=True)
+            
+            # Live points from that season are superseded by the archived snapshot
+            for live in db_path.parent.glob(f"fpl_live_{league_code}.db*"):
+                live.unlink(missing_ok=True)
         print(f"  ✓ Archived and removed old season database")
         return True
     else:
         print(f"  ✓ Database is current season - keeping active")
         return False
 
+def prune_http_cache(reference_db):
+    """Drop FPL API responses cached as immutable in earlier seasons"""
+    sys.path.insert(0, str(APP_DIR))
+    import config
+    from data.http_cache import HTTPCache
+    
+    if not config.HTTP_CACHE_DIR:
+        return
+    
+    print("FPL API response cache:")
+    try:
+        conn = sqlite3.connect(f"{reference_db.as_uri()}?mode=ro", uri=True)
+        result = conn.execute("SELECT deadline FROM gameweeks WHERE id = 1").fetchone()
+        conn.close()
+    except Exception as e:
+        print(f"  ✗ Could not read the season: {e}")
+        return
+    
+    if not result or not result[0]:
+        print(f"  Could not determine season - skipping")
+        return
+    
+    # Same season tag the collector stamps on immutable entries (GW1 deadline year)
+    season_tag = result[0][:4]
+    removed = HTTPCache().prune(season_tag)
+    print(f"  ✓ Pruned {removed} files not tagged for season {season_tag}")
+
 # Main maintenance
 print(f"\n=== Current FPL Season: {get_current_fpl_season()} ===\n")
 
@@ -141,8 +216,17 @@ for league in leagues:
     
     if not archived and db_path.exists():
         # Only VACUUM if not archived (i.e., current season)
-        vacuum_database(db_path)
+        vacuum_league_database(db_path)
+    
+    print()
+
+reference_db = DATA_DIR / "fpl_reference.db"
+if reference_db.exists():
+    print("Shared reference store:")
+    vacuum_database(reference_db)
+    print()
     
+    prune_http_cache(reference_db)
     print()
 
 print("=== Maintenance Complete ===")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Local FPL API simulator
+Serves synthetic bootstrap-static, league standings, entry history, transfers,
+picks and live gameweek points so the collector can be exercised and
+benchmarked offline. The gameweek after --finished-gw is in progress and its
+live points build up over --live-minutes of real time.
+
+Usage:
+    python scripts/fpl_simulator.py --teams 10000 --latency 0.02 --error-rate 0.01
+    FPL_API_BASE_URL=http://127.0.0.1:8765 python collect_all_leagues.py
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PLAYER_COUNT = 600
+TOTAL_GAMEWEEKS = 38
+PAGE_SIZE = 50  # Standings per page, as on the real API
+CHIPS = ['wildcard', 'freehit', 'bboost', '3xc']
+SEASON_START = datetime(2025, 8, 15, 17, 30)
+
+
+class SimulatedFPL:
+    """Deterministic synthetic FPL season
+
+    Every league has the same number of teams; consecutive league IDs share
+    half of their entries, so multi-league runs see overlapping members.
+    """
+
+    def __init__(self, teams=100, finished_gw=10, seed=0, live_minutes=90):
+        self.teams = teams
+        self.finished_gw = finished_gw
+        self.seed = seed
+        self.live_minutes = live_minutes
+        self.started_at = time.time()
+
+    def _rng(self, *parts):
+        return random.Random(':'.join(str(part) for part in (self.seed,) + parts))
+
+    def bootstrap(self):
+        rng = self._rng('bootstrap')
+        elements = [{
+            'id': player_id,
+            'web_name': f'Player{player_id}',
+            'first_name': 'Sim',
+            'second_name': f'Player {player_id}',
+            'element_type': 1 + player_id % 4,
+            'team': 1 + player_id % 20,
+            'goals_scored': rng.randint(0, 15),
+            'assists': rng.randint(0, 10),
+            'clean_sheets': rng.randint(0, 12),
+            'now_cost': rng.randint(40, 130)
+        } for player_id in range(1, PLAYER_COUNT + 1)]
+
+        events = [{
+            'id': gw,
+            'deadline_time': (SEASON_START + timedelta(weeks=gw - 1)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'finished': gw <= self.finished_gw,
+            'is_current': gw == max(1, self.finished_gw),
+            'is_next': gw == self.finished_gw + 1
+        } for gw in range(1, TOTAL_GAMEWEEKS + 1)]
+
+        return {'elements': elements, 'events': events}
+
+    def league_entries(self, league_id):
+        start = 1 + (league_id % 1000) * max(1, self.teams // 2)
+        return range(start, start + self.teams)
+
+    def standings(self, league_id, page):
+        entries = self.league_entries(league_id)
+        offset = (page - 1) * PAGE_SIZE
+        results = [{
+            'entry': entry_id,
+            'entry_name': f'Sim Team {entry_id}',
+            'player_name': f'Manager {entry_id}',
+            'rank': offset + index + 1,
+            'total': self.season(entry_id)['history'][-1]['total_points'] if self.finished_gw else 0
+        } for index, entry_id in enumerate(entries[offset:offset + PAGE_SIZE])]
+
+        return {
+            'league': {'id': league_id, 'name': f'Sim League {league_id}'},
+            'standings': {'has_next': offset + PAGE_SIZE < len(entries), 'page': page, 'results': results}
+        }
+
+    @lru_cache(maxsize=20000)
+    def season(self, entry_id):
+        """An entry's whole season so far: history, chips, transfers and squads"""
+        rng = self._rng('entry', entry_id)
+        squad = rng.sample(range(1, PLAYER_COUNT + 1), 15)
+        chip_gws = {rng.randint(1, TOTAL_GAMEWEEKS): chip for chip in rng.sample(CHIPS, 2)}
+
+        history, transfers, squads = [], [], {}
+        total = 0
+        # Squads run one gameweek past the last finished one (the live gameweek)
+        for gw in range(1, self.finished_gw + 2):
+            event_transfers = 0 if gw == 1 else rng.choice([0, 0, 1, 1, 2])
+            for _ in range(event_transfers):
+                out_index = rng.randrange(15)
+                player_in = rng.choice([p for p in range(1, PLAYER_COUNT + 1) if p not in squad])
+                transfers.append({
+                    'element_in': player_in,
+                    'element_out': squad[out_index],
+                    'event': gw,
+                    'time': (SEASON_START + timedelta(weeks=gw - 1, hours=-2)).strftime('%Y-%m-%dT%H:%M:%SZ')
+                })
+                squad[out_index] = player_in
+
+            squads[gw] = list(squad)
+            if gw > self.finished_gw:
+                break
+
+            points = rng.randint(20, 110)
+            total += points
+            history.append({
+                'event': gw,
+                'points': points,
+                'total_points': total,
+                'rank': rng.randint(1, 10_000_000),
+                'bank': rng.randint(0, 50),
+                'value': rng.randint(990, 1050),
+                'event_transfers': event_transfers,
+                'event_transfers_cost': max(0, event_transfers - 1) * 4
+            })
+
+        chips = [{'name': chip, 'event': gw} for gw, chip in sorted(chip_gws.items()) if gw <= self.finished_gw]
+        return {'history': history, 'chips': chips, 'transfers': transfers, 'squads': squads,
+                'chip_gws': chip_gws}
+
+    def history(self, entry_id):
+        season = self.season(entry_id)
+        return {'current': season['history'], 'chips': season['chips'], 'past': []}
+
+    def transfers(self, entry_id):
+        return list(reversed(self.season(entry_id)['transfers']))  # Newest first, like the API
+
+    def picks(self, entry_id, gameweek):
+        season = self.season(entry_id)
+        squad = season['squads'].get(gameweek)
+        if squad is None:
+            return None
+        chip = season['chip_gws'].get(gameweek)
+        captain_multiplier = 3 if chip == '3xc' else 2
+        return {
+            'active_chip': chip,
+            'picks': [{
+                'element': player_id,
+                'position': index + 1,
+                'multiplier': captain_multiplier if index == 0 else (1 if index < 11 or chip == 'bboost' else 0),
+                'is_captain': index == 0,
+                'is_vice_captain': index == 1
+            } for index, player_id in enumerate(squad)]
+        }
+
+    def live(self, gameweek):
+        """Player points for a gameweek; the live gameweek accrues over live_minutes"""
+        if gameweek > self.finished_gw + 1:
+            return None
+        progress = 1.0
+        if gameweek == self.finished_gw + 1:
+            progress = min(1.0, (time.time() - self.started_at) / max(1.0, self.live_minutes * 60))
+
+        rng = self._rng('live', gameweek)
+        return {'elements': [{
+            'id': player_id,
+            'stats': {'total_points': int(rng.choice([0, 1, 1, 2, 2, 2, 3, 5, 6, 8, 12]) * progress)}
+        } for player_id in range(1, PLAYER_COUNT + 1)]}
+
+    def respond(self, path, query):
+        """Return the JSON body for a request path, or None for unknown routes"""
+        if path == '/bootstrap-static/':
+            return self.bootstrap()
+
+        match = re.fullmatch(r'/leagues-classic/(\d+)/standings/', path)
+        if match:
+            page = int(query.get('page_standings', ['1'])[0])
+            return self.standings(int(match.group(1)), page)
+
+        match = re.fullmatch(r'/entry/(\d+)/history/', path)
+        if match:
+            return self.history(int(match.group(1)))
+
+        match = re.fullmatch(r'/entry/(\d+)/transfers/', path)
+        if match:
+            return self.transfers(int(match.group(1)))
+
+        match = re.fullmatch(r'/entry/(\d+)/event/(\d+)/picks/', path)
+        if match:
+            return self.picks(int(match.group(1)), int(match.group(2)))
+
+        match = re.fullmatch(r'/event/(\d+)/live/', path)
+        if match:
+            return self.live(int(match.group(1)))
+
+        return None
+
+
+def make_handler(simulator, latency=0.0, error_rate=0.0):
+    """Build a request handler class bound to a simulator"""
+    stats = {'requests': 0, 'errors': 0, 'not_modified': 0}
+    stats_lock = threading.Lock()
+
+    class SimulatorHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body=None, etag=None):
+            payload = json.dumps(body).encode('utf-8') if body is not None else b''
+            self.send_response(status)
+            if etag:
+                self.send_header('ETag', etag)
+            if body is not None:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            with stats_lock:
+                stats['requests'] += 1
+
+            if latency:
+                time.sleep(latency * random.uniform(0.5, 1.5))
+
+            if error_rate and random.random() < error_rate:
+                with stats_lock:
+                    stats['errors'] += 1
+                self._send_json(random.choice([429, 503]), {'detail': 'Simulated error'})
+                return
+
+            url = urlparse(self.path)
+            path = url.path[len('/api'):] if url.path.startswith('/api/') else url.path
+            body = simulator.respond(path, parse_qs(url.query))
+            if body is None:
+                self._send_json(404, {'detail': 'Not found.'})
+                return
+
+            etag = '"' + hashlib.md5(json.dumps(body, sort_keys=True).encode('utf-8')).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                with stats_lock:
+                    stats['not_modified'] += 1
+                self._send_json(304, etag=etag)
+                return
+
+            self._send_json(200, body, etag)
+
+    SimulatorHandler.stats = stats
+    return SimulatorHandler
+
+
+def start_server(simulator, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0):
+    """Serve a simulator on a background thread; returns (server, base_url, stats)"""
+    handler = make_handler(simulator, latency, error_rate)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://{host}:{server.server_address[1]}'
+    return server, base_url, handler.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a synthetic FPL API for offline collection runs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--teams', type=int, default=100, help='Teams per league')
+    parser.add_argument('--finished-gw', type=int, default=10, help='Last finished gameweek')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean response latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 429/503')
+    parser.add_argument('--live-minutes', type=float, default=90,
+                        help='Real minutes over which the in-progress gameweek\'s points accrue')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    simulator = SimulatedFPL(
+        teams=args.teams, finished_gw=args.finished_gw, seed=args.seed, live_minutes=args.live_minutes
+    )
+    server, base_url, stats = start_server(
+        simulator, args.host, args.port, args.latency, args.error_rate
+    )
+
+    print(f"FPL simulator serving {args.teams} teams per league at {base_url}")
+    print(f"Set FPL_API_BASE_URL={base_url} to collect against it (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"Requests: {stats['requests']}, errors: {stats['errors']}, 304s: {stats['not_modified']}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
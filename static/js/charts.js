@@ -3,6 +3,12 @@
  * Updated with better hover markers and visible chip markers
  */
 
+// Replace a chart with a message, keeping its canvas for the next render
+function showChartMessage(canvasId, message) {
+    const container = document.getElementById(canvasId).parentElement;
+    container.innerHTML = `<p style="text-align: center; color: #9B9B9B; padding: 40px;">${message}</p><canvas id="${canvasId}"></canvas>`;
+}
+
 // Render chip legend for league position chart
 function renderChipLegend() {
     const legendContainer = document.getElementById('chipLegend');
@@ -23,24 +29,6 @@ function renderChipLegend() {
     `).join('');
 }
 
-// Initialize Cumulative Points Chart
-function initializeCumulativePointsChart() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    const leagueCode = VantixDashboard.leagueCode;
-    
-    console.log('Loading cumulative points for teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/cumulative-points?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            renderCumulativePointsChart(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading cumulative points:', error);
-        });
-}
-
 // Render Cumulative Points Chart
 function renderCumulativePointsChart(teamsData) {
     const ctx = document.getElementById('cumulativePointsChart');
@@ -113,24 +101,6 @@ function renderCumulativePointsChart(teamsData) {
     console.log('Cumulative points chart rendered');
 }
 
-// Initialize League Position Chart
-function initializeLeaguePositionChart() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    const leagueCode = VantixDashboard.leagueCode;
-    
-    console.log('Loading league positions for teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/league-positions?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            renderLeaguePositionChart(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading league positions:', error);
-        });
-}
-
 // Get chip marker shape based on chip name
 function getChipMarkerShape(chipName) {
     const chipLower = chipName.toLowerCase();
@@ -269,35 +239,13 @@ function renderLeaguePositionChart(teamsData) {
     console.log('League position chart rendered');
 }
 
-// Initialize Form Chart
-function initializeFormChart() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    const leagueCode = VantixDashboard.leagueCode;
-    
-    console.log('Loading form chart for teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/form-chart?${queryString}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log('Form data received:', data);
-            if (!data.teams || data.teams.length === 0) {
-                const container = document.getElementById('formChart').parentElement;
-                container.innerHTML = '<p style="text-align: center; color: #9B9B9B; padding: 40px;">No form data available yet.</p><canvas id="formChart"></canvas>';
-                return;
-            }
-            renderFormChart(data.teams);
-        })
-        .catch(error => {
-            console.error('Form chart error:', error);
-            const container = document.getElementById('formChart').parentElement;
-            container.innerHTML = '<p style="text-align: center; color: #9B9B9B; padding: 40px;">Unable to load form data.</p><canvas id="formChart"></canvas>';
-        });
+// Display Form Chart from its dashboard panel data
+function displayFormChart(data) {
+    if (!data.teams || data.teams.length === 0) {
+        showChartMessage('formChart', 'No form data available yet.');
+        return;
+    }
+    renderFormChart(data.teams);
 }
 
 // Render Form Chart
@@ -381,35 +329,13 @@ function renderFormChart(teamsData) {
     console.log('Form chart rendered successfully');
 }
 
-// Initialize Points Distribution Chart
-function initializeDistributionChart() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    const leagueCode = VantixDashboard.leagueCode;
-    
-    console.log('Loading distribution for teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/points-distribution?${queryString}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log('Distribution data received:', data);
-            if (!data.labels || data.labels.length === 0) {
-                const container = document.getElementById('distributionChart').parentElement;
-                container.innerHTML = '<p style="text-align: center; color: #9B9B9B; padding: 40px;">No distribution data available.</p><canvas id="distributionChart"></canvas>';
-                return;
-            }
-            renderDistributionChart(data);
-        })
-        .catch(error => {
-            console.error('Distribution error:', error);
-            const container = document.getElementById('distributionChart').parentElement;
-            container.innerHTML = '<p style="text-align: center; color: #9B9B9B; padding: 40px;">Unable to load distribution.</p><canvas id="distributionChart"></canvas>';
-        });
+// Display Points Distribution Chart from its dashboard panel data
+function displayDistributionChart(data) {
+    if (!data.labels || data.labels.length === 0) {
+        showChartMessage('distributionChart', 'No distribution data available.');
+        return;
+    }
+    renderDistributionChart(data);
 }
 
 // Render Points Distribution Chart
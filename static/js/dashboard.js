@@ -52,11 +52,7 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Initialize components - add delay to ensure DOM is ready
         setTimeout(() => {
-            initializeStats();
-            initializeAllCharts();
-            initializeTransfers();
-            initializeAnalytics();
-            initializeNewFeatures(); // NEW FEATURES
+            loadDashboard();
             setupRefreshButton();
         }, 100);
         
@@ -135,67 +131,125 @@ function setupMasterFilterListeners() {
 
 // Update all visualizations when filter changes
 function updateAllVisualizations() {
-    initializeStats(); // NOW UPDATES STATS TOO
-    initializeAllCharts();
-    initializeTransfers();
-    initializeAnalytics();
-    initializeNewFeatures(); // NEW FEATURES
+    loadDashboard(); // Stats, charts, transfers, analytics and new features in one request
 }
 
-// Load and display stats - NOW FILTERED BY SELECTED TEAMS
-function initializeStats() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
+// Dashboard panels by section name: how to display each one's data and its failure
+function getDashboardPanels() {
+    const message = (elementId, text) => {
+        document.getElementById(elementId).innerHTML =
+            `<p class="text-center" style="color: var(--color-text-lighter);">${text}</p>`;
+    };
     
-    fetch(`/api/${leagueCode}/stats?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            document.getElementById('stat-leader-value').textContent = data.current_leader.points;
-            document.getElementById('stat-leader-detail').textContent = data.current_leader.team;
-            
-            document.getElementById('stat-goals-value').textContent = data.most_goals.goals;
-            document.getElementById('stat-goals-detail').textContent = data.most_goals.team;
-            
-            document.getElementById('stat-cs-value').textContent = data.most_clean_sheets.clean_sheets;
-            document.getElementById('stat-cs-detail').textContent = data.most_clean_sheets.team;
-            
-            document.getElementById('stat-highest-value').textContent = data.highest_gameweek.points;
-            document.getElementById('stat-highest-detail').textContent = 
-                `${data.highest_gameweek.team} (GW${data.highest_gameweek.gameweek})`;
-        })
-        .catch(error => {
-            console.error('Error loading stats:', error);
-        });
-}
-
-// Initialize all charts
-function initializeAllCharts() {
-    initializeCumulativePointsChart();
-    initializeLeaguePositionChart();
-    initializeFormChart();
-    initializeDistributionChart();
+    return {
+        'stats': {
+            display: displayStats,
+            fail: () => {}
+        },
+        'cumulative-points': {
+            display: data => renderCumulativePointsChart(data.teams),
+            fail: () => {}
+        },
+        'league-positions': {
+            display: data => renderLeaguePositionChart(data.teams),
+            fail: () => {}
+        },
+        'form-chart': {
+            display: displayFormChart,
+            fail: () => showChartMessage('formChart', 'Unable to load form data.')
+        },
+        'points-distribution': {
+            display: displayDistributionChart,
+            fail: () => showChartMessage('distributionChart', 'Unable to load distribution.')
+        },
+        'recent-transfers': {
+            display: data => {
+                if (data.gameweek) {
+                    document.getElementById('transfersGameweek').textContent = `GW ${data.gameweek}`;
+                }
+                displayTransfers(data.transfers);
+            },
+            fail: () => message('transfersList', 'Failed to load transfers')
+        },
+        'team-comparison': {
+            display: data => displayComparison(data.teams),
+            fail: () => message('comparisonGrid', 'Failed to load comparison data')
+        },
+        'biggest-movers': {
+            display: displayBiggestMovers,
+            fail: () => message('moversGrid', 'Failed to load movers data')
+        },
+        'weekly-performance': {
+            display: data => renderWeeklyHeatmap(data.teams),
+            fail: () => {}
+        },
+        'head-to-head': {
+            display: data => displayHeadToHead(data.teams),
+            fail: () => {}
+        },
+        'differentials': {
+            display: data => displayDifferentials(data.teams),
+            fail: () => {}
+        },
+        'podium': {
+            display: data => displayPodium(data.podium),
+            fail: () => {}
+        }
+    };
 }
 
-// Load and display transfers
-function initializeTransfers() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
+// Load dashboard panels (default all) for the selected teams in one request
+function loadDashboard(sections) {
+    const panels = getDashboardPanels();
+    sections = sections || Object.keys(panels);
     
-    fetch(`/api/${leagueCode}/recent-transfers?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            if (data.gameweek) {
-                document.getElementById('transfersGameweek').textContent = `GW ${data.gameweek}`;
+    const params = new URLSearchParams({ sections: sections.join(',') });
+    VantixDashboard.selectedTeams.forEach(id => params.append('teams', id));
+    
+    console.log('Loading dashboard sections:', sections);
+    
+    fetch(`/api/${leagueCode}/dashboard?${params}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
             }
-            displayTransfers(data.transfers);
+            return response.json();
+        })
+        .then(data => {
+            sections.forEach(section => {
+                try {
+                    if (!data[section] || data[section].error) {
+                        throw new Error(data[section] ? data[section].error : 'Missing from response');
+                    }
+                    panels[section].display(data[section]);
+                } catch (error) {
+                    console.error(`Error loading ${section}:`, error);
+                    panels[section].fail(error);
+                }
+            });
         })
         .catch(error => {
-            console.error('Error loading transfers:', error);
-            document.getElementById('transfersList').innerHTML = 
-                '<p class="text-center" style="color: var(--color-text-lighter);">Failed to load transfers</p>';
+            console.error('Error loading dashboard:', error);
+            sections.forEach(section => panels[section].fail(error));
         });
 }
 
+// Display stats - filtered by selected teams
+function displayStats(data) {
+    document.getElementById('stat-leader-value').textContent = data.current_leader.points;
+    document.getElementById('stat-leader-detail').textContent = data.current_leader.team;
+    
+    document.getElementById('stat-goals-value').textContent = data.most_goals.goals;
+    document.getElementById('stat-goals-detail').textContent = data.most_goals.team;
+    
+    document.getElementById('stat-cs-value').textContent = data.most_clean_sheets.clean_sheets;
+    document.getElementById('stat-cs-detail').textContent = data.most_clean_sheets.team;
+    
+    document.getElementById('stat-highest-value').textContent = data.highest_gameweek.points;
+    document.getElementById('stat-highest-detail').textContent = 
+        `${data.highest_gameweek.team} (GW${data.highest_gameweek.gameweek})`;
+}
+
 // Display transfers in the UI
 function displayTransfers(transfers) {
     const container = document.getElementById('transfersList');
@@ -261,37 +315,6 @@ function getChipBadgeText(chipName) {
     return chipName;
 }
 
-// Initialize analytics sections
-function initializeAnalytics() {
-    initializeComparison();
-    initializeBiggestMovers();
-}
-
-// Initialize team comparison
-function initializeComparison() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    console.log('Initializing comparison with teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/team-comparison?${queryString}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log('Comparison data received:', data);
-            displayComparison(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading comparison:', error);
-            document.getElementById('comparisonGrid').innerHTML = 
-                '<p class="text-center" style="color: var(--color-text-lighter);">Failed to load comparison data</p>';
-        });
-}
-
 // Display team comparison with min/max highlighting
 function displayComparison(teams) {
     const container = document.getElementById('comparisonGrid');
@@ -365,31 +388,6 @@ function displayComparison(teams) {
     `).join('');
 }
 
-// Initialize biggest movers
-function initializeBiggestMovers() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    console.log('Initializing biggest movers with teams:', selectedTeams);
-    
-    fetch(`/api/${leagueCode}/biggest-movers?${queryString}`)
-        .then(response => {
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-            return response.json();
-        })
-        .then(data => {
-            console.log('Movers data received:', data);
-            displayBiggestMovers(data);
-        })
-        .catch(error => {
-            console.error('Error loading movers:', error);
-            document.getElementById('moversGrid').innerHTML = 
-                '<p class="text-center" style="color: var(--color-text-lighter);">Failed to load movers data</p>';
-        });
-}
-
 // Display biggest movers
 function displayBiggestMovers(data) {
     const container = document.getElementById('moversGrid');
@@ -453,29 +451,6 @@ function setupRefreshButton() {
     });
 }
 
-// Initialize all new features
-function initializeNewFeatures() {
-    initializeWeeklyHeatmap();
-    initializeHeadToHead();
-    initializeDifferentials();
-    initializePodium();
-}
-
-// Initialize Weekly Performance Heatmap
-function initializeWeeklyHeatmap() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    fetch(`/api/${leagueCode}/weekly-performance?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            renderWeeklyHeatmap(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading weekly heatmap:', error);
-        });
-}
-
 // Render Weekly Performance Heatmap
 function renderWeeklyHeatmap(teams) {
     const container = document.getElementById('weeklyHeatmap');
@@ -529,21 +504,6 @@ function renderWeeklyHeatmap(teams) {
     container.innerHTML = html;
 }
 
-// Initialize Head-to-Head
-function initializeHeadToHead() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    fetch(`/api/${leagueCode}/head-to-head?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            displayHeadToHead(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading head-to-head:', error);
-        });
-}
-
 // Display Head-to-Head
 function displayHeadToHead(teams) {
     const container = document.getElementById('headToHeadTable');
@@ -580,21 +540,6 @@ function displayHeadToHead(teams) {
     container.innerHTML = html;
 }
 
-// Initialize Differentials
-function initializeDifferentials() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    fetch(`/api/${leagueCode}/differentials?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            displayDifferentials(data.teams);
-        })
-        .catch(error => {
-            console.error('Error loading differentials:', error);
-        });
-}
-
 // Display Differentials - True Unique Players Only, ALL shown
 function displayDifferentials(teams) {
     const container = document.getElementById('differentialsGrid');
@@ -627,21 +572,6 @@ function displayDifferentials(teams) {
     }).join('');
 }
 
-// Initialize Podium
-function initializePodium() {
-    const selectedTeams = Array.from(VantixDashboard.selectedTeams);
-    const queryString = selectedTeams.map(id => `teams=${id}`).join('&');
-    
-    fetch(`/api/${leagueCode}/podium?${queryString}`)
-        .then(response => response.json())
-        .then(data => {
-            displayPodium(data.podium);
-        })
-        .catch(error => {
-            console.error('Error loading podium:', error);
-        });
-}
-
 // Display Podium - Table Format
 function displayPodium(podium) {
     const container = document.getElementById('podiumDisplay');
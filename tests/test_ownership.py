@@ -0,0 +1,37 @@
+"""
+Tests for the packed bitset ownership engine (data.ownership)
+"""
+
+import unittest
+
+from data.ownership import OwnershipMatrix
+
+
+class OwnershipMatrixTests(unittest.TestCase):
+
+    def setUp(self):
+        self.matrix = OwnershipMatrix({
+            101: [1, 2, 3],
+            102: [1, 4, 70],
+            103: [1, 2, 5],
+        })
+
+    def test_rows_ignores_unknown_and_repeated_ids(self):
+        self.assertEqual(self.matrix.rows([103, 101, 999, 103, 101]).tolist(), [2, 0])
+
+    def test_repeated_id_is_counted_once(self):
+        counts = self.matrix.ownership_counts([101, 101, 102])
+        self.assertEqual(counts[1], 2)
+        self.assertEqual(counts[2], 1)
+
+    def test_repeated_id_keeps_its_differentials(self):
+        # A team repeated in the selection must not count as owning its players twice
+        self.assertEqual(self.matrix.differentials([101, 102, 101]), {101: [2, 3], 102: [4, 70]})
+        self.assertEqual(self.matrix.differential_counts([101, 102, 101]), {101: 2, 102: 2})
+
+    def test_most_owned(self):
+        self.assertEqual(self.matrix.most_owned(2), [(1, 3), (2, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()